@@ -4,7 +4,8 @@ from .models import Color, Product
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "archived_at")
+    list_display = ("id", "name", "material_cost", "archived_at")
+    readonly_fields = ("material_cost",)
 
 
 @admin.register(Color)
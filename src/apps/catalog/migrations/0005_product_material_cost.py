@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_price_retail_uah'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='material_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:50
+
+from django.db import migrations, models
+
+
+def create_variant_cache_version(apps, schema_editor):
+    VariantCacheVersion = apps.get_model("catalog", "VariantCacheVersion")
+    VariantCacheVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_product_material_cost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VariantCacheVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_variant_cache_version, migrations.RunPython.noop),
+    ]
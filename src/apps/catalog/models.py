@@ -12,6 +12,8 @@ class Product(models.Model):
         max_digits=10, decimal_places=2, null=True, blank=True
     )
     cost_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Собівартість матеріалів за нормами BOM і середніми цінами складу; рахується автоматично.
+    material_cost = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     is_bundle = models.BooleanField(default=False)
     primary_material = models.ForeignKey(
         "materials.Material",
@@ -151,6 +153,20 @@ class Variant(models.Model):
         return f"{self.product.name} (custom)"
 
 
+class VariantCacheVersion(models.Model):
+    """Single-row counter bumped on Variant updates and deletes.
+
+    Workers compare it with the version of their in-process id cache; see
+    apps.catalog.variants.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"variant ids v{self.version}"
+
+
 class BundleComponent(models.Model):
     bundle = models.ForeignKey(
         Product,
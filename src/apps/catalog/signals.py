@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.catalog.models import Variant
+from apps.catalog.variants import clear_variant_id_cache, invalidate_variant_id_cache
+
+
+@receiver(post_save, sender=Variant)
+def invalidate_variant_ids_on_update(sender, instance, created, **kwargs):
+    # New variants cannot make a cached key -> id pair wrong; updates and deletes can.
+    if created:
+        return
+    clear_variant_id_cache()
+    transaction.on_commit(invalidate_variant_id_cache)
+
+
+@receiver(post_delete, sender=Variant)
+def invalidate_variant_ids_on_delete(sender, instance, **kwargs):
+    clear_variant_id_cache()
+    transaction.on_commit(invalidate_variant_id_cache)
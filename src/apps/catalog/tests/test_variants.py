@@ -0,0 +1,87 @@
+"""Tests for bulk variant resolution and its id cache."""
+import pytest
+from django.db.models import F
+
+from apps.catalog import variants
+from apps.catalog.models import Variant, VariantCacheVersion
+from apps.catalog.variants import VariantKey, resolve_or_create_variants_bulk
+from apps.materials.models import Material, MaterialColor
+
+from .conftest import ColorFactory, ProductFactory
+
+
+@pytest.mark.django_db
+def test_bulk_resolver_creates_missing_and_reuses_existing(django_assert_num_queries):
+    product = ProductFactory()
+    existing = Variant.objects.create(product=product, color=ColorFactory())
+    new_color = ColorFactory()
+    material = Material.objects.create(name="Felt")
+    primary = MaterialColor.objects.create(material=material, name="Grey", code=1)
+    keys = [
+        VariantKey(product_id=product.id, color_id=existing.color_id),
+        VariantKey(product_id=product.id, color_id=new_color.id),
+        VariantKey(product_id=product.id, primary_material_color_id=primary.id),
+    ]
+
+    # SELECT, INSERT and re-SELECT, plus the first read of the cache version.
+    with django_assert_num_queries(4):
+        variant_ids = resolve_or_create_variants_bulk(keys)
+
+    assert variant_ids[keys[0]] == existing.id
+    assert Variant.objects.get(id=variant_ids[keys[1]]).color_id == new_color.id
+    assert Variant.objects.get(id=variant_ids[keys[2]]).primary_material_color_id == primary.id
+    assert Variant.objects.filter(product=product).count() == 3
+
+
+@pytest.mark.django_db
+def test_bulk_resolver_skips_unresolvable_keys():
+    product = ProductFactory()
+
+    assert resolve_or_create_variants_bulk([VariantKey(product_id=product.id)]) == {}
+    assert not Variant.objects.exists()
+
+
+@pytest.mark.django_db
+def test_bulk_resolver_serves_committed_ids_from_cache(
+    django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    product = ProductFactory()
+    key = VariantKey(product_id=product.id, color_id=ColorFactory().id)
+    with django_capture_on_commit_callbacks(execute=True):
+        variant_id = resolve_or_create_variants_bulk([key])[key]
+
+    with django_assert_num_queries(0):
+        assert resolve_or_create_variants_bulk([key]) == {key: variant_id}
+
+
+@pytest.mark.django_db
+def test_variant_delete_invalidates_cache(django_capture_on_commit_callbacks):
+    product = ProductFactory()
+    key = VariantKey(product_id=product.id, color_id=ColorFactory().id)
+    with django_capture_on_commit_callbacks(execute=True):
+        old_id = resolve_or_create_variants_bulk([key])[key]
+    with django_capture_on_commit_callbacks(execute=True):
+        Variant.objects.get(id=old_id).delete()
+
+    new_id = resolve_or_create_variants_bulk([key])[key]
+
+    assert new_id != old_id
+    assert Variant.objects.filter(id=new_id).exists()
+
+
+@pytest.mark.django_db
+def test_cache_follows_version_bumped_by_another_worker(
+    django_capture_on_commit_callbacks, monkeypatch
+):
+    product = ProductFactory()
+    key = VariantKey(product_id=product.id, color_id=ColorFactory().id)
+    with django_capture_on_commit_callbacks(execute=True):
+        old_id = resolve_or_create_variants_bulk([key])[key]
+    # Another worker recolors the variant: its bump reaches this worker through the database.
+    Variant.objects.filter(id=old_id).update(color=ColorFactory())
+    VariantCacheVersion.objects.update(version=F("version") + 1)
+    assert resolve_or_create_variants_bulk([key])[key] == old_id
+
+    monkeypatch.setattr(variants, "VARIANT_CACHE_VERSION_TTL_SECONDS", 0)
+
+    assert resolve_or_create_variants_bulk([key])[key] != old_id
@@ -1,6 +1,46 @@
 from __future__ import annotations
 
-from apps.catalog.models import Variant
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from functools import reduce
+from operator import or_
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from apps.catalog.models import Variant, VariantCacheVersion
+
+VARIANT_ID_CACHE_SIZE = 4096
+# Bumped on Variant updates/deletes so every worker drops its key -> id cache. The counter is a
+# database row because each worker's Django cache is its own local-memory cache.
+VARIANT_CACHE_VERSION_ID = 1
+# How long a worker trusts its cache before reading the counter again.
+VARIANT_CACHE_VERSION_TTL_SECONDS = 5.0
+
+
+class VariantKey(NamedTuple):
+    product_id: int
+    color_id: int | None = None
+    primary_material_color_id: int | None = None
+    secondary_material_color_id: int | None = None
+
+    @property
+    def is_resolvable(self) -> bool:
+        if self.color_id is not None:
+            return (
+                self.primary_material_color_id is None
+                and self.secondary_material_color_id is None
+            )
+        return self.primary_material_color_id is not None
+
+
+_cache_lock = threading.Lock()
+_variant_ids: OrderedDict[VariantKey, int] = OrderedDict()
+_variant_ids_version: int | None = None
+_variant_ids_checked_at: float | None = None
 
 
 def resolve_or_create_variant(
@@ -33,3 +73,105 @@ def resolve_or_create_variant(
         defaults={"is_active": True},
     )
     return variant
+
+
+def resolve_or_create_variants_bulk(keys: Iterable[VariantKey]) -> dict[VariantKey, int]:
+    """Map keys to variant ids, creating missing variants.
+
+    Uses at most one SELECT, one INSERT and one re-SELECT for the whole batch, plus a read of
+    the cache version every `VARIANT_CACHE_VERSION_TTL_SECONDS`. Keys that
+    cannot identify a variant (see `VariantKey.is_resolvable`) are left out of the result.
+    """
+    wanted = {key for key in keys if key.is_resolvable}
+    resolved = _cached_variant_ids(wanted)
+    missing = wanted - resolved.keys()
+    if missing:
+        found = _select_variant_ids(missing)
+        to_create = missing - found.keys()
+        if to_create:
+            Variant.objects.bulk_create(
+                [Variant(**key._asdict(), is_active=True) for key in to_create],
+                ignore_conflicts=True,
+            )
+            found.update(_select_variant_ids(to_create))
+        resolved.update(found)
+        _cache_variant_ids_on_commit(found)
+    return resolved
+
+
+def clear_variant_id_cache() -> None:
+    global _variant_ids_version, _variant_ids_checked_at
+    with _cache_lock:
+        _variant_ids.clear()
+        _variant_ids_version = None
+        _variant_ids_checked_at = None
+
+
+def invalidate_variant_id_cache() -> None:
+    clear_variant_id_cache()
+    updated = VariantCacheVersion.objects.filter(pk=VARIANT_CACHE_VERSION_ID).update(
+        version=F("version") + 1
+    )
+    if not updated:
+        VariantCacheVersion.objects.get_or_create(
+            pk=VARIANT_CACHE_VERSION_ID, defaults={"version": 1}
+        )
+
+
+def _select_variant_ids(keys: set[VariantKey]) -> dict[VariantKey, int]:
+    condition = reduce(or_, (Q(**key._asdict()) for key in keys))
+    rows = Variant.objects.filter(condition).values_list(
+        "id",
+        "product_id",
+        "color_id",
+        "primary_material_color_id",
+        "secondary_material_color_id",
+    )
+    return {VariantKey(*row[1:]): row[0] for row in rows}
+
+
+def _cached_variant_ids(keys: set[VariantKey]) -> dict[VariantKey, int]:
+    global _variant_ids_version, _variant_ids_checked_at
+    now = time.monotonic()
+    with _cache_lock:
+        checked_at = _variant_ids_checked_at
+    if checked_at is None or now - checked_at >= VARIANT_CACHE_VERSION_TTL_SECONDS:
+        version = _read_cache_version()
+        with _cache_lock:
+            if _variant_ids_version != version:
+                _variant_ids.clear()
+                _variant_ids_version = version
+            _variant_ids_checked_at = now
+    with _cache_lock:
+        hits = {}
+        for key in keys:
+            variant_id = _variant_ids.get(key)
+            if variant_id is not None:
+                _variant_ids.move_to_end(key)
+                hits[key] = variant_id
+        return hits
+
+
+def _read_cache_version() -> int:
+    version = (
+        VariantCacheVersion.objects.filter(pk=VARIANT_CACHE_VERSION_ID)
+        .values_list("version", flat=True)
+        .first()
+    )
+    return version or 0
+
+
+def _cache_variant_ids_on_commit(variant_ids: dict[VariantKey, int]) -> None:
+    # Ids of variants created in a transaction that later rolls back must never be cached.
+    with _cache_lock:
+        version = _variant_ids_version
+
+    def store():
+        with _cache_lock:
+            if _variant_ids_version != version:
+                return
+            _variant_ids.update(variant_ids)
+            while len(_variant_ids) > VARIANT_ID_CACHE_SIZE:
+                _variant_ids.popitem(last=False)
+
+    transaction.on_commit(store)
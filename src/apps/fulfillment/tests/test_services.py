@@ -114,7 +114,7 @@ def test_complete_production_order_orchestrated():
     user = UserFactory()
     model = ProductFactory(is_bundle=False)
     color = ColorFactory()
-    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_order_finished"):
+    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_orders_finished"):
         order = create_production_orders_for_sales_order(
             sales_order=create_sales_order_orchestrated(
                 source=SalesOrder.Source.SITE,
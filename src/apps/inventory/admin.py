@@ -5,6 +5,8 @@ from apps.inventory.models import (
     ProductStockTransferLine,
     ProductStockMovement,
     ProductStock,
+    StockReservation,
+    StockSnapshot,
     WIPStockMovement,
     WIPStockRecord,
 )
@@ -12,11 +14,19 @@ from apps.inventory.models import (
 
 @admin.register(ProductStock)
 class StockRecordAdmin(admin.ModelAdmin):
-    list_display = ("id", "warehouse", "variant", "quantity")
+    list_display = ("id", "warehouse", "variant", "quantity", "reserved_quantity")
     list_filter = ("warehouse",)
     search_fields = ("variant__product__name", "variant__sku")
 
 
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ("id", "stock_record", "sales_order_line", "quantity", "status", "created_at")
+    list_filter = ("status",)
+    search_fields = ("stock_record__variant__product__name", "sales_order_line__sales_order__id")
+    readonly_fields = ("stock_record", "sales_order_line", "quantity", "status")
+
+
 @admin.register(ProductStockMovement)
 class StockMovementAdmin(admin.ModelAdmin):
     list_display = ("id", "stock_record", "quantity_change", "reason", "created_at")
@@ -49,3 +59,10 @@ class FinishedStockTransferAdmin(admin.ModelAdmin):
 class FinishedStockTransferLineAdmin(admin.ModelAdmin):
     list_display = ("id", "transfer", "variant", "quantity")
     search_fields = ("transfer__id", "variant__product__name")
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "warehouse_code", "item_name", "color_label", "quantity", "unit")
+    list_filter = ("kind", "warehouse")
+    search_fields = ("item_name", "color_label")
@@ -5,3 +5,6 @@ class InventoryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.inventory"
     label = "inventory"
+
+    def ready(self):
+        import apps.inventory.signals  # noqa: F401
@@ -0,0 +1,21 @@
+from django import forms
+
+from apps.inventory.models import StockSnapshot
+from apps.warehouses.models import Warehouse
+
+# Design system: one class set for all form controls (see assets/tailwind/input.css)
+FORM_SELECT = "form-select"
+
+
+class StockFilterForm(forms.Form):
+    kind = forms.ChoiceField(
+        choices=StockSnapshot.Kind.choices,
+        required=False,
+        widget=forms.Select(attrs={"class": FORM_SELECT}),
+    )
+    warehouse = forms.ModelChoiceField(
+        queryset=Warehouse.objects.filter(is_active=True).order_by("code"),
+        required=False,
+        empty_label="Усі склади",
+        widget=forms.Select(attrs={"class": FORM_SELECT}),
+    )
@@ -0,0 +1,273 @@
+"""Stock movement ledgers and point-in-time balances.
+
+Every kind of stock is a balance table plus an append-only movement ledger. Daily
+`StockCheckpoint` rows store closing balances, so a historical balance is the nearest
+checkpoint plus the movements after it instead of a sum over the whole ledger.
+`verify_stock_ledgers` checks balances against their ledgers, incrementally.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.inventory.models import (
+    ProductStock,
+    ProductStockMovement,
+    StockCheckpoint,
+    StockKind,
+    StockLedgerWatermark,
+    WIPStockMovement,
+    WIPStockRecord,
+)
+from apps.materials.models import MaterialStock, MaterialStockMovement
+
+
+# Re-check movements this far behind the watermark: a transaction may commit a movement
+# some time after its created_at.
+VERIFY_OVERLAP = timedelta(minutes=5)
+VERIFY_CHUNK_SIZE = 500
+
+
+@dataclass(frozen=True)
+class Ledger:
+    kind: str
+    balance_model: type[models.Model]
+    movement_model: type[models.Model]
+
+
+@dataclass(frozen=True)
+class LedgerDrift:
+    kind: str
+    record_id: int
+    warehouse_id: int
+    balance: Decimal
+    ledger: Decimal
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "kind": self.kind,
+            "record_id": self.record_id,
+            "warehouse_id": self.warehouse_id,
+            "balance": str(self.balance),
+            "ledger": str(self.ledger),
+            "difference": str(self.balance - self.ledger),
+        }
+
+
+@dataclass
+class LedgerVerification:
+    checked: dict[str, int]
+    drifted: list[LedgerDrift]
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "checked": self.checked,
+            "drifted_count": len(self.drifted),
+            "drifted": [drift.as_dict() for drift in self.drifted],
+        }
+
+
+LEDGERS = {
+    StockKind.FINISHED: Ledger(StockKind.FINISHED, ProductStock, ProductStockMovement),
+    StockKind.WIP: Ledger(StockKind.WIP, WIPStockRecord, WIPStockMovement),
+    StockKind.MATERIAL: Ledger(StockKind.MATERIAL, MaterialStock, MaterialStockMovement),
+}
+
+
+def get_ledger(kind: str) -> Ledger:
+    try:
+        return LEDGERS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown stock kind: {kind}") from None
+
+
+def end_of_day(day: date) -> datetime:
+    """Start of the next local day: the exclusive upper bound for movements of `day`."""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def stock_as_of(
+    kind: str,
+    at: date | datetime,
+    *,
+    warehouse_id: int | None = None,
+    source_ids: Iterable[int] | None = None,
+) -> dict[int, Decimal]:
+    """Balance per stock record at `at` (a date means its end of day); zero balances are omitted.
+
+    Starts from the latest checkpoint not after `at` and adds only the movements since then.
+    """
+    ledger = get_ledger(kind)
+    moment = end_of_day(at) if not isinstance(at, datetime) else at
+    ids = set(source_ids) if source_ids is not None else None
+
+    checkpoints = StockCheckpoint.objects.filter(kind=kind)
+    if warehouse_id is not None:
+        checkpoints = checkpoints.filter(warehouse_id=warehouse_id)
+    # Checkpoint day D closes at local midnight of D + 1, so days before `moment`'s local date.
+    checkpoint_day = checkpoints.filter(taken_on__lt=timezone.localdate(moment)).aggregate(
+        day=Max("taken_on")
+    )["day"]
+
+    balances: dict[int, Decimal] = {}
+    movements = ledger.movement_model.objects.filter(created_at__lt=moment)
+    if checkpoint_day is not None:
+        rows = checkpoints.filter(taken_on=checkpoint_day)
+        if ids is not None:
+            rows = rows.filter(source_id__in=ids)
+        balances.update(rows.values_list("source_id", "quantity"))
+        movements = movements.filter(created_at__gte=end_of_day(checkpoint_day))
+    if warehouse_id is not None:
+        movements = movements.filter(stock_record__warehouse_id=warehouse_id)
+    if ids is not None:
+        movements = movements.filter(stock_record_id__in=ids)
+
+    for source_id, change in _sum_by_record(movements):
+        balances[source_id] = balances.get(source_id, Decimal("0")) + Decimal(change)
+    return {source_id: quantity for source_id, quantity in balances.items() if quantity}
+
+
+@transaction.atomic
+def take_stock_checkpoint(day: date, *, kinds: Iterable[str] | None = None) -> dict[str, int]:
+    """Store closing balances of `day` for every stock record; returns rows written per kind.
+
+    Re-running a day replaces its rows. Only take checkpoints for days that are over, so no
+    in-flight transaction can still add a movement dated inside them.
+    """
+    written = {}
+    for kind in kinds or LEDGERS:
+        ledger = get_ledger(kind)
+        # Drop the day first so a re-run starts from the previous checkpoint, not from itself.
+        StockCheckpoint.objects.filter(kind=kind, taken_on=day).delete()
+        balances = stock_as_of(kind, end_of_day(day))
+        warehouse_ids = dict(ledger.balance_model.objects.values_list("id", "warehouse_id"))
+        StockCheckpoint.objects.bulk_create(
+            [
+                StockCheckpoint(
+                    kind=kind,
+                    source_id=source_id,
+                    warehouse_id=warehouse_ids[source_id],
+                    taken_on=day,
+                    quantity=quantity,
+                )
+                for source_id, quantity in balances.items()
+            ],
+            batch_size=1000,
+        )
+        written[kind] = len(balances)
+    return written
+
+
+def verify_stock_ledgers(
+    *,
+    kinds: Iterable[str] | None = None,
+    full: bool = False,
+    chunk_size: int = VERIFY_CHUNK_SIZE,
+) -> LedgerVerification:
+    """Compare stock records with their movement sums.
+
+    By default only records with movements (or balance edits, where the table tracks
+    `updated_at`) since the kind's watermark are checked. The first run and `full=True` walk
+    the whole balance table in primary-key chunks.
+    """
+    started_at = timezone.now()
+    result = LedgerVerification(checked={}, drifted=[])
+    for kind in kinds or LEDGERS:
+        ledger = get_ledger(kind)
+        watermark, _ = StockLedgerWatermark.objects.get_or_create(kind=kind)
+        if full or watermark.verified_until is None:
+            chunks = _all_record_chunks(ledger, chunk_size)
+        else:
+            chunks = _touched_record_chunks(
+                ledger, watermark.verified_until - VERIFY_OVERLAP, chunk_size
+            )
+
+        checked = 0
+        drifted: list[LedgerDrift] = []
+        for condition, size in chunks:
+            checked += size
+            drifted.extend(_drifted_records(ledger, condition))
+
+        watermark.verified_until = started_at
+        watermark.last_checked = checked
+        watermark.last_drifted = len(drifted)
+        watermark.save()
+        result.checked[kind] = checked
+        result.drifted.extend(drifted)
+    return result
+
+
+def _all_record_chunks(ledger: Ledger, chunk_size: int):
+    last_id = 0
+    while True:
+        ids = list(
+            ledger.balance_model.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return
+        yield Q(id__gte=ids[0], id__lte=ids[-1]), len(ids)
+        last_id = ids[-1]
+
+
+def _touched_record_chunks(ledger: Ledger, since: datetime, chunk_size: int):
+    touched = set(
+        ledger.movement_model.objects.filter(created_at__gte=since)
+        .order_by()
+        .values_list("stock_record_id", flat=True)
+        .distinct()
+    )
+    if any(field.name == "updated_at" for field in ledger.balance_model._meta.fields):
+        touched.update(
+            ledger.balance_model.objects.filter(updated_at__gte=since).values_list("id", flat=True)
+        )
+    ids = sorted(touched)
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start : start + chunk_size]
+        yield Q(id__in=chunk), len(chunk)
+
+
+def _drifted_records(ledger: Ledger, condition: Q) -> list[LedgerDrift]:
+    # Balance and ledger sum come from one statement, so both see the same snapshot.
+    ledger_sum = (
+        ledger.movement_model.objects.filter(stock_record=OuterRef("pk"))
+        .order_by()
+        .values("stock_record")
+        .annotate(total=Sum("quantity_change"))
+        .values("total")
+    )
+    amount = models.DecimalField(max_digits=14, decimal_places=3)
+    rows = (
+        ledger.balance_model.objects.filter(condition)
+        .annotate(ledger_total=Coalesce(Subquery(ledger_sum), Value(0), output_field=amount))
+        .exclude(quantity=F("ledger_total"))
+        .order_by("id")
+        .values_list("id", "warehouse_id", "quantity", "ledger_total")
+    )
+    return [
+        LedgerDrift(
+            kind=ledger.kind,
+            record_id=record_id,
+            warehouse_id=warehouse_id,
+            balance=Decimal(quantity),
+            ledger=Decimal(ledger_total),
+        )
+        for record_id, warehouse_id, quantity, ledger_total in rows
+    ]
+
+
+def _sum_by_record(movements) -> list[tuple[int, int | Decimal]]:
+    return list(
+        movements.order_by()
+        .values("stock_record_id")
+        .annotate(change=Sum("quantity_change"))
+        .values_list("stock_record_id", "change")
+    )
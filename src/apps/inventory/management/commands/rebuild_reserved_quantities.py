@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.inventory.reservations import rebuild_reserved_quantities
+
+
+class Command(BaseCommand):
+    help = "Recompute ProductStock.reserved_quantity from active stock reservations."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = rebuild_reserved_quantities()
+        self.stdout.write(f"Stock records fixed: {fixed}")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.snapshots import rebuild_stock_snapshots
+
+
+class Command(BaseCommand):
+    help = "Recreate the stock overview snapshot from the finished, WIP and material balances."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_stock_snapshots(batch_size=options["batch_size"])
+        for kind, count in written.items():
+            self.stdout.write(f"{kind}: {count}")
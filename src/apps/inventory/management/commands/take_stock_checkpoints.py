@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.inventory.ledgers import LEDGERS, take_stock_checkpoint
+
+
+class Command(BaseCommand):
+    help = "Store daily closing stock balances so historical balances read only a ledger tail."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Last day to checkpoint, YYYY-MM-DD. Defaults to yesterday (local time).",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=1,
+            help="Number of consecutive days ending at --date, oldest first (for backfills).",
+        )
+        parser.add_argument("--kind", action="append", choices=list(LEDGERS), dest="kinds")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["date"]:
+            try:
+                last_day = date.fromisoformat(options["date"])
+            except ValueError as exc:
+                raise CommandError(f"Invalid --date: {options['date']}") from exc
+        else:
+            last_day = today - timedelta(days=1)
+        if last_day >= today:
+            raise CommandError("Only days that are over can be checkpointed.")
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        for offset in range(options["days"] - 1, -1, -1):
+            day = last_day - timedelta(days=offset)
+            written = take_stock_checkpoint(day, kinds=options["kinds"])
+            summary = " ".join(f"{kind}={count}" for kind, count in written.items())
+            self.stdout.write(f"{day.isoformat()}: {summary}")
@@ -0,0 +1,47 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.ledgers import LEDGERS, VERIFY_CHUNK_SIZE, verify_stock_ledgers
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Check stock balances against movement sums for records touched since the last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", action="append", choices=list(LEDGERS), dest="kinds")
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Check every stock record, not only those touched since the watermark.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=VERIFY_CHUNK_SIZE)
+        parser.add_argument("--output", help="Write the JSON report to this file too.")
+        parser.add_argument(
+            "--fail-on-drift",
+            action="store_true",
+            help="Exit with an error when any record drifted (for cron alerting).",
+        )
+
+    def handle(self, *args, **options):
+        result = verify_stock_ledgers(
+            kinds=options["kinds"],
+            full=options["full"],
+            chunk_size=options["chunk_size"],
+        )
+        report = json.dumps(result.as_dict(), ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                handle.write(report)
+        self.stdout.write(report)
+
+        if result.drifted:
+            logger.warning(
+                "Stock ledger drift records=%s",
+                ",".join(f"{drift.kind}:{drift.record_id}" for drift in result.drifted),
+            )
+            if options["fail_on_drift"]:
+                raise CommandError(f"Stock ledger drift in {len(result.drifted)} record(s)")
@@ -0,0 +1,62 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.inventory.snapshots import MATERIAL_RELATED, VARIANT_RELATED, snapshot_fields
+
+SOURCES = (
+    ("finished", "inventory", "ProductStock", VARIANT_RELATED),
+    ("wip", "inventory", "WIPStockRecord", VARIANT_RELATED),
+    ("material", "materials", "MaterialStock", MATERIAL_RELATED),
+)
+
+
+def backfill_snapshots(apps, schema_editor):
+    StockSnapshot = apps.get_model("inventory", "StockSnapshot")
+    for kind, app_label, model_name, related in SOURCES:
+        sources = apps.get_model(app_label, model_name).objects.select_related(*related)
+        last_id = 0
+        while True:
+            batch = list(sources.filter(id__gt=last_id).order_by("id")[:1000])
+            if not batch:
+                break
+            StockSnapshot.objects.bulk_create(
+                [StockSnapshot(**snapshot_fields(kind, source)) for source in batch]
+            )
+            last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_price_retail_uah'),
+        ('inventory', '0001_initial'),
+        ('materials', '0001_initial'),
+        ('warehouses', '0002_seed_main_warehouse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('finished', 'Готова продукція'), ('wip', 'WIP'), ('material', 'Матеріали')], max_length=16)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('warehouse_code', models.CharField(max_length=64)),
+                ('item_name', models.CharField(max_length=255)),
+                ('color_label', models.CharField(blank=True, max_length=255)),
+                ('unit', models.CharField(choices=[('pcs', 'шт'), ('m', 'м'), ('m2', 'м²'), ('g', 'г'), ('ml', 'мл')], max_length=8)),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('material', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='materials.material')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='catalog.variant')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='warehouses.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Знімок залишку',
+                'verbose_name_plural': 'Знімки залишків',
+                'indexes': [models.Index(fields=['kind', 'warehouse', 'item_name', 'color_label', 'id'], name='inv_snapshot_wh_label_idx'), models.Index(fields=['kind', 'item_name', 'color_label', 'id'], name='inv_snapshot_label_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'source_id'), name='inventory_stocksnapshot_kind_source_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stock_snapshot'),
+        ('production', '0004_order_search_text'),
+        ('sales', '0002_line_production_counters'),
+        ('warehouses', '0002_seed_main_warehouse'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('finished', 'Готова продукція'), ('wip', 'WIP'), ('material', 'Матеріали')], max_length=16)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('taken_on', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Контрольна точка залишку',
+                'verbose_name_plural': 'Контрольні точки залишків',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='productstockmovement',
+            index=models.Index(fields=['created_at', 'stock_record'], name='inv_prodmove_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wipstockmovement',
+            index=models.Index(fields=['created_at', 'stock_record'], name='inv_wipmove_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockcheckpoint',
+            name='warehouse',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_checkpoints', to='warehouses.warehouse'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcheckpoint',
+            index=models.Index(fields=['kind', 'warehouse', 'taken_on'], name='inv_checkpoint_wh_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockcheckpoint',
+            constraint=models.UniqueConstraint(fields=('kind', 'taken_on', 'source_id'), name='inventory_stockcheckpoint_kind_day_source_uniq'),
+        ),
+    ]
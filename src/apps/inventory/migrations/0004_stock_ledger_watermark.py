@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLedgerWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('finished', 'Готова продукція'), ('wip', 'WIP'), ('material', 'Матеріали')], max_length=16, unique=True)),
+                ('verified_until', models.DateTimeField(blank=True, null=True)),
+                ('last_checked', models.PositiveIntegerField(default=0)),
+                ('last_drifted', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
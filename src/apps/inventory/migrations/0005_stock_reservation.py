@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_product_material_cost'),
+        ('inventory', '0004_stock_ledger_watermark'),
+        ('sales', '0002_line_production_counters'),
+        ('warehouses', '0002_seed_main_warehouse'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('active', 'Активний'), ('released', 'Знято'), ('consumed', 'Відвантажено')], default='active', max_length=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.AddField(
+            model_name='productstock',
+            name='reserved_quantity',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='productstock',
+            constraint=models.CheckConstraint(condition=models.Q(('reserved_quantity__lte', models.F('quantity'))), name='inventory_productstock_reserved_lte_quantity'),
+        ),
+        migrations.AddField(
+            model_name='stockreservation',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stockreservation',
+            name='sales_order_line',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='sales.salesorderline'),
+        ),
+        migrations.AddField(
+            model_name='stockreservation',
+            name='stock_record',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reservations', to='inventory.productstock'),
+        ),
+        migrations.AddIndex(
+            model_name='stockreservation',
+            index=models.Index(fields=['stock_record', 'status'], name='inv_reservation_record_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 
+from apps.materials.models import BOM
 from config import settings
 
 
@@ -31,6 +32,8 @@ class ProductStock(models.Model):
         related_name="product_stocks",
     )
     quantity = models.PositiveIntegerField(default=0)
+    # Units held by active StockReservation rows; only quantity - reserved_quantity is free.
+    reserved_quantity = models.PositiveIntegerField(default=0)
 
     class Meta:
         constraints = [
@@ -38,10 +41,18 @@ class ProductStock(models.Model):
                 fields=["warehouse", "variant"],
                 name="inventory_stockrecord_warehouse_variant_uniq",
             ),
+            models.CheckConstraint(
+                condition=models.Q(reserved_quantity__lte=models.F("quantity")),
+                name="inventory_productstock_reserved_lte_quantity",
+            ),
         ]
         verbose_name = "Залишок на складі"
         verbose_name_plural = "Залишки на складі"
 
+    @property
+    def available_quantity(self) -> int:
+        return self.quantity - self.reserved_quantity
+
     def __str__(self):
         return f"{self.variant}: {self.quantity}"
 
@@ -93,6 +104,9 @@ class ProductStockMovement(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["created_at", "stock_record"], name="inv_prodmove_created_idx"),
+        ]
 
     def __str__(self):
         sign = "+" if self.quantity_change > 0 else ""
@@ -170,6 +184,9 @@ class WIPStockMovement(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["created_at", "stock_record"], name="inv_wipmove_created_idx"),
+        ]
 
     def __str__(self) -> str:
         sign = "+" if self.quantity_change > 0 else ""
@@ -241,3 +258,163 @@ class ProductStockTransferLine(models.Model):
 
     def __str__(self) -> str:
         return f"{self.transfer_id}: {self.variant_id} x {self.quantity}"
+
+
+class StockReservation(models.Model):
+    """Finished goods held for a sales order line until shipped (consumed) or released."""
+
+    class Status(models.TextChoices):
+        ACTIVE = "active", "Активний"
+        RELEASED = "released", "Знято"
+        CONSUMED = "consumed", "Відвантажено"
+
+    stock_record = models.ForeignKey(
+        ProductStock,
+        on_delete=models.PROTECT,
+        related_name="reservations",
+    )
+    sales_order_line = models.ForeignKey(
+        "sales.SalesOrderLine",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="stock_reservations",
+    )
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.ACTIVE)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["stock_record", "status"], name="inv_reservation_record_idx"),
+        ]
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.stock_record}: {self.quantity} ({self.status})"
+
+
+class StockKind(models.TextChoices):
+    FINISHED = "finished", "Готова продукція"
+    WIP = "wip", "WIP"
+    MATERIAL = "material", "Матеріали"
+
+
+class StockSnapshot(models.Model):
+    """Read model of current stock: one row per finished, WIP or material balance.
+
+    Rows carry display labels so the stock overview is a single indexed query. The movement
+    services refresh them; `rebuild_stock_snapshots` recreates them from the balance tables.
+    """
+
+    Kind = StockKind
+
+    kind = models.CharField(max_length=16, choices=StockKind.choices)
+    # Primary key of the ProductStock, WIPStockRecord or MaterialStock row, depending on kind.
+    source_id = models.PositiveBigIntegerField()
+    warehouse = models.ForeignKey(
+        "warehouses.Warehouse",
+        on_delete=models.CASCADE,
+        related_name="stock_snapshots",
+    )
+    warehouse_code = models.CharField(max_length=64)
+    variant = models.ForeignKey(
+        "catalog.Variant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    material = models.ForeignKey(
+        "materials.Material",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    item_name = models.CharField(max_length=255)
+    color_label = models.CharField(max_length=255, blank=True)
+    unit = models.CharField(max_length=8, choices=BOM.Unit.choices)
+    quantity = models.DecimalField(max_digits=12, decimal_places=3)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "source_id"],
+                name="inventory_stocksnapshot_kind_source_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["kind", "warehouse", "item_name", "color_label", "id"],
+                name="inv_snapshot_wh_label_idx",
+            ),
+            models.Index(
+                fields=["kind", "item_name", "color_label", "id"],
+                name="inv_snapshot_label_idx",
+            ),
+        ]
+        verbose_name = "Знімок залишку"
+        verbose_name_plural = "Знімки залишків"
+
+    def __str__(self) -> str:
+        return f"{self.warehouse_code}: {self.item_name} {self.color_label} ({self.quantity})"
+
+
+class StockCheckpoint(models.Model):
+    """Closing balance of one stock record at the end of `taken_on` (local time).
+
+    Only non-zero balances are stored: a record missing from a checkpoint day had 0.
+    """
+
+    kind = models.CharField(max_length=16, choices=StockKind.choices)
+    # Primary key of the ProductStock, WIPStockRecord or MaterialStock row, depending on kind.
+    source_id = models.PositiveBigIntegerField()
+    warehouse = models.ForeignKey(
+        "warehouses.Warehouse",
+        on_delete=models.CASCADE,
+        related_name="stock_checkpoints",
+    )
+    taken_on = models.DateField()
+    quantity = models.DecimalField(max_digits=14, decimal_places=3)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "taken_on", "source_id"],
+                name="inventory_stockcheckpoint_kind_day_source_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["kind", "warehouse", "taken_on"],
+                name="inv_checkpoint_wh_day_idx",
+            ),
+        ]
+        verbose_name = "Контрольна точка залишку"
+        verbose_name_plural = "Контрольні точки залишків"
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.source_id} @ {self.taken_on}: {self.quantity}"
+
+
+class StockLedgerWatermark(models.Model):
+    """Progress of `verify_stock_ledgers`: records touched before `verified_until` are checked."""
+
+    kind = models.CharField(max_length=16, choices=StockKind.choices, unique=True)
+    verified_until = models.DateTimeField(null=True, blank=True)
+    last_checked = models.PositiveIntegerField(default=0)
+    last_drifted = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.kind}: {self.verified_until}"
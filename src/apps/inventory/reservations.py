@@ -0,0 +1,184 @@
+"""Finished-goods reservations for sales order lines.
+
+`ProductStock.reserved_quantity` is the sum of the record's active `StockReservation`
+rows. Every operation locks only the stock rows it touches (`SELECT ... FOR UPDATE` in id
+order, so concurrent batches cannot deadlock) and applies a whole batch with bulk writes.
+Removals elsewhere only take `quantity - reserved_quantity`, so reserved units stay put until
+they are consumed or released.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.inventory.domain import VariantId, WarehouseId
+from apps.inventory.models import (
+    ProductStock,
+    ProductStockMovement,
+    StockReservation,
+    StockSnapshot,
+)
+from apps.inventory.snapshots import refresh_stock_snapshots
+
+if TYPE_CHECKING:
+    from django.contrib.auth.models import AbstractBaseUser
+
+
+@dataclass(frozen=True)
+class ReservationRequest:
+    warehouse_id: WarehouseId
+    variant_id: VariantId
+    quantity: int
+    sales_order_line_id: int | None = None
+
+
+@transaction.atomic
+def reserve_stock(
+    requests: Iterable[ReservationRequest],
+    *,
+    user: "AbstractBaseUser | None" = None,
+    partial: bool = False,
+) -> list[StockReservation]:
+    """Reserve free units for each request, in order.
+
+    All-or-nothing by default. With `partial=True` each request takes what is free (possibly
+    nothing) and the caller reads the reserved amounts from the returned rows.
+    """
+    batch = list(requests)
+    for request in batch:
+        if request.quantity <= 0:
+            raise ValueError("Quantity must be greater than 0")
+    records = _lock_records(
+        ProductStock.objects.filter(
+            warehouse_id__in={request.warehouse_id for request in batch},
+            variant_id__in={request.variant_id for request in batch},
+        )
+    )
+    by_key = {(record.warehouse_id, record.variant_id): record for record in records.values()}
+
+    reservations: list[StockReservation] = []
+    touched: dict[int, ProductStock] = {}
+    for request in batch:
+        record = by_key.get((request.warehouse_id, request.variant_id))
+        available = record.available_quantity if record else 0
+        if not partial and available < request.quantity:
+            raise ValueError(
+                f"Недостатньо вільного залишку: є {available}, потрібно {request.quantity}"
+            )
+        quantity = min(available, request.quantity)
+        if quantity <= 0:
+            continue
+        record.reserved_quantity += quantity
+        touched[record.pk] = record
+        reservations.append(
+            StockReservation(
+                stock_record=record,
+                sales_order_line_id=request.sales_order_line_id,
+                quantity=quantity,
+                created_by=user,
+            )
+        )
+
+    ProductStock.objects.bulk_update(list(touched.values()), ["reserved_quantity"])
+    return StockReservation.objects.bulk_create(reservations)
+
+
+@transaction.atomic
+def release_reservations(reservation_ids: Iterable[int]) -> int:
+    """Return active reservations to free stock; returns how many were released."""
+    reservations, records = _lock_active(reservation_ids)
+    for reservation in reservations:
+        records[reservation.stock_record_id].reserved_quantity -= reservation.quantity
+    ProductStock.objects.bulk_update(list(records.values()), ["reserved_quantity"])
+    _set_status(reservations, StockReservation.Status.RELEASED)
+    return len(reservations)
+
+
+@transaction.atomic
+def consume_reservations(
+    reservation_ids: Iterable[int],
+    *,
+    reason: str = ProductStockMovement.Reason.ORDER_OUT,
+    user: "AbstractBaseUser | None" = None,
+    notes: str = "",
+) -> list[ProductStockMovement]:
+    """Ship reserved units: take them off stock and off the reservation in one step."""
+    reservations, records = _lock_active(reservation_ids)
+    movements: list[ProductStockMovement] = []
+    for reservation in reservations:
+        record = records[reservation.stock_record_id]
+        record.quantity -= reservation.quantity
+        record.reserved_quantity -= reservation.quantity
+        movements.append(
+            ProductStockMovement(
+                stock_record=record,
+                quantity_change=-reservation.quantity,
+                reason=reason,
+                sales_order_line_id=reservation.sales_order_line_id,
+                created_by=user,
+                notes=notes,
+            )
+        )
+    ProductStock.objects.bulk_update(list(records.values()), ["quantity", "reserved_quantity"])
+    created = ProductStockMovement.objects.bulk_create(movements)
+    _set_status(reservations, StockReservation.Status.CONSUMED)
+    refresh_stock_snapshots(StockSnapshot.Kind.FINISHED, list(records))
+    return created
+
+
+def active_reservations_for_lines(line_ids: Iterable[int]) -> list[StockReservation]:
+    return list(
+        StockReservation.objects.filter(
+            sales_order_line_id__in=set(line_ids),
+            status=StockReservation.Status.ACTIVE,
+        ).order_by("id")
+    )
+
+
+def rebuild_reserved_quantities() -> int:
+    """Recompute `reserved_quantity` from active reservations; returns rows fixed."""
+    active_total = (
+        StockReservation.objects.filter(
+            stock_record=OuterRef("pk"), status=StockReservation.Status.ACTIVE
+        )
+        .order_by()
+        .values("stock_record")
+        .annotate(total=Sum("quantity"))
+        .values("total")
+    )
+    return (
+        ProductStock.objects.annotate(actual=Coalesce(Subquery(active_total), Value(0)))
+        .exclude(reserved_quantity=F("actual"))
+        .update(reserved_quantity=Coalesce(Subquery(active_total), Value(0)))
+    )
+
+
+def _lock_records(queryset) -> dict[int, ProductStock]:
+    return {record.pk: record for record in queryset.select_for_update().order_by("id")}
+
+
+def _lock_active(
+    reservation_ids: Iterable[int],
+) -> tuple[list[StockReservation], dict[int, ProductStock]]:
+    # Stock rows first, then reservations, in the same order as reserve_stock takes them.
+    ids = set(reservation_ids)
+    record_ids = StockReservation.objects.filter(id__in=ids).values("stock_record_id")
+    records = _lock_records(ProductStock.objects.filter(id__in=record_ids))
+    reservations = list(
+        StockReservation.objects.select_for_update()
+        .filter(id__in=ids, status=StockReservation.Status.ACTIVE)
+        .order_by("id")
+    )
+    return reservations, records
+
+
+def _set_status(reservations: list[StockReservation], status: str) -> None:
+    StockReservation.objects.filter(id__in=[reservation.pk for reservation in reservations]).update(
+        status=status, updated_at=timezone.now()
+    )
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, TypedDict
 
 from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
 from apps.catalog.models import Variant
@@ -15,7 +18,9 @@ from apps.inventory.models import (
     ProductStock,
     WIPStockMovement,
     WIPStockRecord,
+    StockSnapshot,
 )
+from apps.inventory.snapshots import refresh_stock_snapshots
 
 if TYPE_CHECKING:
     from django.contrib.auth.models import AbstractBaseUser
@@ -29,6 +34,19 @@ class StockKey(TypedDict):
     variant_id: VariantId
 
 
+@dataclass(frozen=True)
+class StockMovementEntry:
+    warehouse_id: WarehouseId
+    variant_id: VariantId
+    quantity_change: int
+    reason: str
+    production_order: "ProductionOrder | None" = None
+    sales_order_line: "SalesOrderLine | None" = None
+    related_transfer: ProductStockTransfer | None = None
+    user: "AbstractBaseUser | None" = None
+    notes: str = ""
+
+
 def get_stock_quantity(
     *,
     warehouse_id: WarehouseId,
@@ -54,6 +72,41 @@ def get_stock_quantity(
     return record.quantity if record else 0
 
 
+def get_stock_quantities(
+    *,
+    warehouse_id: WarehouseId,
+    variant_ids: Iterable[int],
+) -> dict[int, int]:
+    """On-hand quantity per variant in one query; variants without stock map to 0."""
+    wanted = set(variant_ids)
+    quantities = dict.fromkeys(wanted, 0)
+    if wanted:
+        quantities.update(
+            ProductStock.objects.for_warehouse(warehouse_id)
+            .filter(variant_id__in=wanted)
+            .values_list("variant_id", "quantity")
+        )
+    return quantities
+
+
+def get_available_stock_quantities(
+    *,
+    warehouse_id: WarehouseId,
+    variant_ids: Iterable[int],
+) -> dict[int, int]:
+    """Unreserved quantity per variant in one query; variants without stock map to 0."""
+    wanted = set(variant_ids)
+    quantities = dict.fromkeys(wanted, 0)
+    if wanted:
+        quantities.update(
+            ProductStock.objects.for_warehouse(warehouse_id)
+            .filter(variant_id__in=wanted)
+            .annotate(available=F("quantity") - F("reserved_quantity"))
+            .values_list("variant_id", "available")
+        )
+    return quantities
+
+
 @transaction.atomic
 def add_to_stock(
     *,
@@ -83,8 +136,8 @@ def add_to_stock(
         warehouse_id=stock_key["warehouse_id"],
         variant_id=stock_key["variant_id"],
     )
-    record.quantity += int(quantity)
-    record.save(update_fields=["quantity"])
+    ProductStock.objects.filter(pk=record.pk).update(quantity=F("quantity") + int(quantity))
+    record.refresh_from_db(fields=["quantity"])
 
     ProductStockMovement.objects.create(
         stock_record=record,
@@ -96,6 +149,7 @@ def add_to_stock(
         created_by=user,
         notes=notes,
     )
+    refresh_stock_snapshots(StockSnapshot.Kind.FINISHED, [record.pk])
     return record
 
 
@@ -123,19 +177,21 @@ def remove_from_stock(
         primary_material_color_id=primary_material_color_id,
         secondary_material_color_id=secondary_material_color_id,
     )
-    record = (
-        ProductStock.objects.for_warehouse(stock_key["warehouse_id"])
-        .for_variant(stock_key["variant_id"])
-        .first()
+    records = ProductStock.objects.for_warehouse(stock_key["warehouse_id"]).for_variant(
+        stock_key["variant_id"]
+    )
+    # Check and decrement in one statement: concurrent removals cannot both pass the check.
+    # Reserved units are not free to remove; they leave only through consume_reservations.
+    updated = records.filter(quantity__gte=F("reserved_quantity") + int(quantity)).update(
+        quantity=F("quantity") - int(quantity)
     )
+    record = records.first()
     if record is None:
         raise ValueError("Недостатньо на складі: є 0")
-
-    if record.quantity < int(quantity):
-        raise ValueError(f"Недостатньо на складі: є {record.quantity}, потрібно {int(quantity)}")
-
-    record.quantity -= int(quantity)
-    record.save(update_fields=["quantity"])
+    if not updated:
+        raise ValueError(
+            f"Недостатньо на складі: є {record.available_quantity}, потрібно {int(quantity)}"
+        )
 
     ProductStockMovement.objects.create(
         stock_record=record,
@@ -146,9 +202,80 @@ def remove_from_stock(
         created_by=user,
         notes=notes,
     )
+    refresh_stock_snapshots(StockSnapshot.Kind.FINISHED, [record.pk])
     return record
 
 
+@transaction.atomic
+def post_stock_movements(batch: list[StockMovementEntry]) -> list[ProductStockMovement]:
+    """Post many signed stock changes with a constant number of queries.
+
+    Entries are applied in order, so a batch fails exactly where the equivalent
+    sequence of add_to_stock/remove_from_stock calls would.
+    """
+    if not batch:
+        return []
+    for entry in batch:
+        if int(entry.quantity_change) == 0:
+            raise ValueError("Quantity change must not be 0")
+
+    variant_ids = {entry.variant_id for entry in batch}
+    existing_variant_ids = set(
+        Variant.objects.filter(id__in=variant_ids).values_list("id", flat=True)
+    )
+    missing_variant_ids = variant_ids - existing_variant_ids
+    if missing_variant_ids:
+        raise ValueError(f"Unknown variant ids: {sorted(missing_variant_ids)}")
+
+    keys = {(entry.warehouse_id, entry.variant_id) for entry in batch}
+    # Zero rows for new keys first, so every balance can be locked and updated in place.
+    ProductStock.objects.bulk_create(
+        [
+            ProductStock(warehouse_id=warehouse_id, variant_id=variant_id)
+            for warehouse_id, variant_id in keys
+        ],
+        ignore_conflicts=True,
+    )
+    exact_keys = Q(pk__in=[])
+    for warehouse_id, variant_id in keys:
+        exact_keys |= Q(warehouse_id=warehouse_id, variant_id=variant_id)
+    records = {
+        (record.warehouse_id, record.variant_id): record
+        # Only the batch's rows, in id order like apps.inventory.reservations, so concurrent
+        # batches cannot deadlock.
+        for record in ProductStock.objects.select_for_update().filter(exact_keys).order_by("id")
+    }
+
+    movements: list[ProductStockMovement] = []
+    for entry in batch:
+        record = records[(entry.warehouse_id, entry.variant_id)]
+        quantity_change = int(entry.quantity_change)
+        if record.available_quantity + quantity_change < 0:
+            raise ValueError(
+                f"Недостатньо на складі: є {record.available_quantity}, потрібно {-quantity_change}"
+            )
+        record.quantity += quantity_change
+        movements.append(
+            ProductStockMovement(
+                stock_record=record,
+                quantity_change=quantity_change,
+                reason=entry.reason,
+                related_production_order=entry.production_order,
+                sales_order_line=entry.sales_order_line,
+                related_transfer=entry.related_transfer,
+                created_by=entry.user,
+                notes=entry.notes,
+            )
+        )
+
+    ProductStock.objects.bulk_update(list(records.values()), ["quantity"])
+    created = ProductStockMovement.objects.bulk_create(movements)
+    refresh_stock_snapshots(
+        StockSnapshot.Kind.FINISHED, [record.pk for record in records.values()]
+    )
+    return created
+
+
 def _resolve_stock_key(
     *,
     warehouse_id: WarehouseId,
@@ -233,8 +360,8 @@ def add_to_wip_stock(
         warehouse_id=warehouse_id,
         variant_id=variant_id,
     )
-    record.quantity += int(quantity)
-    record.save(update_fields=["quantity"])
+    WIPStockRecord.objects.filter(pk=record.pk).update(quantity=F("quantity") + int(quantity))
+    record.refresh_from_db(fields=["quantity"])
 
     WIPStockMovement.objects.create(
         stock_record=record,
@@ -244,6 +371,7 @@ def add_to_wip_stock(
         created_by=user,
         notes=notes,
     )
+    refresh_stock_snapshots(StockSnapshot.Kind.WIP, [record.pk])
     return record
 
 
@@ -261,18 +389,16 @@ def remove_from_wip_stock(
     if int(quantity) <= 0:
         raise ValueError("Quantity must be greater than 0")
 
-    record = (
-        WIPStockRecord.objects.for_warehouse(warehouse_id).for_variant(variant_id).first()
+    records = WIPStockRecord.objects.for_warehouse(warehouse_id).for_variant(variant_id)
+    updated = records.filter(quantity__gte=int(quantity)).update(
+        quantity=F("quantity") - int(quantity)
     )
+    record = records.first()
     if record is None:
         raise ValueError("Недостатньо WIP на складі: є 0")
-
-    if record.quantity < int(quantity):
+    if not updated:
         raise ValueError(f"Недостатньо WIP на складі: є {record.quantity}, потрібно {int(quantity)}")
 
-    record.quantity -= int(quantity)
-    record.save(update_fields=["quantity"])
-
     WIPStockMovement.objects.create(
         stock_record=record,
         quantity_change=-int(quantity),
@@ -281,10 +407,16 @@ def remove_from_wip_stock(
         created_by=user,
         notes=notes,
     )
+    refresh_stock_snapshots(StockSnapshot.Kind.WIP, [record.pk])
     return record
 
 
-@transaction.atomic
+@dataclass(frozen=True)
+class FinishedTransferLine:
+    variant_id: VariantId
+    quantity: int
+
+
 def transfer_finished_stock(
     *,
     from_warehouse_id: int,
@@ -294,10 +426,39 @@ def transfer_finished_stock(
     user: "AbstractBaseUser | None" = None,
     notes: str = "",
 ) -> ProductStockTransfer:
+    return transfer_finished_stock_lines(
+        from_warehouse_id=from_warehouse_id,
+        to_warehouse_id=to_warehouse_id,
+        lines=[FinishedTransferLine(variant_id=variant_id, quantity=quantity)],
+        user=user,
+        notes=notes,
+    )
+
+
+@transaction.atomic
+def transfer_finished_stock_lines(
+    *,
+    from_warehouse_id: int,
+    to_warehouse_id: int,
+    lines: Iterable[FinishedTransferLine],
+    user: "AbstractBaseUser | None" = None,
+    notes: str = "",
+    in_transit: bool = False,
+) -> ProductStockTransfer:
+    """Move many variants between warehouses as one transfer with batched stock posting.
+
+    With `in_transit=True` the goods leave the source now and the transfer stays
+    `IN_TRANSIT` until receive_finished_stock_transfer books them into the target.
+    """
     if from_warehouse_id == to_warehouse_id:
         raise ValueError("Transfer warehouses must be different")
-    if quantity <= 0:
-        raise ValueError("Quantity must be greater than 0")
+    quantities: dict[int, int] = {}
+    for line in lines:
+        if line.quantity <= 0:
+            raise ValueError("Quantity must be greater than 0")
+        quantities[line.variant_id] = quantities.get(line.variant_id, 0) + int(line.quantity)
+    if not quantities:
+        raise ValueError("Transfer must have at least one line")
 
     transfer = ProductStockTransfer.objects.create(
         from_warehouse_id=from_warehouse_id,
@@ -306,32 +467,77 @@ def transfer_finished_stock(
         created_by=user,
         notes=notes,
     )
-    ProductStockTransferLine.objects.create(
-        transfer=transfer,
-        variant_id=variant_id,
-        quantity=quantity,
+    ProductStockTransferLine.objects.bulk_create(
+        [
+            ProductStockTransferLine(transfer=transfer, variant_id=variant_id, quantity=quantity)
+            for variant_id, quantity in quantities.items()
+        ]
     )
 
-    remove_from_stock(
-        warehouse_id=from_warehouse_id,
-        variant_id=variant_id,
-        quantity=quantity,
-        reason=ProductStockMovement.Reason.TRANSFER_OUT,
-        related_transfer=transfer,
-        user=user,
-        notes=notes,
+    batch = _transfer_entries(
+        transfer, quantities, ProductStockMovement.Reason.TRANSFER_OUT, user, notes
     )
-    add_to_stock(
-        warehouse_id=to_warehouse_id,
-        variant_id=variant_id,
-        quantity=quantity,
-        reason=ProductStockMovement.Reason.TRANSFER_IN,
-        related_transfer=transfer,
-        user=user,
-        notes=notes,
+    if not in_transit:
+        batch += _transfer_entries(
+            transfer, quantities, ProductStockMovement.Reason.TRANSFER_IN, user, notes
+        )
+    post_stock_movements(batch)
+
+    if not in_transit:
+        _complete_transfer(transfer)
+    return transfer
+
+
+@transaction.atomic
+def receive_finished_stock_transfer(
+    *,
+    transfer: ProductStockTransfer,
+    user: "AbstractBaseUser | None" = None,
+    notes: str = "",
+) -> ProductStockTransfer:
+    """Book an in-transit transfer into its target warehouse and complete it."""
+    transfer = ProductStockTransfer.objects.select_for_update().get(pk=transfer.pk)
+    if transfer.status != ProductStockTransfer.Status.IN_TRANSIT:
+        raise ValueError("Transfer is not in transit")
+
+    quantities = dict(transfer.lines.values_list("variant_id", "quantity"))
+    post_stock_movements(
+        _transfer_entries(
+            transfer,
+            quantities,
+            ProductStockMovement.Reason.TRANSFER_IN,
+            user,
+            notes or transfer.notes,
+        )
     )
+    _complete_transfer(transfer)
+    return transfer
+
 
+def _transfer_entries(
+    transfer: ProductStockTransfer,
+    quantities: dict[int, int],
+    reason: str,
+    user: "AbstractBaseUser | None",
+    notes: str,
+) -> list[StockMovementEntry]:
+    outgoing = reason == ProductStockMovement.Reason.TRANSFER_OUT
+    warehouse_id = transfer.from_warehouse_id if outgoing else transfer.to_warehouse_id
+    return [
+        StockMovementEntry(
+            warehouse_id=warehouse_id,
+            variant_id=variant_id,
+            quantity_change=-quantity if outgoing else quantity,
+            reason=reason,
+            related_transfer=transfer,
+            user=user,
+            notes=notes,
+        )
+        for variant_id, quantity in quantities.items()
+    ]
+
+
+def _complete_transfer(transfer: ProductStockTransfer) -> None:
     transfer.status = ProductStockTransfer.Status.COMPLETED
     transfer.completed_at = timezone.now()
     transfer.save(update_fields=["status", "completed_at"])
-    return transfer
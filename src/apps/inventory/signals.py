@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.catalog.models import Color, Product
+from apps.inventory.models import ProductStock, StockKind, StockReservation
+from apps.inventory.snapshots import refresh_matching_snapshots
+from apps.materials.models import Material, MaterialColor
+from apps.warehouses.models import Warehouse
+
+VARIANT_KINDS = (StockKind.FINISHED, StockKind.WIP)
+
+# Balance-row lookups whose snapshot labels change when an instance of the model is renamed.
+LABEL_SOURCES = {
+    Product: [(VARIANT_KINDS, "variant__product_id")],
+    Color: [(VARIANT_KINDS, "variant__color_id")],
+    MaterialColor: [
+        (VARIANT_KINDS, "variant__primary_material_color_id"),
+        (VARIANT_KINDS, "variant__secondary_material_color_id"),
+        ((StockKind.MATERIAL,), "material_color_id"),
+    ],
+    Material: [
+        (VARIANT_KINDS, "variant__primary_material_color__material_id"),
+        (VARIANT_KINDS, "variant__secondary_material_color__material_id"),
+        ((StockKind.MATERIAL,), "material_id"),
+    ],
+    Warehouse: [(tuple(StockKind), "warehouse_id")],
+}
+LABEL_FIELD = {Warehouse: "code"}
+
+
+def _label_field(sender) -> str:
+    return LABEL_FIELD.get(sender, "name")
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Color)
+@receiver(pre_save, sender=MaterialColor)
+@receiver(pre_save, sender=Material)
+@receiver(pre_save, sender=Warehouse)
+def remember_previous_label(sender, instance, raw=False, **kwargs):
+    instance._previous_snapshot_label = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_snapshot_label = (
+        sender.objects.filter(pk=instance.pk).values_list(_label_field(sender), flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Color)
+@receiver(post_save, sender=MaterialColor)
+@receiver(post_save, sender=Material)
+@receiver(post_save, sender=Warehouse)
+def refresh_snapshots_after_rename(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_snapshot_label", None)
+    if created or raw or previous is None or previous == getattr(instance, _label_field(sender)):
+        return
+
+    conditions: dict[str, Q] = {}
+    for kinds, lookup in LABEL_SOURCES[sender]:
+        for kind in kinds:
+            conditions[kind] = conditions.get(kind, Q(pk__in=[])) | Q(**{lookup: instance.pk})
+
+    def refresh():
+        for kind, condition in conditions.items():
+            refresh_matching_snapshots(kind, condition)
+
+    transaction.on_commit(refresh)
+
+
+@receiver(post_delete, sender=StockReservation)
+def release_deleted_reservation(sender, instance, **kwargs):
+    # Sales lines cascade to their reservations; free whatever was still held.
+    if instance.status == StockReservation.Status.ACTIVE:
+        ProductStock.objects.filter(pk=instance.stock_record_id).update(
+            reserved_quantity=F("reserved_quantity") - instance.quantity
+        )
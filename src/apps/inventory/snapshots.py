@@ -0,0 +1,129 @@
+"""Maintenance of the `StockSnapshot` read model.
+
+Each balance row (ProductStock, WIPStockRecord, MaterialStock) maps to one snapshot row
+keyed by (kind, source_id). Refreshing a set of balances costs two queries: one joined read
+of the sources and one upsert.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.inventory.ledgers import get_ledger
+from apps.inventory.models import StockKind, StockSnapshot
+from apps.materials.models import BOM
+
+VARIANT_RELATED = (
+    "warehouse",
+    "variant__product",
+    "variant__color",
+    "variant__primary_material_color__material",
+    "variant__secondary_material_color__material",
+)
+MATERIAL_RELATED = ("warehouse", "material", "material_color")
+SNAPSHOT_UPDATE_FIELDS = [
+    "warehouse",
+    "warehouse_code",
+    "variant",
+    "material",
+    "item_name",
+    "color_label",
+    "unit",
+    "quantity",
+    "updated_at",
+]
+
+
+def refresh_stock_snapshots(kind: str, source_ids: Iterable[int]) -> int:
+    """Upsert snapshot rows for the given balance rows; returns how many were written."""
+    ids = set(source_ids)
+    if not ids:
+        return 0
+    sources = _source_queryset(kind).filter(id__in=ids)
+    snapshots = [_snapshot_for(kind, source) for source in sources]
+    StockSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["kind", "source_id"],
+        update_fields=SNAPSHOT_UPDATE_FIELDS,
+    )
+    return len(snapshots)
+
+
+def refresh_matching_snapshots(kind: str, condition: Q, *, batch_size: int = 1000) -> int:
+    """Refresh snapshots of every `kind` balance row matching `condition` (e.g. after a rename)."""
+    ids = list(_source_queryset(kind).filter(condition).values_list("id", flat=True))
+    return sum(
+        refresh_stock_snapshots(kind, ids[start : start + batch_size])
+        for start in range(0, len(ids), batch_size)
+    )
+
+
+@transaction.atomic
+def rebuild_stock_snapshots(*, batch_size: int = 1000) -> dict[str, int]:
+    """Recreate every snapshot row from the balance tables; returns rows written per kind."""
+    StockSnapshot.objects.all().delete()
+    written = {}
+    for kind in StockKind.values:
+        written[kind] = 0
+        last_id = 0
+        while True:
+            batch = list(
+                _source_queryset(kind).filter(id__gt=last_id).order_by("id")[:batch_size]
+            )
+            if not batch:
+                break
+            StockSnapshot.objects.bulk_create([_snapshot_for(kind, source) for source in batch])
+            written[kind] += len(batch)
+            last_id = batch[-1].id
+    return written
+
+
+def variant_color_label(variant) -> str:
+    if variant.color_id:
+        return variant.color.name
+    labels = [
+        f"{material_color.material.name}: {material_color.name}"
+        for material_color in (variant.primary_material_color, variant.secondary_material_color)
+        if material_color is not None
+    ]
+    return " / ".join(labels)
+
+
+def _source_queryset(kind: str):
+    related = MATERIAL_RELATED if kind == StockKind.MATERIAL else VARIANT_RELATED
+    return get_ledger(kind).balance_model.objects.select_related(*related)
+
+
+def _snapshot_for(kind: str, source) -> StockSnapshot:
+    return StockSnapshot(**snapshot_fields(kind, source))
+
+
+def snapshot_fields(kind: str, source) -> dict:
+    """Snapshot column values for a balance row loaded with its related labels."""
+    fields = {
+        "kind": kind,
+        "source_id": source.id,
+        "warehouse_id": source.warehouse_id,
+        "warehouse_code": source.warehouse.code,
+    }
+    if kind == StockKind.MATERIAL:
+        fields.update(
+            material_id=source.material_id,
+            item_name=source.material.name,
+            color_label=source.material_color.name if source.material_color_id else "",
+            unit=source.unit,
+            quantity=source.quantity,
+        )
+    else:
+        fields.update(
+            variant_id=source.variant_id,
+            item_name=source.variant.product.name,
+            color_label=variant_color_label(source.variant),
+            unit=BOM.Unit.PIECE,
+            quantity=Decimal(source.quantity),
+        )
+    return fields
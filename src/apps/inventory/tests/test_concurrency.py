@@ -0,0 +1,146 @@
+"""Concurrency stress tests for atomic stock decrements."""
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from django.db import OperationalError, connection, transaction
+
+from apps.catalog.models import Variant
+from apps.catalog.tests.conftest import ColorFactory, ProductFactory
+from apps.inventory.models import ProductStockMovement, WIPStockMovement
+from apps.inventory.services import (
+    add_to_stock,
+    add_to_wip_stock,
+    get_stock_quantity,
+    get_wip_stock_quantity,
+    remove_from_stock,
+    remove_from_wip_stock,
+)
+from apps.materials.models import BOM, Material, MaterialStock, MaterialStockMovement
+from apps.materials.services import add_material_stock, remove_material_stock
+from apps.warehouses.services import get_default_warehouse
+
+WORKERS = 8
+ATTEMPTS_PER_WORKER = 5
+
+
+def _run_parallel(remove_one) -> int:
+    """Run WORKERS threads that each try ATTEMPTS_PER_WORKER removals; return successes."""
+    successes = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(WORKERS)
+
+    def worker():
+        barrier.wait()
+        done = 0
+        try:
+            for _ in range(ATTEMPTS_PER_WORKER):
+                while True:
+                    try:
+                        with transaction.atomic():
+                            remove_one()
+                        done += 1
+                    except ValueError:
+                        pass
+                    except OperationalError:
+                        # SQLite reports write contention as "database is locked"; retry like a
+                        # serialization failure. PostgreSQL blocks on the row instead.
+                        time.sleep(0.01)
+                        continue
+                    break
+        finally:
+            connection.close()
+        with lock:
+            successes.append(done)
+
+    threads = [threading.Thread(target=worker) for _ in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(successes)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_remove_from_stock_never_oversells():
+    variant = Variant.objects.create(product=ProductFactory(is_bundle=False), color=ColorFactory())
+    warehouse_id = get_default_warehouse().id
+    initial = 20
+    add_to_stock(
+        warehouse_id=warehouse_id,
+        variant_id=variant.id,
+        quantity=initial,
+        reason=ProductStockMovement.Reason.ADJUSTMENT_IN,
+    )
+
+    removed = _run_parallel(
+        lambda: remove_from_stock(
+            warehouse_id=warehouse_id,
+            variant_id=variant.id,
+            quantity=1,
+            reason=ProductStockMovement.Reason.ORDER_OUT,
+        )
+    )
+
+    assert removed == initial
+    assert get_stock_quantity(warehouse_id=warehouse_id, variant_id=variant.id) == 0
+    assert (
+        ProductStockMovement.objects.filter(
+            stock_record__variant=variant,
+            reason=ProductStockMovement.Reason.ORDER_OUT,
+        ).count()
+        == initial
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_remove_from_wip_stock_never_oversells():
+    variant = Variant.objects.create(product=ProductFactory(is_bundle=False), color=ColorFactory())
+    warehouse_id = get_default_warehouse().id
+    initial = 13
+    add_to_wip_stock(
+        warehouse_id=warehouse_id,
+        variant_id=variant.id,
+        quantity=initial,
+        reason=WIPStockMovement.Reason.CUTTING_IN,
+    )
+
+    removed = _run_parallel(
+        lambda: remove_from_wip_stock(
+            warehouse_id=warehouse_id,
+            variant_id=variant.id,
+            quantity=1,
+            reason=WIPStockMovement.Reason.FINISHING_OUT,
+        )
+    )
+
+    assert removed == initial
+    assert get_wip_stock_quantity(warehouse_id=warehouse_id, variant_id=variant.id) == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_remove_material_stock_never_oversells():
+    material = Material.objects.create(name="Stress felt")
+    warehouse_id = get_default_warehouse().id
+    add_material_stock(
+        warehouse_id=warehouse_id,
+        material=material,
+        quantity=Decimal("7.500"),
+        unit=BOM.Unit.METER,
+        reason=MaterialStockMovement.Reason.ADJUSTMENT_IN,
+    )
+
+    removed = _run_parallel(
+        lambda: remove_material_stock(
+            warehouse_id=warehouse_id,
+            material=material,
+            quantity=Decimal("0.500"),
+            unit=BOM.Unit.METER,
+            reason=MaterialStockMovement.Reason.PRODUCTION_OUT,
+        )
+    )
+
+    assert removed == 15
+    stock = MaterialStock.objects.get(warehouse_id=warehouse_id, material=material)
+    assert stock.quantity == Decimal("0.000")
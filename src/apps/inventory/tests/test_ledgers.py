@@ -0,0 +1,161 @@
+"""Tests for point-in-time balances and consistency checks over the stock movement ledgers."""
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from apps.catalog.models import Variant
+from apps.catalog.tests.conftest import ColorFactory, ProductFactory
+from apps.inventory.ledgers import stock_as_of, take_stock_checkpoint, verify_stock_ledgers
+from apps.inventory.models import (
+    ProductStock,
+    ProductStockMovement,
+    StockCheckpoint,
+    StockKind,
+)
+from apps.inventory.services import add_to_stock, remove_from_stock
+from apps.materials.models import BOM, Material, MaterialStockMovement
+from apps.materials.services import add_material_stock
+from apps.warehouses.models import Warehouse
+from apps.warehouses.services import get_default_warehouse
+
+
+def _at(day: date, hour: int = 12) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time(hour)))
+
+
+def _post(warehouse_id, variant_id, change, day):
+    post = add_to_stock if change > 0 else remove_from_stock
+    reason = (
+        ProductStockMovement.Reason.PRODUCTION_IN
+        if change > 0
+        else ProductStockMovement.Reason.ORDER_OUT
+    )
+    record = post(
+        warehouse_id=warehouse_id, variant_id=variant_id, quantity=abs(change), reason=reason
+    )
+    # created_at is auto_now_add, so backdate the movement just posted.
+    latest = ProductStockMovement.objects.filter(stock_record=record).latest("id")
+    ProductStockMovement.objects.filter(pk=latest.pk).update(created_at=_at(day))
+    return record
+
+
+@pytest.fixture
+def history():
+    """Stock record with +10 on Jan 1, -3 on Jan 2 and +5 on Jan 4."""
+    warehouse_id = get_default_warehouse().id
+    variant = Variant.objects.create(product=ProductFactory(is_bundle=False), color=ColorFactory())
+    record = _post(warehouse_id, variant.id, 10, date(2025, 1, 1))
+    _post(warehouse_id, variant.id, -3, date(2025, 1, 2))
+    _post(warehouse_id, variant.id, 5, date(2025, 1, 4))
+    return record
+
+
+@pytest.mark.django_db
+def test_stock_as_of_sums_ledger_without_checkpoints(history):
+    assert stock_as_of(StockKind.FINISHED, date(2024, 12, 31)) == {}
+    assert stock_as_of(StockKind.FINISHED, date(2025, 1, 1)) == {history.id: Decimal("10")}
+    assert stock_as_of(StockKind.FINISHED, date(2025, 1, 3)) == {history.id: Decimal("7")}
+    assert stock_as_of(StockKind.FINISHED, _at(date(2025, 1, 4), 11)) == {history.id: Decimal("7")}
+    assert stock_as_of(StockKind.FINISHED, date(2025, 1, 4)) == {history.id: Decimal("12")}
+
+
+@pytest.mark.django_db
+def test_stock_as_of_reads_only_movements_after_checkpoint(history):
+    written = take_stock_checkpoint(date(2025, 1, 2))
+    # Re-running a day replaces its rows instead of stacking on itself.
+    assert take_stock_checkpoint(date(2025, 1, 2)) == written
+    assert StockCheckpoint.objects.get(source_id=history.id).quantity == Decimal("7")
+
+    # History before the checkpoint is no longer needed.
+    ProductStockMovement.objects.filter(created_at__lt=_at(date(2025, 1, 3), 0)).delete()
+
+    assert stock_as_of(StockKind.FINISHED, date(2025, 1, 2)) == {history.id: Decimal("7")}
+    assert stock_as_of(StockKind.FINISHED, date(2025, 1, 4)) == {history.id: Decimal("12")}
+    assert stock_as_of(StockKind.FINISHED, date(2025, 1, 1)) == {}
+
+
+@pytest.mark.django_db
+def test_material_balances_filter_by_warehouse():
+    main = get_default_warehouse()
+    other = Warehouse.objects.create(
+        name="Другий склад",
+        code="SECOND",
+        kind=Warehouse.Kind.STORAGE,
+        is_default_for_production=False,
+        is_active=True,
+    )
+    felt = Material.objects.create(name="Фетр для історії")
+    for warehouse, quantity in ((main, "1.250"), (other, "4.000")):
+        add_material_stock(
+            warehouse_id=warehouse.id,
+            material=felt,
+            quantity=Decimal(quantity),
+            unit=BOM.Unit.METER,
+            reason=MaterialStockMovement.Reason.ADJUSTMENT_IN,
+        )
+    take_stock_checkpoint(timezone.localdate() - timedelta(days=1))
+
+    balances = stock_as_of(StockKind.MATERIAL, timezone.now(), warehouse_id=other.id)
+
+    assert list(balances.values()) == [Decimal("4.000")]
+
+
+@pytest.mark.django_db
+def test_take_stock_checkpoints_rejects_days_that_are_not_over():
+    with pytest.raises(CommandError, match="over"):
+        call_command("take_stock_checkpoints", date=timezone.localdate().isoformat())
+
+
+def _stocked_variant(quantity=3):
+    variant = Variant.objects.create(product=ProductFactory(is_bundle=False), color=ColorFactory())
+    return add_to_stock(
+        warehouse_id=get_default_warehouse().id,
+        variant_id=variant.id,
+        quantity=quantity,
+        reason=ProductStockMovement.Reason.PRODUCTION_IN,
+    )
+
+
+@pytest.mark.django_db
+def test_verify_stock_ledgers_checks_only_records_touched_since_watermark():
+    clean, broken = _stocked_variant(), _stocked_variant()
+    ProductStock.objects.filter(pk=broken.pk).update(quantity=5)
+    # Move existing history out of the re-check overlap window.
+    ProductStockMovement.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+    first = verify_stock_ledgers(kinds=[StockKind.FINISHED])
+    assert first.checked == {StockKind.FINISHED: 2}
+    assert [(drift.record_id, drift.balance, drift.ledger) for drift in first.drifted] == [
+        (broken.pk, Decimal("5"), Decimal("3"))
+    ]
+
+    add_to_stock(
+        warehouse_id=clean.warehouse_id,
+        variant_id=clean.variant_id,
+        quantity=1,
+        reason=ProductStockMovement.Reason.PRODUCTION_IN,
+    )
+    second = verify_stock_ledgers(kinds=[StockKind.FINISHED])
+    assert second.checked == {StockKind.FINISHED: 1}
+    assert second.drifted == []
+
+    assert len(verify_stock_ledgers(kinds=[StockKind.FINISHED], full=True).drifted) == 1
+
+
+@pytest.mark.django_db
+def test_verify_stock_ledgers_command_writes_json_report(tmp_path):
+    broken = _stocked_variant()
+    ProductStock.objects.filter(pk=broken.pk).update(quantity=0)
+    report_path = tmp_path / "report.json"
+
+    with pytest.raises(CommandError, match="drift"):
+        call_command("verify_stock_ledgers", output=str(report_path), fail_on_drift=True)
+
+    report = json.loads(report_path.read_text())
+    assert report["drifted_count"] == 1
+    assert report["drifted"][0]["record_id"] == broken.pk
+    assert report["drifted"][0]["difference"] == "-3"
@@ -0,0 +1,165 @@
+"""Tests for finished-goods reservations."""
+import pytest
+from django.core.management import call_command
+
+from apps.accounts.tests.conftest import UserFactory
+from apps.catalog.models import Variant
+from apps.catalog.tests.conftest import ColorFactory, ProductFactory
+from apps.inventory.models import ProductStock, ProductStockMovement, StockReservation
+from apps.inventory.reservations import (
+    ReservationRequest,
+    consume_reservations,
+    release_reservations,
+    reserve_stock,
+)
+from apps.inventory.services import add_to_stock, get_available_stock_quantities, remove_from_stock
+from apps.sales.models import SalesOrder
+from apps.sales.services import create_production_orders_for_sales_order, create_sales_order
+from apps.warehouses.services import get_default_warehouse
+
+
+@pytest.fixture
+def stocked():
+    """Five units of one variant in the default warehouse."""
+    warehouse_id = get_default_warehouse().id
+    variant = Variant.objects.create(product=ProductFactory(is_bundle=False), color=ColorFactory())
+    add_to_stock(
+        warehouse_id=warehouse_id,
+        variant_id=variant.id,
+        quantity=5,
+        reason=ProductStockMovement.Reason.ADJUSTMENT_IN,
+    )
+    return warehouse_id, variant
+
+
+@pytest.mark.django_db
+def test_reserved_units_are_not_free_until_released_or_consumed(stocked):
+    warehouse_id, variant = stocked
+    [held] = reserve_stock([ReservationRequest(warehouse_id, variant.id, 3)])
+
+    assert get_available_stock_quantities(warehouse_id=warehouse_id, variant_ids=[variant.id]) == {
+        variant.id: 2
+    }
+    with pytest.raises(ValueError, match="вільного залишку"):
+        reserve_stock([ReservationRequest(warehouse_id, variant.id, 3)])
+    with pytest.raises(ValueError, match="Недостатньо на складі"):
+        remove_from_stock(
+            warehouse_id=warehouse_id,
+            variant_id=variant.id,
+            quantity=3,
+            reason=ProductStockMovement.Reason.ADJUSTMENT_OUT,
+        )
+
+    [partial] = reserve_stock([ReservationRequest(warehouse_id, variant.id, 4)], partial=True)
+    assert partial.quantity == 2
+    assert release_reservations([partial.pk]) == 1
+    assert release_reservations([partial.pk]) == 0
+
+    [movement] = consume_reservations([held.pk])
+    assert movement.quantity_change == -3
+    record = ProductStock.objects.get(variant=variant)
+    assert (record.quantity, record.reserved_quantity) == (2, 0)
+    held.refresh_from_db()
+    assert held.status == StockReservation.Status.CONSUMED
+
+
+@pytest.mark.django_db
+def test_second_sales_order_produces_what_the_first_reserved(stocked):
+    _, variant = stocked
+    user = UserFactory()
+
+    def order_and_plan():
+        order = create_sales_order(
+            source=SalesOrder.Source.WHOLESALE,
+            customer_info="ТОВ Гурт",
+            lines_data=[
+                {"product_id": variant.product_id, "color_id": variant.color_id, "quantity": 4}
+            ],
+        )
+        return order, create_production_orders_for_sales_order(sales_order=order, created_by=user)
+
+    first, first_orders = order_and_plan()
+    second, second_orders = order_and_plan()
+
+    assert (len(first_orders), len(second_orders)) == (0, 3)
+    assert ProductStock.objects.get(variant=variant).reserved_quantity == 5
+
+    # Deleting an order drops its reservations and frees the units.
+    first.delete()
+    assert ProductStock.objects.get(variant=variant).reserved_quantity == 1
+    ProductStock.objects.update(reserved_quantity=0)
+    call_command("rebuild_reserved_quantities")
+    assert ProductStock.objects.get(variant=variant).reserved_quantity == 1
+
+
+@pytest.mark.django_db
+def test_closing_a_sales_order_consumes_or_releases_its_reservations(stocked):
+    _, variant = stocked
+    user = UserFactory()
+    shipped, cancelled = [
+        create_sales_order(
+            source=SalesOrder.Source.WHOLESALE,
+            customer_info="ТОВ Гурт",
+            lines_data=[
+                {"product_id": variant.product_id, "color_id": variant.color_id, "quantity": 2}
+            ],
+            create_production_orders=True,
+            created_by=user,
+        )
+        for _ in range(2)
+    ]
+    assert ProductStock.objects.get(variant=variant).reserved_quantity == 4
+
+    shipped.status = SalesOrder.Status.SHIPPED
+    shipped.save(update_fields=["status", "updated_at"])
+    cancelled.status = SalesOrder.Status.CANCELLED
+    cancelled.save()
+    # Completing after shipping has nothing left to consume.
+    shipped.status = SalesOrder.Status.COMPLETED
+    shipped.save()
+
+    record = ProductStock.objects.get(variant=variant)
+    assert (record.quantity, record.reserved_quantity) == (3, 0)
+    assert dict(
+        StockReservation.objects.values_list("sales_order_line__sales_order_id", "status")
+    ) == {
+        shipped.id: StockReservation.Status.CONSUMED,
+        cancelled.id: StockReservation.Status.RELEASED,
+    }
+    assert ProductStockMovement.objects.filter(
+        stock_record=record, sales_order_line__sales_order=shipped, quantity_change=-2
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_units_produced_for_a_line_are_reserved_and_shipped_with_it(stocked):
+    from apps.production.domain.status import STATUS_DONE
+    from apps.production.services import change_production_order_status
+    from apps.sales.services import sync_sales_order_line_production
+
+    warehouse_id, variant = stocked
+    user = UserFactory()
+    order = create_sales_order(
+        source=SalesOrder.Source.WHOLESALE,
+        customer_info="ТОВ Гурт",
+        lines_data=[{"product_id": variant.product_id, "color_id": variant.color_id, "quantity": 7}],
+        create_production_orders=True,
+        created_by=user,
+    )
+    change_production_order_status(
+        production_orders=list(order.lines.get().production_orders.all()),
+        new_status=STATUS_DONE,
+        changed_by=user,
+        on_sales_line_done=sync_sales_order_line_production,
+    )
+
+    record = ProductStock.objects.get(variant=variant)
+    assert (record.quantity, record.reserved_quantity) == (7, 7)
+    assert reserve_stock([ReservationRequest(warehouse_id, variant.id, 1)], partial=True) == []
+
+    order.refresh_from_db()
+    order.status = SalesOrder.Status.SHIPPED
+    order.save()
+
+    record.refresh_from_db()
+    assert (record.quantity, record.reserved_quantity) == (0, 0)
@@ -1,14 +1,21 @@
 """Tests for inventory services."""
 import pytest
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 
 from apps.catalog.models import Variant
 from apps.inventory.models import ProductStockTransfer, ProductStockMovement, ProductStock
 from apps.inventory.services import (
+    FinishedTransferLine,
+    StockMovementEntry,
     add_to_stock,
+    get_stock_quantities,
     get_stock_quantity,
+    post_stock_movements,
+    receive_finished_stock_transfer,
     remove_from_stock,
     transfer_finished_stock,
+    transfer_finished_stock_lines,
 )
 from apps.accounts.tests.conftest import UserFactory
 from apps.catalog.tests.conftest import ColorFactory, ProductFactory
@@ -26,6 +33,27 @@ def test_get_stock_quantity_returns_zero_when_missing():
     assert get_stock_quantity(warehouse_id=warehouse.id, product_id=model.id, color_id=color.id) == 0
 
 
+@pytest.mark.django_db
+def test_get_stock_quantities_reads_all_variants_in_one_query(django_assert_num_queries):
+    model = ProductFactory(is_bundle=False)
+    stocked = Variant.objects.create(product=model, color=ColorFactory())
+    empty = Variant.objects.create(product=model, color=ColorFactory())
+    warehouse_id = get_default_warehouse().id
+    add_to_stock(
+        warehouse_id=warehouse_id,
+        variant_id=stocked.id,
+        quantity=4,
+        reason=ProductStockMovement.Reason.ADJUSTMENT_IN,
+    )
+
+    with django_assert_num_queries(1):
+        quantities = get_stock_quantities(
+            warehouse_id=warehouse_id, variant_ids=[stocked.id, empty.id]
+        )
+
+    assert quantities == {stocked.id: 4, empty.id: 0}
+
+
 @pytest.mark.django_db
 def test_add_to_stock_creates_record_and_movement():
     model = ProductFactory(is_bundle=False)
@@ -430,3 +458,193 @@ def test_transfer_finished_stock_rolls_back_when_not_enough_stock():
         stock_record__warehouse_id=to_warehouse.id,
         stock_record__variant_id=variant.id,
     ).exists()
+
+
+@pytest.mark.django_db
+def test_multi_line_transfer_in_transit_until_received():
+    source = get_default_warehouse()
+    shop = Warehouse.objects.create(
+        name="Shop Shelf",
+        code="FIN-SHELF",
+        kind=Warehouse.Kind.STORAGE,
+        is_default_for_production=False,
+        is_active=True,
+    )
+    model = ProductFactory(is_bundle=False)
+    variants = [Variant.objects.create(product=model, color=ColorFactory()) for _ in range(3)]
+    for variant in variants:
+        add_to_stock(
+            warehouse_id=source.id,
+            variant_id=variant.id,
+            quantity=4,
+            reason=ProductStockMovement.Reason.ADJUSTMENT_IN,
+        )
+
+    transfer = transfer_finished_stock_lines(
+        from_warehouse_id=source.id,
+        to_warehouse_id=shop.id,
+        lines=[FinishedTransferLine(variant.id, 3) for variant in variants],
+        in_transit=True,
+    )
+
+    assert transfer.status == ProductStockTransfer.Status.IN_TRANSIT
+    assert transfer.lines.count() == 3
+    assert get_stock_quantities(
+        warehouse_id=source.id, variant_ids=[variant.id for variant in variants]
+    ) == {variant.id: 1 for variant in variants}
+    assert get_stock_quantity(warehouse_id=shop.id, variant_id=variants[0].id) == 0
+
+    receive_finished_stock_transfer(transfer=transfer)
+
+    transfer.refresh_from_db()
+    assert transfer.status == ProductStockTransfer.Status.COMPLETED
+    assert get_stock_quantities(
+        warehouse_id=shop.id, variant_ids=[variant.id for variant in variants]
+    ) == {variant.id: 3 for variant in variants}
+    with pytest.raises(ValueError, match="not in transit"):
+        receive_finished_stock_transfer(transfer=transfer)
+
+
+@pytest.mark.django_db
+def test_post_stock_movements_applies_batch_and_writes_ledger():
+    model = ProductFactory(is_bundle=False)
+    first = Variant.objects.create(product=model, color=ColorFactory())
+    second = Variant.objects.create(product=model, color=ColorFactory())
+    user = UserFactory()
+    warehouse = get_default_warehouse()
+    add_to_stock(
+        warehouse_id=warehouse.id,
+        variant_id=first.id,
+        quantity=2,
+        reason=ProductStockMovement.Reason.ADJUSTMENT_IN,
+    )
+
+    movements = post_stock_movements(
+        [
+            StockMovementEntry(
+                warehouse_id=warehouse.id,
+                variant_id=first.id,
+                quantity_change=3,
+                reason=ProductStockMovement.Reason.PRODUCTION_IN,
+                user=user,
+            ),
+            StockMovementEntry(
+                warehouse_id=warehouse.id,
+                variant_id=first.id,
+                quantity_change=-4,
+                reason=ProductStockMovement.Reason.ORDER_OUT,
+                user=user,
+            ),
+            StockMovementEntry(
+                warehouse_id=warehouse.id,
+                variant_id=second.id,
+                quantity_change=5,
+                reason=ProductStockMovement.Reason.PRODUCTION_IN,
+                notes="batch",
+            ),
+        ]
+    )
+
+    assert [movement.quantity_change for movement in movements] == [3, -4, 5]
+    assert get_stock_quantity(warehouse_id=warehouse.id, variant_id=first.id) == 1
+    assert get_stock_quantity(warehouse_id=warehouse.id, variant_id=second.id) == 5
+    assert ProductStockMovement.objects.filter(stock_record__variant=first).count() == 3
+    second_movement = ProductStockMovement.objects.get(stock_record__variant=second)
+    assert second_movement.notes == "batch"
+    assert second_movement.created_at is not None
+
+
+@pytest.mark.django_db
+def test_post_stock_movements_rejects_batch_when_not_enough():
+    model = ProductFactory(is_bundle=False)
+    variant = Variant.objects.create(product=model, color=ColorFactory())
+    warehouse = get_default_warehouse()
+    add_to_stock(
+        warehouse_id=warehouse.id,
+        variant_id=variant.id,
+        quantity=1,
+        reason=ProductStockMovement.Reason.ADJUSTMENT_IN,
+    )
+
+    with pytest.raises(ValueError, match="Недостатньо на складі"):
+        post_stock_movements(
+            [
+                StockMovementEntry(
+                    warehouse_id=warehouse.id,
+                    variant_id=variant.id,
+                    quantity_change=-1,
+                    reason=ProductStockMovement.Reason.ORDER_OUT,
+                ),
+                StockMovementEntry(
+                    warehouse_id=warehouse.id,
+                    variant_id=variant.id,
+                    quantity_change=-1,
+                    reason=ProductStockMovement.Reason.ORDER_OUT,
+                ),
+            ]
+        )
+
+    assert get_stock_quantity(warehouse_id=warehouse.id, variant_id=variant.id) == 1
+    assert ProductStockMovement.objects.filter(stock_record__variant=variant).count() == 1
+
+
+@pytest.mark.django_db
+def test_post_stock_movements_query_count_does_not_grow_with_batch(django_assert_num_queries):
+    model = ProductFactory(is_bundle=False)
+    variants = [Variant.objects.create(product=model, color=ColorFactory()) for _ in range(10)]
+    warehouse = get_default_warehouse()
+
+    # savepoint + variants + insert missing + lock + update + ledger insert
+    # + snapshot read + snapshot upsert + release
+    with django_assert_num_queries(9):
+        post_stock_movements(
+            [
+                StockMovementEntry(
+                    warehouse_id=warehouse.id,
+                    variant_id=variant.id,
+                    quantity_change=1,
+                    reason=ProductStockMovement.Reason.PRODUCTION_IN,
+                )
+                for variant in variants
+            ]
+        )
+
+    assert ProductStock.objects.filter(warehouse=warehouse, quantity=1).count() == 10
+
+
+@pytest.mark.django_db
+def test_post_stock_movements_locks_only_the_exact_stock_rows_in_id_order():
+    model = ProductFactory(is_bundle=False)
+    first = Variant.objects.create(product=model, color=ColorFactory())
+    second = Variant.objects.create(product=model, color=ColorFactory())
+    main = get_default_warehouse()
+    other = Warehouse.objects.create(name="Other", code="OTHER")
+
+    with CaptureQueriesContext(connection) as captured:
+        post_stock_movements(
+            [
+                StockMovementEntry(
+                    warehouse_id=main.id,
+                    variant_id=first.id,
+                    quantity_change=1,
+                    reason=ProductStockMovement.Reason.ADJUSTMENT_IN,
+                ),
+                StockMovementEntry(
+                    warehouse_id=other.id,
+                    variant_id=second.id,
+                    quantity_change=2,
+                    reason=ProductStockMovement.Reason.ADJUSTMENT_IN,
+                ),
+            ]
+        )
+
+    table = ProductStock._meta.db_table
+    lock_sql = next(
+        query["sql"]
+        for query in captured.captured_queries
+        if query["sql"].startswith("SELECT") and f'FROM "{table}"' in query["sql"]
+    )
+    # Exact keys, not the warehouse x variant cross product (which would also lock
+    # other-warehouse rows of the first variant), and a deterministic lock order.
+    assert " IN (" not in lock_sql
+    assert lock_sql.endswith(f'ORDER BY "{table}"."id" ASC')
@@ -0,0 +1,154 @@
+"""Tests for the stock overview snapshot and its view."""
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from apps.accounts.tests.conftest import UserFactory
+from apps.catalog.models import Variant
+from apps.catalog.tests.conftest import ColorFactory, ProductFactory
+from apps.inventory.models import ProductStockMovement, StockSnapshot, WIPStockMovement
+from apps.inventory.services import add_to_stock, add_to_wip_stock, remove_from_stock
+from apps.inventory.snapshots import rebuild_stock_snapshots
+from apps.materials.models import BOM, Material, MaterialColor, MaterialStockMovement
+from apps.materials.services import add_material_stock
+from apps.warehouses.models import Warehouse
+from apps.warehouses.services import get_default_warehouse
+
+AUTH_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+
+def _variant(product_name="Сумка Tote", color_name="Navy"):
+    return Variant.objects.create(
+        product=ProductFactory(name=product_name, is_bundle=False),
+        color=ColorFactory(name=color_name),
+    )
+
+
+@pytest.mark.django_db
+def test_stock_services_keep_snapshot_in_sync():
+    warehouse = get_default_warehouse()
+    variant = _variant()
+    felt = Material.objects.create(name="Фетр")
+    grey = MaterialColor.objects.create(material=felt, name="Сірий", code=1)
+
+    add_to_stock(
+        warehouse_id=warehouse.id,
+        variant_id=variant.id,
+        quantity=5,
+        reason=ProductStockMovement.Reason.PRODUCTION_IN,
+    )
+    remove_from_stock(
+        warehouse_id=warehouse.id,
+        variant_id=variant.id,
+        quantity=2,
+        reason=ProductStockMovement.Reason.ORDER_OUT,
+    )
+    add_to_wip_stock(
+        warehouse_id=warehouse.id,
+        variant_id=variant.id,
+        quantity=4,
+        reason=WIPStockMovement.Reason.CUTTING_IN,
+    )
+    add_material_stock(
+        warehouse_id=warehouse.id,
+        material=felt,
+        material_color=grey,
+        quantity=Decimal("1.250"),
+        unit=BOM.Unit.METER,
+        reason=MaterialStockMovement.Reason.ADJUSTMENT_IN,
+    )
+
+    rows = {row.kind: row for row in StockSnapshot.objects.filter(warehouse=warehouse)}
+    finished = rows[StockSnapshot.Kind.FINISHED]
+    assert (finished.item_name, finished.color_label, finished.quantity) == (
+        "Сумка Tote",
+        "Navy",
+        Decimal("3"),
+    )
+    assert finished.warehouse_code == warehouse.code
+    assert rows[StockSnapshot.Kind.WIP].quantity == Decimal("4")
+    material = rows[StockSnapshot.Kind.MATERIAL]
+    assert (material.item_name, material.color_label, material.unit, material.quantity) == (
+        "Фетр",
+        "Сірий",
+        BOM.Unit.METER,
+        Decimal("1.250"),
+    )
+
+
+@pytest.mark.django_db
+def test_rename_refreshes_snapshot_labels(django_capture_on_commit_callbacks):
+    warehouse = get_default_warehouse()
+    variant = _variant()
+    add_to_stock(
+        warehouse_id=warehouse.id,
+        variant_id=variant.id,
+        quantity=1,
+        reason=ProductStockMovement.Reason.PRODUCTION_IN,
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        variant.product.name = "Сумка Shopper"
+        variant.product.save()
+        variant.color.name = "Olive"
+        variant.color.save()
+
+    row = StockSnapshot.objects.get(variant=variant)
+    assert (row.item_name, row.color_label) == ("Сумка Shopper", "Olive")
+
+
+@pytest.mark.django_db
+def test_rebuild_stock_snapshots_restores_drifted_rows():
+    warehouse = get_default_warehouse()
+    variant = _variant()
+    add_to_stock(
+        warehouse_id=warehouse.id,
+        variant_id=variant.id,
+        quantity=2,
+        reason=ProductStockMovement.Reason.PRODUCTION_IN,
+    )
+    StockSnapshot.objects.update(quantity=Decimal("99"), item_name="stale")
+
+    written = rebuild_stock_snapshots()
+
+    assert written[StockSnapshot.Kind.FINISHED] == 1
+    row = StockSnapshot.objects.get(variant=variant)
+    assert (row.item_name, row.quantity) == ("Сумка Tote", Decimal("2"))
+
+
+@pytest.mark.django_db
+def test_stock_overview_filters_by_kind_warehouse_and_text(client):
+    client.force_login(UserFactory(), backend=AUTH_BACKEND)
+    main = get_default_warehouse()
+    shop = Warehouse.objects.create(
+        name="Магазин",
+        code="SHOP",
+        kind=Warehouse.Kind.STORAGE,
+        is_default_for_production=False,
+        is_active=True,
+    )
+    tote, shopper, sold_out = _variant(), _variant("Шопер", "Olive"), _variant("Гаманець", "Wine")
+    for warehouse, variant in ((main, tote), (shop, shopper), (main, sold_out)):
+        add_to_stock(
+            warehouse_id=warehouse.id,
+            variant_id=variant.id,
+            quantity=3,
+            reason=ProductStockMovement.Reason.PRODUCTION_IN,
+        )
+    remove_from_stock(
+        warehouse_id=main.id,
+        variant_id=sold_out.id,
+        quantity=3,
+        reason=ProductStockMovement.Reason.ORDER_OUT,
+    )
+
+    def listed(**params):
+        response = client.get(reverse("stock_overview"), params)
+        assert response.status_code == 200
+        return [row.item_name for row in response.context["page_obj"].object_list]
+
+    assert listed() == ["Сумка Tote", "Шопер"]
+    assert listed(warehouse=shop.id) == ["Шопер"]
+    assert listed(q="navy") == ["Сумка Tote"]
+    assert listed(kind=StockSnapshot.Kind.WIP) == []
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from apps.inventory.views import stock_overview
+
+urlpatterns = [
+    path("stock/", stock_overview, name="stock_overview"),
+]
@@ -0,0 +1,42 @@
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.shortcuts import render
+
+from apps.inventory.forms import StockFilterForm
+from apps.inventory.models import StockSnapshot
+from apps.ui.pagination import paginate_keyset, query_string_without_cursor
+
+# Matches inv_snapshot_wh_label_idx / inv_snapshot_label_idx.
+STOCK_ORDERING = ("item_name", "color_label", "id")
+
+
+@login_required
+def stock_overview(request):
+    form = StockFilterForm(request.GET or None)
+    filters = form.cleaned_data if form.is_valid() else {}
+    kind = filters.get("kind") or StockSnapshot.Kind.FINISHED
+    search_query = (request.GET.get("q") or "").strip()
+
+    snapshots = StockSnapshot.objects.filter(kind=kind, quantity__gt=0)
+    if filters.get("warehouse"):
+        snapshots = snapshots.filter(warehouse=filters["warehouse"])
+    for term in search_query.split():
+        snapshots = snapshots.filter(Q(item_name__icontains=term) | Q(color_label__icontains=term))
+
+    page_obj = paginate_keyset(
+        snapshots,
+        ordering=STOCK_ORDERING,
+        cursor=request.GET.get("cursor"),
+        per_page=50,
+    )
+    return render(
+        request,
+        "inventory/stock.html",
+        {
+            "page_title": "Залишки",
+            "form": form,
+            "page_obj": page_obj,
+            "search_query": search_query,
+            "query_string": query_string_without_cursor(request),
+        },
+    )
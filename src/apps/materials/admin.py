@@ -88,14 +88,22 @@ class GoodsReceiptLineAdmin(admin.ModelAdmin):
 
 @admin.register(MaterialStock)
 class MaterialStockRecordAdmin(admin.ModelAdmin):
-    list_display = ("id", "warehouse", "material", "material_color", "quantity", "unit")
+    list_display = (
+        "id",
+        "warehouse",
+        "material",
+        "material_color",
+        "quantity",
+        "unit",
+        "average_unit_cost",
+    )
     list_filter = ("warehouse", "unit", "material")
     search_fields = ("material__name", "material_color__name", "warehouse__name")
 
 
 @admin.register(MaterialStockMovement)
 class MaterialMovementAdmin(admin.ModelAdmin):
-    list_display = ("id", "stock_record", "quantity_change", "reason", "created_at")
+    list_display = ("id", "stock_record", "quantity_change", "unit_cost", "reason", "created_at")
     list_filter = ("reason",)
     search_fields = ("stock_record__material__name",)
 
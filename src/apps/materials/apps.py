@@ -5,3 +5,6 @@ class MaterialsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.materials"
     label = "materials"
+
+    def ready(self):
+        import apps.materials.signals  # noqa: F401
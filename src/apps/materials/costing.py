@@ -0,0 +1,190 @@
+"""Weighted average cost of material stock and the material cost of products.
+
+Each `MaterialStock` keeps the weighted average cost of the units on hand. A costed receipt
+blends into it in the same UPDATE that adds the quantity; every other movement leaves it as
+is and records it on the movement, so production issues are valued at the current average.
+`Product.material_cost` is the product's flattened norms priced at its materials' average
+costs and is refreshed only for products that use a material that has just moved.
+`recompute_material_costs` replays the whole movement ledger for backfills.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import models, transaction
+from django.db.models import Avg, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.catalog.models import Product
+from apps.materials.models import MaterialStock, MaterialStockMovement, ProductMaterialNorm
+
+ZERO = Decimal("0")
+COST_PLACES = Decimal("0.0001")
+MONEY_PLACES = Decimal("0.01")
+RECOMPUTE_BATCH_SIZE = 1000
+
+UNIT_COST = models.DecimalField(max_digits=12, decimal_places=4)
+
+
+def average_cost_after_receipt(quantity: Decimal, unit_cost: Decimal) -> ExpressionWrapper:
+    """UPDATE expression for the average once `quantity` units at `unit_cost` are added.
+
+    Must be assigned in the same UPDATE as the quantity: it reads the pre-update quantity.
+    """
+    current = Coalesce(F("average_unit_cost"), Value(unit_cost), output_field=UNIT_COST)
+    return ExpressionWrapper(
+        (F("quantity") * current + Value(quantity * unit_cost)) / (F("quantity") + Value(quantity)),
+        output_field=UNIT_COST,
+    )
+
+
+def blend_average_cost(
+    on_hand: Decimal, average: Decimal | None, quantity: Decimal, unit_cost: Decimal
+) -> Decimal:
+    """Python twin of `average_cost_after_receipt`, used when replaying the ledger.
+
+    Rounds half up, as PostgreSQL does when it stores the numeric result of the UPDATE.
+    """
+    if on_hand <= ZERO or average is None:
+        return unit_cost.quantize(COST_PLACES, rounding=ROUND_HALF_UP)
+    blended = (on_hand * average + quantity * unit_cost) / (on_hand + quantity)
+    return blended.quantize(COST_PLACES, rounding=ROUND_HALF_UP)
+
+
+def material_unit_costs(material_ids: Iterable[int]) -> dict[tuple[int, str], Decimal]:
+    """Cost per (material, unit) across warehouses and colors.
+
+    Weighted by quantity on hand; a material with nothing on hand falls back to the plain
+    average of its records' last known costs.
+    """
+    on_hand = Q(quantity__gt=ZERO)
+    costed = MaterialStock.objects.filter(
+        material_id__in=set(material_ids), average_unit_cost__isnull=False
+    )
+    rows = (
+        costed.values("material_id", "unit")
+        .annotate(
+            value=Sum(
+                F("quantity") * F("average_unit_cost"), filter=on_hand, output_field=UNIT_COST
+            ),
+            units=Sum("quantity", filter=on_hand),
+            fallback=Avg("average_unit_cost"),
+        )
+        .values_list("material_id", "unit", "value", "units", "fallback")
+    )
+    costs = {}
+    for material_id, unit, value, units, fallback in rows:
+        cost = Decimal(value) / Decimal(units) if units else Decimal(fallback)
+        costs[(material_id, unit)] = cost.quantize(COST_PLACES, rounding=ROUND_HALF_UP)
+    return costs
+
+
+def refresh_product_material_costs(product_ids: Iterable[int]) -> int:
+    """Recompute `Product.material_cost` for `product_ids`; returns products updated.
+
+    The cost is unknown (null) when a product has no norms or one of its materials has no cost.
+    """
+    ids = set(product_ids)
+    if not ids:
+        return 0
+    norms = list(
+        ProductMaterialNorm.objects.filter(product_id__in=ids).values_list(
+            "product_id", "material_id", "unit", "quantity_per_unit"
+        )
+    )
+    costs = material_unit_costs({material_id for _, material_id, _, _ in norms})
+
+    totals: dict[int, Decimal | None] = {}
+    for product_id, material_id, unit, per_unit in norms:
+        cost = costs.get((material_id, unit))
+        total = totals.get(product_id, ZERO)
+        totals[product_id] = None if cost is None or total is None else total + per_unit * cost
+
+    products = [
+        Product(
+            id=product_id,
+            material_cost=totals[product_id].quantize(MONEY_PLACES, rounding=ROUND_HALF_UP)
+            if totals.get(product_id) is not None
+            else None,
+        )
+        for product_id in ids
+    ]
+    Product.objects.bulk_update(products, ["material_cost"], batch_size=500)
+    return len(products)
+
+
+def refresh_costs_for_materials(material_ids: Iterable[int]) -> int:
+    """Refresh the material cost of every product whose norms use `material_ids`."""
+    return refresh_product_material_costs(
+        ProductMaterialNorm.objects.filter(material_id__in=set(material_ids))
+        .order_by()
+        .values_list("product_id", flat=True)
+        .distinct()
+    )
+
+
+@transaction.atomic
+def recompute_material_costs(*, batch_size: int = RECOMPUTE_BATCH_SIZE) -> dict[str, int]:
+    """Replay the material ledger in posting order and rewrite every cost derived from it.
+
+    Rewrites movement costs, stock record averages and product material costs. Purchase
+    receipts bring their receipt line cost; transfers carry the source record's average.
+    """
+    record_keys = {
+        record_id: (material_id, color_id, unit)
+        for record_id, material_id, color_id, unit in MaterialStock.objects.values_list(
+            "id", "material_id", "material_color_id", "unit"
+        )
+    }
+    state: dict[int, tuple[Decimal, Decimal | None]] = {}
+    transfer_costs: dict[tuple, Decimal | None] = {}
+    pending: list[MaterialStockMovement] = []
+    replayed = 0
+
+    movements = MaterialStockMovement.objects.order_by("created_at", "id").values_list(
+        "id",
+        "stock_record_id",
+        "quantity_change",
+        "reason",
+        "related_transfer_id",
+        "related_receipt_line__unit_cost",
+    )
+    for movement_id, record_id, change, reason, transfer_id, receipt_cost in movements.iterator(
+        chunk_size=batch_size
+    ):
+        on_hand, average = state.get(record_id, (ZERO, None))
+        transfer_key = (transfer_id, *record_keys[record_id])
+        if change > ZERO:
+            incoming = receipt_cost
+            if reason == MaterialStockMovement.Reason.TRANSFER_IN:
+                incoming = transfer_costs.get(transfer_key)
+            if incoming is not None:
+                average = blend_average_cost(on_hand, average, change, incoming)
+            unit_cost = incoming if incoming is not None else average
+        else:
+            unit_cost = average
+            if reason == MaterialStockMovement.Reason.TRANSFER_OUT:
+                transfer_costs[transfer_key] = average
+        state[record_id] = (on_hand + change, average)
+
+        pending.append(MaterialStockMovement(id=movement_id, unit_cost=unit_cost))
+        replayed += 1
+        if len(pending) >= batch_size:
+            MaterialStockMovement.objects.bulk_update(pending, ["unit_cost"])
+            pending = []
+    MaterialStockMovement.objects.bulk_update(pending, ["unit_cost"])
+
+    MaterialStock.objects.bulk_update(
+        [
+            MaterialStock(id=record_id, average_unit_cost=state.get(record_id, (ZERO, None))[1])
+            for record_id in record_keys
+        ],
+        ["average_unit_cost"],
+        batch_size=batch_size,
+    )
+    products = 0
+    product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(product_ids), batch_size):
+        products += refresh_product_material_costs(product_ids[start : start + batch_size])
+    return {"movements": replayed, "stock_records": len(record_keys), "products": products}
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.materials.planning import plan_material_requirements
+
+
+class Command(BaseCommand):
+    help = "Print material shortages for all open production and sales demand."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--warehouse",
+            type=int,
+            action="append",
+            dest="warehouse_ids",
+            help="Count stock only in this warehouse id (repeatable).",
+        )
+        parser.add_argument("--all", action="store_true", help="Include rows without shortage.")
+
+    def handle(self, *args, **options):
+        plan = plan_material_requirements(
+            warehouse_ids=options["warehouse_ids"],
+            only_shortages=not options["all"],
+        )
+        for row in plan:
+            label = f"{row.material_name} ({row.color_name})" if row.color_name else row.material_name
+            self.stdout.write(
+                f"{label} [{row.unit}]: required={row.required} on_hand={row.on_hand} "
+                f"on_order={row.on_order} shortage={row.shortage}"
+            )
+        if not plan:
+            self.stdout.write("No shortages.")
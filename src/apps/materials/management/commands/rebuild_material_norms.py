@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.materials.norms import REBUILD_BATCH_SIZE, rebuild_all_product_material_norms
+
+
+class Command(BaseCommand):
+    help = "Recreate flattened material norms per product from BOM rows and bundle components."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        written = rebuild_all_product_material_norms(batch_size=options["batch_size"])
+        self.stdout.write(f"norms: {written}")
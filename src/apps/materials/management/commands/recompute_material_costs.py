@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.materials.costing import RECOMPUTE_BATCH_SIZE, recompute_material_costs
+
+
+class Command(BaseCommand):
+    help = "Replay the material ledger to rebuild average stock costs and product material costs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=RECOMPUTE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        written = recompute_material_costs(batch_size=options["batch_size"])
+        for name, count in written.items():
+            self.stdout.write(f"{name}: {count}")
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='materialstockmovement',
+            index=models.Index(fields=['created_at', 'stock_record'], name='mat_move_created_idx'),
+        ),
+    ]
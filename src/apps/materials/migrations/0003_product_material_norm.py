@@ -0,0 +1,69 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:38
+
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_norms(apps, schema_editor):
+    BOM = apps.get_model("materials", "BOM")
+    BundleComponent = apps.get_model("catalog", "BundleComponent")
+    Product = apps.get_model("catalog", "Product")
+    ProductMaterialNorm = apps.get_model("materials", "ProductMaterialNorm")
+
+    bom = defaultdict(list)
+    for product_id, material_id, unit, per_unit in BOM.objects.values_list(
+        "product_id", "material_id", "unit", "quantity_per_unit"
+    ):
+        bom[product_id].append((material_id, unit, per_unit))
+    components = defaultdict(list)
+    for bundle_id, component_id, quantity in BundleComponent.objects.values_list(
+        "bundle_id", "component_id", "quantity"
+    ):
+        components[bundle_id].append((component_id, quantity))
+
+    totals = defaultdict(Decimal)
+    for product_id, is_bundle in Product.objects.values_list("id", "is_bundle"):
+        parts = components[product_id] if is_bundle else [(product_id, 1)]
+        for source_id, multiplier in parts:
+            for material_id, unit, per_unit in bom[source_id]:
+                totals[(product_id, material_id, unit)] += per_unit * multiplier
+    ProductMaterialNorm.objects.bulk_create(
+        [
+            ProductMaterialNorm(
+                product_id=product_id,
+                material_id=material_id,
+                unit=unit,
+                quantity_per_unit=quantity,
+            )
+            for (product_id, material_id, unit), quantity in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_price_retail_uah'),
+        ('materials', '0002_movement_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductMaterialNorm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit', models.CharField(choices=[('pcs', 'шт'), ('m', 'м'), ('m2', 'м²'), ('g', 'г'), ('ml', 'мл')], max_length=8)),
+                ('quantity_per_unit', models.DecimalField(decimal_places=3, max_digits=14)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flattened_product_norms', to='materials.material')),
+                ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='flattened_material_norms', to='catalog.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'material', 'unit'), name='materials_productmaterialnorm_product_material_unit_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_norms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0003_product_material_norm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materialstock',
+            name='average_unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='materialstockmovement',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=12, null=True),
+        ),
+    ]
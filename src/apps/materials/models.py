@@ -89,6 +89,40 @@ class BOM(models.Model):
         )
 
 
+class ProductMaterialNorm(models.Model):
+    """Material per unit of a product with bundles expanded through their components.
+
+    Derived from `BOM` and `BundleComponent` by apps.materials.norms; never edit directly.
+    """
+
+    # No database constraint: rows are rebuilt from signals that can fire while a product is
+    # being deleted, and the product's own post_delete handler removes them afterwards.
+    product = models.ForeignKey(
+        "catalog.Product",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="flattened_material_norms",
+    )
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.CASCADE,
+        related_name="flattened_product_norms",
+    )
+    unit = models.CharField(max_length=8, choices=BOM.Unit.choices)
+    quantity_per_unit = models.DecimalField(max_digits=14, decimal_places=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "material", "unit"],
+                name="materials_productmaterialnorm_product_material_unit_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id}: {self.material_id} {self.quantity_per_unit} {self.unit}"
+
+
 class Supplier(models.Model):
     name = models.CharField(max_length=255, unique=True)
     contact_name = models.CharField(max_length=255, blank=True)
@@ -252,6 +286,8 @@ class MaterialStock(models.Model):
     )
     unit = models.CharField(max_length=8, choices=BOM.Unit.choices)
     quantity = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal("0.000"))
+    # Weighted average cost of the units on hand; null until a costed receipt arrives.
+    average_unit_cost = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -381,6 +417,9 @@ class MaterialStockMovement(models.Model):
         related_name="movements",
     )
     quantity_change = models.DecimalField(max_digits=12, decimal_places=3)
+    # Cost per unit the movement was valued at: the receipt cost for costed receipts,
+    # otherwise the record's average cost at the time of posting.
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
     reason = models.CharField(max_length=24, choices=Reason.choices)
     related_purchase_order_line = models.ForeignKey(
         PurchaseOrderLine,
@@ -415,6 +454,9 @@ class MaterialStockMovement(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["created_at", "stock_record"], name="mat_move_created_idx"),
+        ]
 
     def __str__(self) -> str:
         sign = "+" if self.quantity_change > 0 else ""
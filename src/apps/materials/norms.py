@@ -0,0 +1,91 @@
+"""Flattened material norms per product (`ProductMaterialNorm`).
+
+A regular product's norms are its `BOM` rows. A bundle's norms are the sum of its
+components' norms times `BundleComponent.quantity`. Signals rebuild the affected products
+whenever a BOM row, a bundle component or a product changes.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from decimal import Decimal
+
+from django.db import transaction
+
+from apps.catalog.models import BundleComponent, Product
+from apps.materials.costing import refresh_product_material_costs
+from apps.materials.models import BOM, ProductMaterialNorm
+
+REBUILD_BATCH_SIZE = 500
+
+
+def products_using(product_id: int) -> set[int]:
+    """The product itself and every bundle it is a component of."""
+    return {product_id} | set(
+        BundleComponent.objects.filter(component_id=product_id).values_list("bundle_id", flat=True)
+    )
+
+
+@transaction.atomic
+def rebuild_product_material_norms(product_ids: Iterable[int]) -> int:
+    """Recompute flattened norms and material cost for `product_ids`; returns rows written."""
+    ids = set(product_ids)
+    if not ids:
+        return 0
+    bundle_ids = set(
+        Product.objects.filter(id__in=ids, is_bundle=True).values_list("id", flat=True)
+    )
+    components: dict[int, list[tuple[int, int]]] = defaultdict(list)
+    for bundle_id, component_id, quantity in BundleComponent.objects.filter(
+        bundle_id__in=bundle_ids
+    ).values_list("bundle_id", "component_id", "quantity"):
+        components[bundle_id].append((component_id, quantity))
+
+    source_ids = (ids - bundle_ids) | {
+        component_id for parts in components.values() for component_id, _ in parts
+    }
+    bom: dict[int, list[tuple[int, str, Decimal]]] = defaultdict(list)
+    for product_id, material_id, unit, per_unit in BOM.objects.filter(
+        product_id__in=source_ids
+    ).values_list("product_id", "material_id", "unit", "quantity_per_unit"):
+        bom[product_id].append((material_id, unit, per_unit))
+
+    totals: dict[tuple[int, int, str], Decimal] = defaultdict(Decimal)
+    for product_id in ids:
+        parts = components[product_id] if product_id in bundle_ids else [(product_id, 1)]
+        for source_id, multiplier in parts:
+            for material_id, unit, per_unit in bom[source_id]:
+                totals[(product_id, material_id, unit)] += per_unit * multiplier
+
+    ProductMaterialNorm.objects.filter(product_id__in=ids).delete()
+    ProductMaterialNorm.objects.bulk_create(
+        [
+            ProductMaterialNorm(
+                product_id=product_id,
+                material_id=material_id,
+                unit=unit,
+                quantity_per_unit=quantity,
+            )
+            for (product_id, material_id, unit), quantity in totals.items()
+        ]
+    )
+    refresh_product_material_costs(ids)
+    return len(totals)
+
+
+@transaction.atomic
+def rebuild_all_product_material_norms(*, batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """Recompute the whole table in product-id batches; returns rows written."""
+    ProductMaterialNorm.objects.exclude(product_id__in=Product.objects.values("id")).delete()
+    written = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Product.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return written
+        written += rebuild_product_material_norms(ids)
+        last_id = ids[-1]
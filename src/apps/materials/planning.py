@@ -0,0 +1,226 @@
+"""Material requirements planning across all open demand.
+
+Demand is every non-done production order plus every open sales order line that has no
+production orders yet (once orders exist, they carry the demand). Demand is exploded through
+bundle selections and flattened material norms in memory after a fixed number of grouped
+queries. It is then netted against material stock and open purchase order lines.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db.models import Count, F, Sum
+
+from apps.catalog.models import BundleComponent
+from apps.materials.models import (
+    MaterialColor,
+    MaterialStock,
+    ProductMaterialNorm,
+    PurchaseOrder,
+    PurchaseOrderLine,
+)
+from apps.production.domain.status import STATUS_DONE
+from apps.production.models import ProductionOrder
+from apps.sales.models import SalesOrder, SalesOrderLine, SalesOrderLineComponentSelection
+
+OPEN_SALES_STATUSES = (
+    SalesOrder.Status.NEW,
+    SalesOrder.Status.PROCESSING,
+    SalesOrder.Status.PRODUCTION,
+)
+OPEN_PURCHASE_STATUSES = (
+    PurchaseOrder.Status.SENT,
+    PurchaseOrder.Status.PARTIALLY_RECEIVED,
+)
+# (primary material id, primary color id, secondary material id, secondary color id)
+VARIANT_COLOR_FIELDS = (
+    "variant__primary_material_color__material_id",
+    "variant__primary_material_color_id",
+    "variant__secondary_material_color__material_id",
+    "variant__secondary_material_color_id",
+)
+
+ZERO = Decimal("0")
+
+MaterialKey = tuple[int, int | None, str]  # (material_id, material_color_id, unit)
+# Material colors of a variant: ((material_id, material_color_id), ...)
+VariantColors = tuple[tuple[int, int], ...]
+
+
+@dataclass
+class MaterialPlanRow:
+    material_id: int
+    material_name: str
+    material_color_id: int | None
+    color_name: str
+    unit: str
+    required: Decimal = ZERO
+    on_hand: Decimal = ZERO
+    on_order: Decimal = ZERO
+    on_hand_by_warehouse: dict[int, Decimal] = field(default_factory=dict)
+
+    @property
+    def shortage(self) -> Decimal:
+        return max(self.required - self.on_hand - self.on_order, ZERO)
+
+
+def plan_material_requirements(
+    *,
+    warehouse_ids: Iterable[int] | None = None,
+    only_shortages: bool = True,
+) -> list[MaterialPlanRow]:
+    """Required vs available material per (material, color, unit), sorted by name.
+
+    `warehouse_ids` limits which stock counts as on hand (default: every warehouse).
+    A BOM material takes the variant's material color when the variant is made in that
+    material, and no color otherwise. Stock and purchase lines are matched on the same key.
+    """
+    demand = _product_demand()
+    norms = _norms_by_product({product_id for product_id, _ in demand})
+
+    rows: dict[MaterialKey, MaterialPlanRow] = {}
+    for (product_id, colors), quantity in demand.items():
+        color_by_material = dict(colors)
+        for material_id, material_name, per_unit, unit in norms.get(product_id, ()):
+            key = (material_id, color_by_material.get(material_id), unit)
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = _plan_row(key, material_name)
+            row.required += per_unit * quantity
+
+    _add_stock(rows, warehouse_ids)
+    _add_open_purchases(rows)
+    _fill_color_names(rows)
+
+    plan = [row for row in rows.values() if row.shortage > 0 or not only_shortages]
+    return sorted(plan, key=lambda row: (row.material_name, row.color_name, row.unit))
+
+
+def _product_demand() -> dict[tuple[int, VariantColors], int]:
+    """Units to produce per (product, variant material colors)."""
+    demand: dict[tuple[int, VariantColors], int] = defaultdict(int)
+
+    for product_id, count, *colors in (
+        ProductionOrder.objects.exclude(status=STATUS_DONE)
+        .values("product_id", *VARIANT_COLOR_FIELDS)
+        .annotate(units=Count("id"))
+        .values_list("product_id", "units", *VARIANT_COLOR_FIELDS)
+    ):
+        demand[(product_id, _variant_colors(colors))] += count
+
+    open_lines = SalesOrderLine.objects.filter(
+        sales_order__status__in=OPEN_SALES_STATUSES,
+        total_production_orders=0,
+    ).exclude(production_status=SalesOrderLine.ProductionStatus.DONE)
+
+    for product_id, units, *colors in (
+        open_lines.filter(product__is_bundle=False)
+        .values("product_id", *VARIANT_COLOR_FIELDS)
+        .annotate(units=Sum("quantity"))
+        .values_list("product_id", "units", *VARIANT_COLOR_FIELDS)
+    ):
+        demand[(product_id, _variant_colors(colors))] += units
+
+    bundle_lines = open_lines.filter(product__is_bundle=True)
+    component_quantities = {
+        (bundle_id, component_id): quantity
+        for bundle_id, component_id, quantity in BundleComponent.objects.filter(
+            bundle_id__in=bundle_lines.values("product_id")
+        ).values_list("bundle_id", "component_id", "quantity")
+    }
+    for bundle_id, component_id, units, *colors in (
+        SalesOrderLineComponentSelection.objects.filter(order_line__in=bundle_lines)
+        .values("order_line__product_id", "component_id", *VARIANT_COLOR_FIELDS)
+        .annotate(units=Sum("order_line__quantity"))
+        .values_list("order_line__product_id", "component_id", "units", *VARIANT_COLOR_FIELDS)
+    ):
+        per_bundle = component_quantities.get((bundle_id, component_id), 1)
+        demand[(component_id, _variant_colors(colors))] += units * per_bundle
+
+    # Bundle lines without selections: the bundle's flattened norms, without material colors.
+    for bundle_id, units in (
+        bundle_lines.filter(component_selections__isnull=True)
+        .values("product_id")
+        .annotate(units=Sum("quantity"))
+        .values_list("product_id", "units")
+    ):
+        demand[(bundle_id, ())] += units
+
+    return demand
+
+
+def _variant_colors(values) -> VariantColors:
+    primary_material, primary_color, secondary_material, secondary_color = values
+    colors = []
+    if primary_color is not None:
+        colors.append((primary_material, primary_color))
+    if secondary_color is not None and secondary_material != primary_material:
+        colors.append((secondary_material, secondary_color))
+    return tuple(colors)
+
+
+def _norms_by_product(product_ids: set[int]) -> dict[int, list[tuple[int, str, Decimal, str]]]:
+    norms: dict[int, list[tuple[int, str, Decimal, str]]] = defaultdict(list)
+    for product_id, material_id, material_name, per_unit, unit in ProductMaterialNorm.objects.filter(
+        product_id__in=product_ids
+    ).values_list("product_id", "material_id", "material__name", "quantity_per_unit", "unit"):
+        norms[product_id].append((material_id, material_name, per_unit, unit))
+    return norms
+
+
+def _plan_row(key: MaterialKey, material_name: str) -> MaterialPlanRow:
+    material_id, material_color_id, unit = key
+    return MaterialPlanRow(
+        material_id=material_id,
+        material_name=material_name,
+        material_color_id=material_color_id,
+        color_name="",
+        unit=unit,
+    )
+
+
+def _add_stock(rows: dict[MaterialKey, MaterialPlanRow], warehouse_ids) -> None:
+    stock = MaterialStock.objects.filter(
+        material_id__in={material_id for material_id, _, _ in rows},
+        quantity__gt=ZERO,
+    )
+    if warehouse_ids is not None:
+        stock = stock.filter(warehouse_id__in=list(warehouse_ids))
+    for material_id, color_id, unit, warehouse_id, quantity in (
+        stock.values("material_id", "material_color_id", "unit", "warehouse_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("material_id", "material_color_id", "unit", "warehouse_id", "total")
+    ):
+        row = rows.get((material_id, color_id, unit))
+        if row is not None:
+            row.on_hand += quantity
+            row.on_hand_by_warehouse[warehouse_id] = quantity
+
+
+def _add_open_purchases(rows: dict[MaterialKey, MaterialPlanRow]) -> None:
+    for material_id, color_id, unit, remaining in (
+        PurchaseOrderLine.objects.filter(
+            purchase_order__status__in=OPEN_PURCHASE_STATUSES,
+            material_id__in={material_id for material_id, _, _ in rows},
+            quantity__gt=F("received_quantity"),
+        )
+        .values("material_id", "material_color_id", "unit")
+        .annotate(remaining=Sum(F("quantity") - F("received_quantity")))
+        .values_list("material_id", "material_color_id", "unit", "remaining")
+    ):
+        row = rows.get((material_id, color_id, unit))
+        if row is not None:
+            row.on_order += remaining
+
+
+def _fill_color_names(rows: dict[MaterialKey, MaterialPlanRow]) -> None:
+    color_ids = {color_id for _, color_id, _ in rows if color_id is not None}
+    if not color_ids:
+        return
+    names = dict(MaterialColor.objects.filter(id__in=color_ids).values_list("id", "name"))
+    for row in rows.values():
+        if row.material_color_id is not None:
+            row.color_name = names.get(row.material_color_id, "")
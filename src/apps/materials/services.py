@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from dataclasses import dataclass
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
 from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
-from apps.catalog.models import BundleComponent
+from apps.inventory.models import StockSnapshot
+from apps.inventory.snapshots import refresh_stock_snapshots
+from apps.materials.costing import (
+    average_cost_after_receipt,
+    blend_average_cost,
+    refresh_costs_for_materials,
+)
 from apps.materials.models import (
     GoodsReceipt,
     GoodsReceiptLine,
@@ -17,7 +25,7 @@ from apps.materials.models import (
     MaterialStock,
     MaterialStockTransfer,
     MaterialStockTransferLine,
-    BOM,
+    ProductMaterialNorm,
     PurchaseOrder,
     PurchaseOrderLine,
 )
@@ -35,45 +43,64 @@ class MaterialRequirement:
     quantity: Decimal
 
 
+@dataclass(frozen=True)
+class MaterialMovementEntry:
+    warehouse_id: int
+    material_id: int
+    unit: str
+    quantity_change: Decimal
+    reason: str
+    material_color_id: int | None = None
+    unit_cost: Decimal | None = None
+    related_purchase_order_line: PurchaseOrderLine | None = None
+    related_receipt_line: GoodsReceiptLine | None = None
+    related_transfer: MaterialStockTransfer | None = None
+    created_by: "AbstractBaseUser | None" = None
+    notes: str = ""
+
+    @property
+    def stock_key(self) -> tuple[int, int, int | None, str]:
+        return (self.warehouse_id, self.material_id, self.material_color_id, self.unit)
+
+
+@dataclass(frozen=True)
+class MaterialTransferLine:
+    material_id: int
+    quantity: Decimal
+    unit: str
+    material_color_id: int | None = None
+
+    @property
+    def key(self) -> tuple[int, int | None, str]:
+        return (self.material_id, self.material_color_id, self.unit)
+
+
+@dataclass(frozen=True)
+class PurchaseReceiptEntry:
+    purchase_order_line_id: int
+    quantity: Decimal
+    notes: str = ""
+
+
 def calculate_material_requirements_for_sales_order_line(
     *,
     line: SalesOrderLine,
 ) -> list[MaterialRequirement]:
-    totals: dict[tuple[int, str], Decimal] = {}
-    labels: dict[int, str] = {}
-
-    for product_id, produced_quantity in _iter_line_product_quantities(line=line):
-        for norm in BOM.objects.filter(product_id=product_id).select_related(
-            "material"
-        ):
-            key = (norm.material_id, norm.unit)
-            quantity = norm.quantity_per_unit * produced_quantity
-            totals[key] = totals.get(key, Decimal("0")) + quantity
-            labels[norm.material_id] = norm.material.name
-
+    """Material needed for `line`; bundles come pre-expanded from `ProductMaterialNorm`."""
     requirements = [
         MaterialRequirement(
-            material_id=material_id,
-            material_name=labels[material_id],
-            unit=unit,
-            quantity=quantity.quantize(Decimal("0.01")),
+            material_id=norm.material_id,
+            material_name=norm.material.name,
+            unit=norm.unit,
+            quantity=(norm.quantity_per_unit * line.quantity).quantize(Decimal("0.01")),
+        )
+        for norm in ProductMaterialNorm.objects.filter(product_id=line.product_id).select_related(
+            "material"
         )
-        for (material_id, unit), quantity in totals.items()
     ]
     return sorted(requirements, key=lambda item: item.material_name)
 
 
-def _iter_line_product_quantities(*, line: SalesOrderLine) -> list[tuple[int, Decimal]]:
-    if not line.is_bundle:
-        return [(line.product_id, Decimal(line.quantity))]
-
-    bundle_components = BundleComponent.objects.filter(bundle_id=line.product_id)
-    return [
-        (component.component_id, Decimal(line.quantity * component.quantity))
-        for component in bundle_components
-    ]
-
-
 @transaction.atomic
 def add_material_stock(
     *,
@@ -88,7 +115,9 @@ def add_material_stock(
     related_transfer: MaterialStockTransfer | None = None,
     created_by: "AbstractBaseUser | None" = None,
     notes: str = "",
+    unit_cost: Decimal | None = None,
 ) -> MaterialStock:
+    """Add stock; a known `unit_cost` blends into the record's weighted average cost."""
     quantity_decimal = Decimal(str(quantity))
     if quantity_decimal <= Decimal("0"):
         raise ValueError("Quantity must be greater than 0")
@@ -99,12 +128,17 @@ def add_material_stock(
         material_color=material_color,
         unit=unit,
     )
-    stock_record.quantity += quantity_decimal
-    stock_record.save(update_fields=["quantity", "updated_at"])
+    updates = {"quantity": F("quantity") + quantity_decimal, "updated_at": timezone.now()}
+    if unit_cost is not None:
+        unit_cost = Decimal(str(unit_cost))
+        updates["average_unit_cost"] = average_cost_after_receipt(quantity_decimal, unit_cost)
+    MaterialStock.objects.filter(pk=stock_record.pk).update(**updates)
+    stock_record.refresh_from_db(fields=["quantity", "average_unit_cost", "updated_at"])
 
     MaterialStockMovement.objects.create(
         stock_record=stock_record,
         quantity_change=quantity_decimal,
+        unit_cost=unit_cost if unit_cost is not None else stock_record.average_unit_cost,
         reason=reason,
         related_purchase_order_line=related_purchase_order_line,
         related_receipt_line=related_receipt_line,
@@ -112,6 +146,8 @@ def add_material_stock(
         created_by=created_by,
         notes=notes,
     )
+    refresh_stock_snapshots(StockSnapshot.Kind.MATERIAL, [stock_record.pk])
+    refresh_costs_for_materials([material.id])
     return stock_record
 
 
@@ -133,34 +169,37 @@ def remove_material_stock(
     if quantity_decimal <= Decimal("0"):
         raise ValueError("Quantity must be greater than 0")
 
-    stock_record = (
+    stock_records = (
         MaterialStock.objects.for_warehouse(warehouse_id)
         .for_material(material.id)
         .filter(material_color=material_color, unit=unit)
-        .first()
     )
+    # Check and decrement in one statement: concurrent removals cannot both pass the check.
+    updated = stock_records.filter(quantity__gte=quantity_decimal).update(
+        quantity=F("quantity") - quantity_decimal,
+        updated_at=timezone.now(),
+    )
+    stock_record = stock_records.first()
     if stock_record is None:
         raise ValueError("Недостатньо на складі: є 0")
-
-    if stock_record.quantity < quantity_decimal:
+    if not updated:
         raise ValueError(f"Недостатньо на складі: є {stock_record.quantity}, потрібно {quantity_decimal}")
 
-    stock_record.quantity -= quantity_decimal
-    stock_record.save(update_fields=["quantity", "updated_at"])
-
     MaterialStockMovement.objects.create(
         stock_record=stock_record,
         quantity_change=-quantity_decimal,
+        unit_cost=stock_record.average_unit_cost,
         reason=reason,
         related_purchase_order_line=related_purchase_order_line,
         related_transfer=related_transfer,
         created_by=created_by,
         notes=notes,
     )
+    refresh_stock_snapshots(StockSnapshot.Kind.MATERIAL, [stock_record.pk])
+    refresh_costs_for_materials([material.id])
     return stock_record
 
 
-@transaction.atomic
 def transfer_material_stock(
     *,
     from_warehouse_id: int,
@@ -172,12 +211,47 @@ def transfer_material_stock(
     created_by: "AbstractBaseUser | None" = None,
     notes: str = "",
 ) -> MaterialStockTransfer:
+    return transfer_material_stock_lines(
+        from_warehouse_id=from_warehouse_id,
+        to_warehouse_id=to_warehouse_id,
+        lines=[
+            MaterialTransferLine(
+                material_id=material.id,
+                material_color_id=material_color.id if material_color else None,
+                quantity=quantity,
+                unit=unit,
+            )
+        ],
+        created_by=created_by,
+        notes=notes,
+    )
+
+
+@transaction.atomic
+def transfer_material_stock_lines(
+    *,
+    from_warehouse_id: int,
+    to_warehouse_id: int,
+    lines: Iterable[MaterialTransferLine],
+    created_by: "AbstractBaseUser | None" = None,
+    notes: str = "",
+    in_transit: bool = False,
+) -> MaterialStockTransfer:
+    """Move many materials between warehouses as one transfer with batched stock posting.
+
+    With `in_transit=True` the material leaves the source now and the transfer stays
+    `IN_TRANSIT` until receive_material_stock_transfer books it into the target.
+    """
     if from_warehouse_id == to_warehouse_id:
         raise ValueError("Transfer warehouses must be different")
-
-    quantity_decimal = Decimal(str(quantity))
-    if quantity_decimal <= Decimal("0"):
-        raise ValueError("Quantity must be greater than 0")
+    quantities: dict[tuple[int, int | None, str], Decimal] = {}
+    for line in lines:
+        quantity_decimal = Decimal(str(line.quantity))
+        if quantity_decimal <= Decimal("0"):
+            raise ValueError("Quantity must be greater than 0")
+        quantities[line.key] = quantities.get(line.key, Decimal("0")) + quantity_decimal
+    if not quantities:
+        raise ValueError("Transfer must have at least one line")
 
     transfer = MaterialStockTransfer.objects.create(
         from_warehouse_id=from_warehouse_id,
@@ -186,99 +260,290 @@ def transfer_material_stock(
         created_by=created_by,
         notes=notes,
     )
-    MaterialStockTransferLine.objects.create(
-        transfer=transfer,
-        material=material,
-        material_color=material_color,
-        quantity=quantity_decimal,
-        unit=unit,
+    MaterialStockTransferLine.objects.bulk_create(
+        [
+            MaterialStockTransferLine(
+                transfer=transfer,
+                material_id=material_id,
+                material_color_id=material_color_id,
+                quantity=quantity_decimal,
+                unit=unit,
+            )
+            for (material_id, material_color_id, unit), quantity_decimal in quantities.items()
+        ]
     )
 
-    remove_material_stock(
-        warehouse_id=from_warehouse_id,
-        material=material,
-        material_color=material_color,
-        quantity=quantity_decimal,
-        unit=unit,
-        reason=MaterialStockMovement.Reason.TRANSFER_OUT,
-        related_transfer=transfer,
-        created_by=created_by,
-        notes=notes,
+    outgoing = post_material_movements(
+        [
+            MaterialMovementEntry(
+                warehouse_id=from_warehouse_id,
+                material_id=material_id,
+                material_color_id=material_color_id,
+                unit=unit,
+                quantity_change=-quantity_decimal,
+                reason=MaterialStockMovement.Reason.TRANSFER_OUT,
+                related_transfer=transfer,
+                created_by=created_by,
+                notes=notes,
+            )
+            for (material_id, material_color_id, unit), quantity_decimal in quantities.items()
+        ]
     )
-    add_material_stock(
-        warehouse_id=to_warehouse_id,
-        material=material,
-        material_color=material_color,
-        quantity=quantity_decimal,
-        unit=unit,
-        reason=MaterialStockMovement.Reason.TRANSFER_IN,
-        related_transfer=transfer,
-        created_by=created_by,
-        notes=notes,
+    if not in_transit:
+        _post_material_transfer_in(transfer, outgoing, created_by=created_by, notes=notes)
+    return transfer
+
+
+@transaction.atomic
+def receive_material_stock_transfer(
+    *,
+    transfer: MaterialStockTransfer,
+    created_by: "AbstractBaseUser | None" = None,
+    notes: str = "",
+) -> MaterialStockTransfer:
+    """Book an in-transit transfer into its target warehouse and complete it."""
+    transfer = MaterialStockTransfer.objects.select_for_update().get(pk=transfer.pk)
+    if transfer.status != MaterialStockTransfer.Status.IN_TRANSIT:
+        raise ValueError("Transfer is not in transit")
+
+    outgoing = list(
+        MaterialStockMovement.objects.filter(
+            related_transfer=transfer,
+            reason=MaterialStockMovement.Reason.TRANSFER_OUT,
+        ).select_related("stock_record")
     )
+    _post_material_transfer_in(
+        transfer, outgoing, created_by=created_by, notes=notes or transfer.notes
+    )
+    return transfer
 
+
+def _post_material_transfer_in(
+    transfer: MaterialStockTransfer,
+    outgoing: list[MaterialStockMovement],
+    *,
+    created_by: "AbstractBaseUser | None",
+    notes: str,
+) -> None:
+    # Mirror each outgoing movement, carrying the source average cost to the target.
+    post_material_movements(
+        [
+            MaterialMovementEntry(
+                warehouse_id=transfer.to_warehouse_id,
+                material_id=movement.stock_record.material_id,
+                material_color_id=movement.stock_record.material_color_id,
+                unit=movement.stock_record.unit,
+                quantity_change=-movement.quantity_change,
+                unit_cost=movement.unit_cost,
+                reason=MaterialStockMovement.Reason.TRANSFER_IN,
+                related_transfer=transfer,
+                created_by=created_by,
+                notes=notes,
+            )
+            for movement in outgoing
+        ]
+    )
     transfer.status = MaterialStockTransfer.Status.COMPLETED
     transfer.completed_at = timezone.now()
     transfer.save(update_fields=["status", "completed_at"])
-    return transfer
 
 
 @transaction.atomic
-def receive_purchase_order_line(
+def post_material_movements(batch: list[MaterialMovementEntry]) -> list[MaterialStockMovement]:
+    """Post many signed material stock changes with a constant number of queries.
+
+    Entries are applied in order, so a batch fails exactly where the equivalent
+    sequence of add_material_stock/remove_material_stock calls would.
+    """
+    if not batch:
+        return []
+    for entry in batch:
+        if Decimal(str(entry.quantity_change)) == Decimal("0"):
+            raise ValueError("Quantity change must not be 0")
+
+    keys = {entry.stock_key for entry in batch}
+    # Zero rows for new keys first, so every balance can be locked and updated in place.
+    MaterialStock.objects.bulk_create(
+        [
+            MaterialStock(
+                warehouse_id=warehouse_id,
+                material_id=material_id,
+                material_color_id=material_color_id,
+                unit=unit,
+            )
+            for warehouse_id, material_id, material_color_id, unit in keys
+        ],
+        ignore_conflicts=True,
+    )
+    exact_keys = Q(pk__in=[])
+    for warehouse_id, material_id, material_color_id, unit in keys:
+        exact_keys |= Q(
+            warehouse_id=warehouse_id,
+            material_id=material_id,
+            material_color_id=material_color_id,
+            unit=unit,
+        )
+    # Lock only the stock rows (the default ordering joins Material) and in id order, like
+    # post_stock_movements, so concurrent batches cannot deadlock.
+    records: dict[tuple[int, int, int | None, str], MaterialStock] = {
+        (record.warehouse_id, record.material_id, record.material_color_id, record.unit): record
+        for record in MaterialStock.objects.select_for_update(of=("self",))
+        .filter(exact_keys)
+        .order_by("id")
+    }
+
+    now = timezone.now()
+    movements: list[MaterialStockMovement] = []
+    for entry in batch:
+        record = records[entry.stock_key]
+        quantity_change = Decimal(str(entry.quantity_change))
+        if record.quantity + quantity_change < Decimal("0"):
+            raise ValueError(
+                f"Недостатньо на складі: є {record.quantity}, потрібно {-quantity_change}"
+            )
+        unit_cost = record.average_unit_cost
+        if quantity_change > 0 and entry.unit_cost is not None:
+            unit_cost = Decimal(str(entry.unit_cost))
+            record.average_unit_cost = blend_average_cost(
+                record.quantity, record.average_unit_cost, quantity_change, unit_cost
+            )
+        record.quantity += quantity_change
+        record.updated_at = now
+        movements.append(
+            MaterialStockMovement(
+                stock_record=record,
+                quantity_change=quantity_change,
+                unit_cost=unit_cost,
+                reason=entry.reason,
+                related_purchase_order_line=entry.related_purchase_order_line,
+                related_receipt_line=entry.related_receipt_line,
+                related_transfer=entry.related_transfer,
+                created_by=entry.created_by,
+                notes=entry.notes,
+            )
+        )
+
+    MaterialStock.objects.bulk_update(
+        list(records.values()), ["quantity", "average_unit_cost", "updated_at"]
+    )
+    created = MaterialStockMovement.objects.bulk_create(movements)
+    refresh_stock_snapshots(
+        StockSnapshot.Kind.MATERIAL, [record.pk for record in records.values()]
+    )
+    refresh_costs_for_materials({entry.material_id for entry in batch})
+    return created
+
+
+@transaction.atomic
+def receive_purchase_order(
     *,
-    purchase_order_line: PurchaseOrderLine,
-    quantity: Decimal,
+    purchase_order: PurchaseOrder,
+    lines: Iterable[PurchaseReceiptEntry],
     warehouse_id: int,
     received_by: "AbstractBaseUser | None" = None,
     notes: str = "",
-) -> GoodsReceiptLine:
-    quantity_decimal = Decimal(str(quantity))
-    if quantity_decimal <= Decimal("0"):
-        raise ValueError("Quantity must be greater than 0")
-
-    po_line = PurchaseOrderLine.objects.select_for_update().select_related(
-        "purchase_order", "material", "material_color"
-    ).get(pk=purchase_order_line.pk)
-
-    if quantity_decimal > po_line.remaining_quantity:
-        raise ValueError(f"Cannot receive more than remaining quantity: {po_line.remaining_quantity}")
+) -> GoodsReceipt:
+    """Receive several lines of a purchase order as one goods receipt.
+
+    Locks every line in one query, posts stock in bulk and recomputes the order status once.
+    """
+    quantities: dict[int, Decimal] = {}
+    line_notes: dict[int, str] = {}
+    for entry in lines:
+        quantity_decimal = Decimal(str(entry.quantity))
+        if quantity_decimal <= Decimal("0"):
+            raise ValueError("Quantity must be greater than 0")
+        if entry.purchase_order_line_id in quantities:
+            raise ValueError(f"Duplicate purchase order line: {entry.purchase_order_line_id}")
+        quantities[entry.purchase_order_line_id] = quantity_decimal
+        line_notes[entry.purchase_order_line_id] = entry.notes or notes
+    if not quantities:
+        raise ValueError("Nothing to receive")
+
+    po_lines = {
+        line.pk: line
+        for line in PurchaseOrderLine.objects.select_for_update()
+        .filter(purchase_order=purchase_order, pk__in=quantities)
+        .order_by("pk")
+    }
+    missing = sorted(quantities.keys() - po_lines.keys())
+    if missing:
+        raise ValueError(f"Lines {missing} do not belong to purchase order {purchase_order.pk}")
+    for line_id, quantity_decimal in quantities.items():
+        remaining = po_lines[line_id].remaining_quantity
+        if quantity_decimal > remaining:
+            raise ValueError(f"Cannot receive more than remaining quantity: {remaining}")
 
     receipt = GoodsReceipt.objects.create(
-        supplier=po_line.purchase_order.supplier,
-        purchase_order=po_line.purchase_order,
+        supplier_id=purchase_order.supplier_id,
+        purchase_order=purchase_order,
         warehouse_id=warehouse_id,
         received_by=received_by,
         notes=notes,
     )
-    receipt_line = GoodsReceiptLine.objects.create(
-        receipt=receipt,
-        purchase_order_line=po_line,
-        material=po_line.material,
-        material_color=po_line.material_color,
-        quantity=quantity_decimal,
-        unit=po_line.unit,
-        unit_cost=po_line.unit_price,
-        notes=notes,
+    receipt_lines = GoodsReceiptLine.objects.bulk_create(
+        [
+            GoodsReceiptLine(
+                receipt=receipt,
+                purchase_order_line=po_lines[line_id],
+                material_id=po_lines[line_id].material_id,
+                material_color_id=po_lines[line_id].material_color_id,
+                quantity=quantity_decimal,
+                unit=po_lines[line_id].unit,
+                unit_cost=po_lines[line_id].unit_price,
+                notes=line_notes[line_id],
+            )
+            for line_id, quantity_decimal in quantities.items()
+        ]
+    )
+    post_material_movements(
+        [
+            MaterialMovementEntry(
+                warehouse_id=warehouse_id,
+                material_id=receipt_line.material_id,
+                material_color_id=receipt_line.material_color_id,
+                unit=receipt_line.unit,
+                quantity_change=receipt_line.quantity,
+                unit_cost=receipt_line.unit_cost,
+                reason=MaterialStockMovement.Reason.PURCHASE_IN,
+                related_purchase_order_line=receipt_line.purchase_order_line,
+                related_receipt_line=receipt_line,
+                created_by=received_by,
+                notes=receipt_line.notes,
+            )
+            for receipt_line in receipt_lines
+        ]
     )
 
-    add_material_stock(
-        warehouse_id=warehouse_id,
-        material=po_line.material,
-        material_color=po_line.material_color,
-        quantity=quantity_decimal,
-        unit=po_line.unit,
-        reason=MaterialStockMovement.Reason.PURCHASE_IN,
-        related_purchase_order_line=po_line,
-        related_receipt_line=receipt_line,
-        created_by=received_by,
-        notes=notes,
+    now = timezone.now()
+    for line_id, quantity_decimal in quantities.items():
+        po_lines[line_id].received_quantity += quantity_decimal
+        po_lines[line_id].updated_at = now
+    PurchaseOrderLine.objects.bulk_update(
+        list(po_lines.values()), ["received_quantity", "updated_at"]
     )
 
-    po_line.received_quantity += quantity_decimal
-    po_line.save(update_fields=["received_quantity", "updated_at"])
+    _update_purchase_order_status(purchase_order)
+    return receipt
+
 
-    _update_purchase_order_status(po_line.purchase_order)
-    return receipt_line
+def receive_purchase_order_line(
+    *,
+    purchase_order_line: PurchaseOrderLine,
+    quantity: Decimal,
+    warehouse_id: int,
+    received_by: "AbstractBaseUser | None" = None,
+    notes: str = "",
+) -> GoodsReceiptLine:
+    """Receive one line as its own goods receipt; see receive_purchase_order."""
+    receipt = receive_purchase_order(
+        purchase_order=purchase_order_line.purchase_order,
+        lines=[PurchaseReceiptEntry(purchase_order_line.pk, quantity)],
+        warehouse_id=warehouse_id,
+        received_by=received_by,
+        notes=notes,
+    )
+    return receipt.lines.get()
 
 
 def _update_purchase_order_status(purchase_order: PurchaseOrder) -> None:
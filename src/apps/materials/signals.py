@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.catalog.models import BundleComponent, Product
+from apps.materials.models import BOM, ProductMaterialNorm
+from apps.materials.norms import products_using, rebuild_product_material_norms
+
+
+@receiver(post_save, sender=BOM)
+@receiver(post_delete, sender=BOM)
+def rebuild_norms_for_bom(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rebuild_product_material_norms(products_using(instance.product_id))
+
+
+@receiver(post_save, sender=BundleComponent)
+@receiver(post_delete, sender=BundleComponent)
+def rebuild_norms_for_bundle(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rebuild_product_material_norms([instance.bundle_id])
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_is_bundle(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_is_bundle = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and "is_bundle" not in update_fields:
+        return
+    instance._previous_is_bundle = (
+        Product.objects.filter(pk=instance.pk).values_list("is_bundle", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Product)
+def rebuild_norms_for_product(sender, instance, created, raw=False, **kwargs):
+    # A new product has no BOM yet; only a switch of is_bundle changes existing norms, for the
+    # product and for every bundle that holds it.
+    previous = getattr(instance, "_previous_is_bundle", None)
+    if created or raw or previous is None or previous == instance.is_bundle:
+        return
+    rebuild_product_material_norms(products_using(instance.pk))
+
+
+@receiver(post_delete, sender=Product)
+def drop_norms_for_product(sender, instance, **kwargs):
+    ProductMaterialNorm.objects.filter(product_id=instance.pk).delete()
@@ -0,0 +1,144 @@
+"""Tests for weighted average material costs and product material cost."""
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from apps.catalog.models import Product
+from apps.catalog.tests.conftest import ProductFactory
+from apps.materials.costing import ZERO, blend_average_cost
+from apps.materials.models import (
+    BOM,
+    Material,
+    MaterialStock,
+    MaterialStockMovement,
+    MaterialStockTransfer,
+    PurchaseOrder,
+    PurchaseOrderLine,
+    Supplier,
+)
+from apps.materials.services import (
+    MaterialTransferLine,
+    receive_material_stock_transfer,
+    receive_purchase_order_line,
+    remove_material_stock,
+    transfer_material_stock,
+    transfer_material_stock_lines,
+)
+from apps.warehouses.models import Warehouse
+from apps.warehouses.services import get_default_warehouse
+
+
+@pytest.fixture
+def felt_history():
+    """10 m of felt at 10.00 and 5 m at 16.00 received, 3 m issued to production."""
+    felt = Material.objects.create(name="Фетр")
+    product = ProductFactory(is_bundle=False)
+    BOM.objects.create(
+        product=product, material=felt, quantity_per_unit="0.500", unit=BOM.Unit.METER
+    )
+    purchase_order = PurchaseOrder.objects.create(
+        supplier=Supplier.objects.create(name="Фабрика"), status=PurchaseOrder.Status.SENT
+    )
+    warehouse = get_default_warehouse()
+    for quantity, price in (("10.000", "10.00"), ("5.000", "16.00")):
+        line = PurchaseOrderLine.objects.create(
+            purchase_order=purchase_order,
+            material=felt,
+            quantity=Decimal(quantity),
+            unit=BOM.Unit.METER,
+            unit_price=Decimal(price),
+        )
+        receive_purchase_order_line(
+            purchase_order_line=line, quantity=Decimal(quantity), warehouse_id=warehouse.id
+        )
+    remove_material_stock(
+        warehouse_id=warehouse.id,
+        material=felt,
+        quantity=Decimal("3.000"),
+        unit=BOM.Unit.METER,
+        reason=MaterialStockMovement.Reason.PRODUCTION_OUT,
+    )
+    return felt, product
+
+
+@pytest.mark.django_db
+def test_receipts_blend_average_cost_and_issues_carry_it(felt_history):
+    felt, product = felt_history
+    record = MaterialStock.objects.get(material=felt)
+    assert (record.quantity, record.average_unit_cost) == (Decimal("12.000"), Decimal("12.0000"))
+    issue = MaterialStockMovement.objects.get(reason=MaterialStockMovement.Reason.PRODUCTION_OUT)
+    assert issue.unit_cost == Decimal("12.0000")
+    product.refresh_from_db()
+    assert product.material_cost == Decimal("6.00")
+
+    shop = Warehouse.objects.create(
+        name="Цех 2",
+        code="WS2",
+        kind=Warehouse.Kind.STORAGE,
+        is_default_for_production=False,
+        is_active=True,
+    )
+    transfer_material_stock(
+        from_warehouse_id=record.warehouse_id,
+        to_warehouse_id=shop.id,
+        material=felt,
+        quantity=Decimal("2.000"),
+        unit=BOM.Unit.METER,
+    )
+    assert MaterialStock.objects.get(warehouse=shop).average_unit_cost == Decimal("12.0000")
+
+
+@pytest.mark.django_db
+def test_in_transit_material_transfer_carries_source_cost_on_receive(felt_history):
+    felt, _ = felt_history
+    source = MaterialStock.objects.get(material=felt).warehouse
+    shop = Warehouse.objects.create(
+        name="Цех 3",
+        code="WS3",
+        kind=Warehouse.Kind.STORAGE,
+        is_default_for_production=False,
+        is_active=True,
+    )
+
+    transfer = transfer_material_stock_lines(
+        from_warehouse_id=source.id,
+        to_warehouse_id=shop.id,
+        lines=[MaterialTransferLine(felt.id, Decimal("4.000"), BOM.Unit.METER)],
+        in_transit=True,
+    )
+    assert transfer.status == MaterialStockTransfer.Status.IN_TRANSIT
+    assert MaterialStock.objects.get(warehouse=source, material=felt).quantity == Decimal("8.000")
+    assert not MaterialStock.objects.filter(warehouse=shop).exists()
+
+    receive_material_stock_transfer(transfer=transfer)
+
+    transfer.refresh_from_db()
+    assert transfer.status == MaterialStockTransfer.Status.COMPLETED
+    received = MaterialStock.objects.get(warehouse=shop, material=felt)
+    assert (received.quantity, received.average_unit_cost) == (
+        Decimal("4.000"),
+        Decimal("12.0000"),
+    )
+
+
+@pytest.mark.django_db
+def test_recompute_material_costs_replays_the_ledger(felt_history):
+    felt, product = felt_history
+    MaterialStock.objects.update(average_unit_cost=None)
+    MaterialStockMovement.objects.update(unit_cost=None)
+    Product.objects.update(material_cost=None)
+
+    call_command("recompute_material_costs", batch_size=2)
+
+    assert MaterialStock.objects.get(material=felt).average_unit_cost == Decimal("12.0000")
+    costs = list(MaterialStockMovement.objects.order_by("id").values_list("unit_cost", flat=True))
+    assert costs == [Decimal("10.0000"), Decimal("16.0000"), Decimal("12.0000")]
+    assert Product.objects.get(pk=product.pk).material_cost == Decimal("6.00")
+
+
+def test_blend_average_cost_rounds_half_up_like_postgresql():
+    # (1 x 0.0001 + 1 x 0) / 2 = 0.00005: half-even would round down to 0.0000.
+    one, smallest_cost = Decimal("1"), Decimal("0.0001")
+    assert blend_average_cost(one, smallest_cost, one, ZERO) == smallest_cost
+    assert blend_average_cost(ZERO, None, one, Decimal("0.00005")) == smallest_cost
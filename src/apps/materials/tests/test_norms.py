@@ -0,0 +1,105 @@
+"""Tests for flattened material norms per product."""
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from apps.catalog.models import BundleComponent, Variant
+from apps.catalog.tests.conftest import ColorFactory, ProductFactory
+from apps.materials.models import BOM, Material, ProductMaterialNorm
+from apps.materials.norms import rebuild_product_material_norms
+from apps.materials.services import calculate_material_requirements_for_sales_order_line
+from apps.sales.models import SalesOrder, SalesOrderLine
+
+
+def _norms(product):
+    return dict(
+        ProductMaterialNorm.objects.filter(product=product).values_list(
+            "material__name", "quantity_per_unit"
+        )
+    )
+
+
+@pytest.fixture
+def bundle():
+    """Bundle of one clutch (0.25 felt) and two straps (1.00 felt, 0.50 leather each)."""
+    felt = Material.objects.create(name="Felt")
+    leather = Material.objects.create(name="Leather")
+    bundle = ProductFactory(name="Set", is_bundle=True)
+    clutch = ProductFactory(name="Clutch", is_bundle=False)
+    strap = ProductFactory(name="Strap", is_bundle=False)
+    BOM.objects.create(product=clutch, material=felt, quantity_per_unit="0.25", unit=BOM.Unit.METER)
+    BOM.objects.create(product=strap, material=felt, quantity_per_unit="1.00", unit=BOM.Unit.METER)
+    BundleComponent.objects.create(bundle=bundle, component=clutch, quantity=1, is_primary=True)
+    BundleComponent.objects.create(bundle=bundle, component=strap, quantity=2, is_primary=False)
+    BOM.objects.create(
+        product=strap, material=leather, quantity_per_unit="0.50", unit=BOM.Unit.METER
+    )
+    return bundle
+
+
+@pytest.mark.django_db
+def test_bom_and_component_changes_rebuild_flattened_norms(bundle):
+    assert _norms(bundle) == {"Felt": Decimal("2.250"), "Leather": Decimal("1.000")}
+
+    strap = BundleComponent.objects.get(bundle=bundle, component__name="Strap")
+    strap.quantity = 3
+    strap.save()
+    BOM.objects.filter(product__name="Clutch").get().delete()
+    assert _norms(bundle) == {"Felt": Decimal("3.000"), "Leather": Decimal("1.500")}
+
+    strap.component.delete()
+    assert _norms(bundle) == {}
+    assert not ProductMaterialNorm.objects.filter(product_id=strap.component_id).exists()
+
+
+@pytest.mark.django_db
+def test_is_bundle_switch_rebuilds_bundles_holding_the_product(bundle):
+    clutch = BundleComponent.objects.get(bundle=bundle, component__name="Clutch").component
+    with patch("apps.materials.signals.rebuild_product_material_norms") as rebuild:
+        clutch.name = "Clutch bag"
+        clutch.save()
+        clutch.save(update_fields=["name"])
+    rebuild.assert_not_called()
+
+    clutch.is_bundle = True
+    with patch(
+        "apps.materials.signals.rebuild_product_material_norms",
+        wraps=rebuild_product_material_norms,
+    ) as rebuild:
+        clutch.save(update_fields=["is_bundle"])
+
+    rebuild.assert_called_once_with({clutch.id, bundle.id})
+    assert _norms(clutch) == {}
+
+
+@pytest.mark.django_db
+def test_requirements_for_bundle_line_read_flattened_norms_in_one_query(
+    bundle, django_assert_num_queries
+):
+    line = SalesOrderLine.objects.create(
+        sales_order=SalesOrder.objects.create(
+            source=SalesOrder.Source.WHOLESALE, customer_info="ТОВ Опт"
+        ),
+        product=bundle,
+        variant=Variant.objects.create(product=bundle, color=ColorFactory()),
+        quantity=2,
+    )
+
+    with django_assert_num_queries(1):
+        requirements = calculate_material_requirements_for_sales_order_line(line=line)
+
+    assert [(item.material_name, item.quantity) for item in requirements] == [
+        ("Felt", Decimal("4.50")),
+        ("Leather", Decimal("2.00")),
+    ]
+
+
+@pytest.mark.django_db
+def test_rebuild_material_norms_command_restores_table(bundle):
+    ProductMaterialNorm.objects.all().delete()
+
+    call_command("rebuild_material_norms", batch_size=1)
+
+    assert _norms(bundle) == {"Felt": Decimal("2.250"), "Leather": Decimal("1.000")}
@@ -0,0 +1,134 @@
+"""Tests for material requirements planning across open demand."""
+from decimal import Decimal
+
+import pytest
+
+from apps.accounts.tests.conftest import UserFactory
+from apps.catalog.models import BundleComponent, Variant
+from apps.catalog.tests.conftest import ColorFactory, ProductFactory
+from apps.materials.models import (
+    BOM,
+    Material,
+    MaterialColor,
+    MaterialStockMovement,
+    PurchaseOrder,
+    PurchaseOrderLine,
+    Supplier,
+)
+from apps.materials.planning import plan_material_requirements
+from apps.materials.services import add_material_stock
+from apps.production.domain.status import STATUS_DONE
+from apps.production.models import ProductionOrder
+from apps.sales.models import SalesOrder, SalesOrderLine, SalesOrderLineComponentSelection
+from apps.warehouses.services import get_default_warehouse
+
+
+@pytest.fixture
+def catalog():
+    felt = Material.objects.create(name="Фетр MRP")
+    thread = Material.objects.create(name="Нитка MRP")
+    grey = MaterialColor.objects.create(material=felt, name="Сірий", code=1)
+    bag = ProductFactory(name="Сумка MRP", is_bundle=False, primary_material=felt)
+    strap = ProductFactory(name="Ремінь MRP", is_bundle=False)
+    BOM.objects.create(
+        product=bag, material=felt, quantity_per_unit="0.50", unit=BOM.Unit.SQUARE_METER
+    )
+    BOM.objects.create(product=bag, material=thread, quantity_per_unit="2", unit=BOM.Unit.METER)
+    BOM.objects.create(product=strap, material=thread, quantity_per_unit="1", unit=BOM.Unit.METER)
+    return {
+        "felt": felt,
+        "thread": thread,
+        "bag_grey": Variant.objects.create(product=bag, primary_material_color=grey),
+        "strap": Variant.objects.create(product=strap, color=ColorFactory()),
+        "grey": grey,
+    }
+
+
+def _sales_line(product, *, variant=None, quantity=1, status=SalesOrder.Status.NEW):
+    order = SalesOrder.objects.create(source=SalesOrder.Source.SITE, status=status)
+    return SalesOrderLine.objects.create(
+        sales_order=order, product=product, variant=variant, quantity=quantity
+    )
+
+
+@pytest.mark.django_db
+def test_plan_nets_open_demand_against_stock_and_purchases(catalog):
+    bag, strap = catalog["bag_grey"], catalog["strap"]
+    # Production orders: 2 open bags, 1 done bag (ignored).
+    for status in ("new", "in_progress", STATUS_DONE):
+        ProductionOrder.objects.create(product=bag.product, variant=bag, status=status)
+    # Sales: 3 bags without orders, 5 bags on a shipped order (ignored).
+    _sales_line(bag.product, variant=bag, quantity=3)
+    _sales_line(bag.product, variant=bag, quantity=5, status=SalesOrder.Status.SHIPPED)
+    # Bundle of bag + 2 straps, with selections, ordered twice.
+    bundle = ProductFactory(name="Набір MRP", is_bundle=True)
+    BundleComponent.objects.create(bundle=bundle, component=bag.product, quantity=1)
+    BundleComponent.objects.create(bundle=bundle, component=strap.product, quantity=2)
+    bundle_line = _sales_line(bundle, quantity=2)
+    for component in (bag, strap):
+        SalesOrderLineComponentSelection.objects.create(
+            order_line=bundle_line, component=component.product, variant=component
+        )
+
+    add_material_stock(
+        warehouse_id=get_default_warehouse().id,
+        material=catalog["felt"],
+        material_color=catalog["grey"],
+        quantity=Decimal("1.000"),
+        unit=BOM.Unit.SQUARE_METER,
+        reason=MaterialStockMovement.Reason.ADJUSTMENT_IN,
+    )
+    purchase_order = PurchaseOrder.objects.create(
+        supplier=Supplier.objects.create(name="Постачальник MRP"),
+        status=PurchaseOrder.Status.SENT,
+        created_by=UserFactory(),
+    )
+    PurchaseOrderLine.objects.create(
+        purchase_order=purchase_order,
+        material=catalog["thread"],
+        quantity=Decimal("20.000"),
+        received_quantity=Decimal("5.000"),
+        unit=BOM.Unit.METER,
+    )
+
+    plan = {
+        (row.material_name, row.color_name): row
+        for row in plan_material_requirements(only_shortages=False)
+    }
+
+    # Bags: 2 orders + 3 sales + 2 from bundles = 7 → felt 3.5 m², thread 14 m.
+    felt = plan[("Фетр MRP", "Сірий")]
+    assert (felt.required, felt.on_hand, felt.on_order) == (
+        Decimal("3.5"),
+        Decimal("1.000"),
+        Decimal("0"),
+    )
+    assert felt.shortage == Decimal("2.5")
+    assert felt.on_hand_by_warehouse == {get_default_warehouse().id: Decimal("1.000")}
+    # Straps: 2 bundles x 2 = 4 → thread 4 m; 18 m total against 15 m on order.
+    thread = plan[("Нитка MRP", "")]
+    assert (thread.required, thread.on_order, thread.shortage) == (
+        Decimal("18"),
+        Decimal("15.000"),
+        Decimal("3.000"),
+    )
+
+    assert [row.material_name for row in plan_material_requirements()] == [
+        "Нитка MRP",
+        "Фетр MRP",
+    ]
+
+
+@pytest.mark.django_db
+def test_plan_query_count_does_not_grow_with_open_lines(catalog, django_assert_num_queries):
+    for _ in range(40):
+        _sales_line(catalog["bag_grey"].product, variant=catalog["bag_grey"], quantity=2)
+        _sales_line(catalog["strap"].product, variant=catalog["strap"])
+
+    with django_assert_num_queries(9):
+        plan = plan_material_requirements(only_shortages=False)
+
+    assert {row.material_name: row.required for row in plan} == {
+        "Фетр MRP": Decimal("40"),
+        "Нитка MRP": Decimal("200"),
+    }
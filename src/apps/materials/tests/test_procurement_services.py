@@ -2,9 +2,13 @@
 from decimal import Decimal
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from apps.materials.models import MaterialStockMovement, MaterialStock
 from apps.materials.services import add_material_stock, remove_material_stock, receive_purchase_order_line
+from apps.materials.services import PurchaseReceiptEntry, receive_purchase_order
+from apps.materials.services import MaterialMovementEntry, post_material_movements
 from apps.materials.models import (
     Material,
     BOM,
@@ -107,3 +111,110 @@ def test_receive_purchase_order_line_updates_stock_and_po_status():
     assert purchase_order.status == PurchaseOrder.Status.PARTIALLY_RECEIVED
 
     assert Warehouse.objects.filter(code="MAIN").exists()
+
+
+def _purchase_order_with_lines(count):
+    purchase_order = PurchaseOrder.objects.create(
+        supplier=Supplier.objects.create(name=f"Supplier of {count}"),
+        status=PurchaseOrder.Status.SENT,
+    )
+    lines = [
+        PurchaseOrderLine.objects.create(
+            purchase_order=purchase_order,
+            material=Material.objects.create(name=f"Material {count}-{index}"),
+            quantity=Decimal("4.000"),
+            unit=BOM.Unit.METER,
+            unit_price=Decimal("2.50"),
+        )
+        for index in range(count)
+    ]
+    return purchase_order, lines
+
+
+@pytest.mark.django_db
+def test_receive_purchase_order_posts_all_lines_in_one_receipt():
+    purchase_order, lines = _purchase_order_with_lines(3)
+    warehouse = get_default_warehouse()
+
+    receipt = receive_purchase_order(
+        purchase_order=purchase_order,
+        lines=[
+            PurchaseReceiptEntry(lines[0].pk, Decimal("4.000")),
+            PurchaseReceiptEntry(lines[1].pk, Decimal("1.500"), notes="Брак 2.5 м"),
+        ],
+        warehouse_id=warehouse.id,
+    )
+
+    assert receipt.lines.count() == 2
+    assert receipt.lines.get(purchase_order_line=lines[1]).notes == "Брак 2.5 м"
+    assert dict(
+        MaterialStock.objects.filter(warehouse=warehouse).values_list("material_id", "quantity")
+    ) == {lines[0].material_id: Decimal("4.000"), lines[1].material_id: Decimal("1.500")}
+    assert MaterialStockMovement.objects.filter(related_receipt_line__receipt=receipt).count() == 2
+    purchase_order.refresh_from_db()
+    assert purchase_order.status == PurchaseOrder.Status.PARTIALLY_RECEIVED
+
+    with pytest.raises(ValueError, match="remaining quantity"):
+        receive_purchase_order(
+            purchase_order=purchase_order,
+            lines=[PurchaseReceiptEntry(lines[0].pk, Decimal("0.001"))],
+            warehouse_id=warehouse.id,
+        )
+
+
+@pytest.mark.django_db
+def test_receive_purchase_order_query_count_does_not_grow_with_lines():
+    warehouse = get_default_warehouse()
+
+    def receive(count):
+        purchase_order, lines = _purchase_order_with_lines(count)
+        with CaptureQueriesContext(connection) as queries:
+            receive_purchase_order(
+                purchase_order=purchase_order,
+                lines=[PurchaseReceiptEntry(line.pk, line.quantity) for line in lines],
+                warehouse_id=warehouse.id,
+            )
+        purchase_order.refresh_from_db()
+        assert purchase_order.status == PurchaseOrder.Status.RECEIVED
+        return len(queries)
+
+    assert receive(2) == receive(12)
+
+
+@pytest.mark.django_db
+def test_post_material_movements_locks_only_the_exact_stock_rows_in_id_order():
+    felt = Material.objects.create(name="Felt")
+    leather = Material.objects.create(name="Leather")
+    main = get_default_warehouse()
+    other = Warehouse.objects.create(name="Other", code="OTHER")
+    entries = [
+        MaterialMovementEntry(
+            warehouse_id=main.id,
+            material_id=felt.id,
+            unit=BOM.Unit.METER,
+            quantity_change=Decimal("1.000"),
+            reason=MaterialStockMovement.Reason.ADJUSTMENT_IN,
+        ),
+        MaterialMovementEntry(
+            warehouse_id=other.id,
+            material_id=leather.id,
+            unit=BOM.Unit.METER,
+            quantity_change=Decimal("2.000"),
+            reason=MaterialStockMovement.Reason.ADJUSTMENT_IN,
+        ),
+    ]
+
+    with CaptureQueriesContext(connection) as captured:
+        post_material_movements(entries)
+
+    table = MaterialStock._meta.db_table
+    lock_sql = next(
+        query["sql"]
+        for query in captured.captured_queries
+        if query["sql"].startswith("SELECT") and f'FROM "{table}"' in query["sql"]
+    )
+    # Exact keys, not the warehouse x material cross product (which would also lock
+    # other-warehouse felt), no join to Material, and a deterministic lock order.
+    assert " IN (" not in lock_sql
+    assert "JOIN" not in lock_sql
+    assert lock_sql.endswith(f'ORDER BY "{table}"."id" ASC')
@@ -0,0 +1,405 @@
+"""Synthetic data at production scale for benchmarks.
+
+Rows are bulk-inserted in batches and tagged so they can be removed again: catalog, material
+and supplier names start with "Bench", production orders and sales orders carry
+`BENCH_PREFIX` in their comment or customer info. Denormalized tables (stock balances,
+snapshots, flattened material norms) are brought in line with the inserted rows at the end.
+"""
+from __future__ import annotations
+
+import random
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from apps.catalog.models import BundleComponent, Color, Product, Variant
+from apps.inventory.models import ProductStock, ProductStockMovement, StockKind, StockSnapshot
+from apps.inventory.snapshots import refresh_stock_snapshots
+from apps.materials.models import (
+    BOM,
+    Material,
+    ProductMaterialNorm,
+    PurchaseOrder,
+    PurchaseOrderLine,
+    Supplier,
+)
+from apps.materials.norms import rebuild_product_material_norms
+from apps.production.board import bump_board_version
+from apps.production.domain.search import build_search_text
+from apps.production.domain.status import (
+    STATUS_BLOCKED,
+    STATUS_DECIDING,
+    STATUS_DONE,
+    STATUS_EMBROIDERY,
+    STATUS_IN_PROGRESS,
+    STATUS_NEW,
+)
+from apps.production.models import ProductionOrder, ProductionOrderStatusHistory
+from apps.sales.models import SalesOrder, SalesOrderLine, SalesOrderLineComponentSelection
+from apps.warehouses.services import get_default_warehouse_id
+
+BENCH_PREFIX = "[bench]"
+# Orders seeded by `benchmark_order_search`, kept apart so the two seeders never count each other's.
+SEARCH_BENCH_PREFIX = "[search-bench]"
+BENCH_USERNAME = "bench"
+BENCH_COLORS = ("navy", "black", "sand", "olive", "wine", "grey")
+COMMENT_WORDS = ("подарунок", "терміново", "без коробки", "етикетка", "вишивка", "gift", "wholesale")
+# Status path of an order; history gets one row per step up to the order's status.
+STATUS_PATH = (STATUS_NEW, STATUS_IN_PROGRESS, STATUS_EMBROIDERY, STATUS_DONE)
+ACTIVE_STATUSES = (STATUS_NEW, STATUS_IN_PROGRESS, STATUS_EMBROIDERY, STATUS_DECIDING, STATUS_BLOCKED)
+DONE_SHARE = 0.8
+
+
+@dataclass(frozen=True)
+class BenchmarkVolumes:
+    production_orders: int = 100_000
+    sales_orders: int = 20_000
+    stock_movements: int = 1_000_000
+    purchase_orders: int = 2_000
+    products: int = 40
+    bundles: int = 5
+    materials: int = 30
+
+
+def bench_variants(products: int = 40) -> list[Variant]:
+    """Plain variants of the "Bench model N" products in every bench color."""
+    product_rows = [
+        Product.objects.get_or_create(name=f"Bench model {i}", defaults={"is_bundle": False})[0]
+        for i in range(products)
+    ]
+    colors = [
+        Color.objects.get_or_create(name=f"Bench {name}", defaults={"code": 900_000 + i})[0]
+        for i, name in enumerate(BENCH_COLORS)
+    ]
+    variants = []
+    for product in product_rows:
+        for color in colors:
+            variant, _ = Variant.objects.get_or_create(
+                product=product,
+                color=color,
+                primary_material_color=None,
+                secondary_material_color=None,
+            )
+            variant.product, variant.color = product, color
+            variants.append(variant)
+    return variants
+
+
+def bench_user():
+    user, _ = get_user_model().objects.get_or_create(username=BENCH_USERNAME)
+    return user
+
+
+def benchmark_data_counts() -> dict[str, int]:
+    return {
+        "production_orders": ProductionOrder.objects.filter(
+            comment__startswith=BENCH_PREFIX
+        ).count(),
+        "sales_orders": SalesOrder.objects.filter(customer_info__startswith=BENCH_PREFIX).count(),
+        "stock_movements": ProductStockMovement.objects.filter(
+            stock_record__variant__product__name__startswith="Bench model "
+        ).count(),
+        "purchase_orders": PurchaseOrder.objects.filter(
+            supplier__name__startswith="Bench"
+        ).count(),
+    }
+
+
+def seed_benchmark_data(
+    volumes: BenchmarkVolumes,
+    *,
+    batch_size: int = 5_000,
+    seed: int = 42,
+    log: Callable[[str], None] = lambda message: None,
+) -> dict[str, int]:
+    """Top the bench data up to `volumes`; returns rows created per kind.
+
+    Re-running only inserts what is missing, so an interrupted seed can be resumed.
+    """
+    rng = random.Random(seed)
+    variants = bench_variants(volumes.products)
+    bundles = _bench_bundles(variants, volumes.bundles)
+    _bench_materials(variants, volumes.materials)
+    # BOM rows are inserted in bulk, so their signals did not run: rebuild the norms once.
+    rebuild_product_material_norms(
+        {variant.product_id for variant in variants} | {bundle.id for bundle, _ in bundles}
+    )
+    existing = benchmark_data_counts()
+
+    created = {
+        "production_orders": _seed_production_orders(
+            rng, variants, volumes.production_orders - existing["production_orders"], batch_size, log
+        ),
+        "sales_orders": _seed_sales_orders(
+            rng, variants, bundles, volumes.sales_orders - existing["sales_orders"], batch_size, log
+        ),
+        "stock_movements": _seed_stock_movements(
+            rng, variants, volumes.stock_movements - existing["stock_movements"], batch_size, log
+        ),
+        "purchase_orders": _seed_purchase_orders(
+            rng, volumes.purchase_orders - existing["purchase_orders"], batch_size, log
+        ),
+    }
+    return created
+
+
+def clear_benchmark_data() -> dict[str, int]:
+    """Delete everything `seed_benchmark_data` and the benchmark runs created."""
+    deleted = {}
+    with transaction.atomic():
+        bench_products = Product.objects.filter(name__startswith="Bench ")
+        deleted["sales_orders"] = SalesOrder.objects.filter(
+            customer_info__startswith=BENCH_PREFIX
+        ).delete()[0]
+        deleted["production_orders"] = ProductionOrder.objects.filter(
+            product__in=bench_products
+        ).delete()[0]
+        deleted["stock_records"] = ProductStock.objects.filter(
+            variant__product__in=bench_products
+        ).delete()[0]
+        StockSnapshot.objects.filter(variant__product__in=bench_products).delete()
+        deleted["purchase_orders"] = PurchaseOrder.objects.filter(
+            supplier__name__startswith="Bench"
+        ).delete()[0]
+        Supplier.objects.filter(name__startswith="Bench").delete()
+        ProductMaterialNorm.objects.filter(product__in=bench_products).delete()
+        BOM.objects.filter(product__in=bench_products).delete()
+        BundleComponent.objects.filter(bundle__in=bench_products).delete()
+        Material.objects.filter(name__startswith="Bench ").delete()
+        Variant.objects.filter(product__in=bench_products).delete()
+        bench_products.delete()
+        Color.objects.filter(name__startswith="Bench ").delete()
+    return deleted
+
+
+def _bench_bundles(variants: list[Variant], count: int) -> list[tuple[Product, list[Product]]]:
+    components = list({variant.product_id: variant.product for variant in variants}.values())
+    bundles = []
+    for i in range(count):
+        bundle, _ = Product.objects.get_or_create(
+            name=f"Bench set {i}", defaults={"is_bundle": True}
+        )
+        parts = [components[(2 * i) % len(components)], components[(2 * i + 1) % len(components)]]
+        for part in parts:
+            BundleComponent.objects.get_or_create(bundle=bundle, component=part)
+        bundles.append((bundle, parts))
+    return bundles
+
+
+def _bench_materials(variants: list[Variant], count: int) -> None:
+    materials = [
+        Material.objects.get_or_create(name=f"Bench material {i}")[0] for i in range(count)
+    ]
+    Supplier.objects.get_or_create(name="Bench supplier")
+    product_ids = sorted({variant.product_id for variant in variants})
+    BOM.objects.bulk_create(
+        [
+            BOM(
+                product_id=product_id,
+                material=materials[(index + offset) % count],
+                quantity_per_unit=Decimal("0.350") * (offset + 1),
+                unit=BOM.Unit.METER,
+            )
+            for index, product_id in enumerate(product_ids)
+            for offset in range(2)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _batches(total: int, batch_size: int):
+    done = 0
+    while done < total:
+        size = min(batch_size, total - done)
+        yield size
+        done += size
+
+
+def _seed_production_orders(rng, variants, missing, batch_size, log) -> int:
+    if missing <= 0:
+        return 0
+    user = bench_user()
+    now = timezone.now()
+    created = 0
+    for size in _batches(missing, batch_size):
+        orders = []
+        for _ in range(size):
+            variant = rng.choice(variants)
+            done = rng.random() < DONE_SHARE
+            comment = f"{BENCH_PREFIX} {rng.choice(COMMENT_WORDS)}"
+            orders.append(
+                ProductionOrder(
+                    product_id=variant.product_id,
+                    variant=variant,
+                    status=STATUS_DONE if done else rng.choice(ACTIVE_STATUSES),
+                    finished_at=now - timedelta(minutes=rng.randint(0, 500_000)) if done else None,
+                    is_urgent=rng.random() < 0.05,
+                    is_etsy=rng.random() < 0.2,
+                    comment=comment,
+                    search_text=build_search_text([variant.product.name, variant.color.name, comment]),
+                )
+            )
+        with transaction.atomic():
+            ProductionOrder.objects.bulk_create(orders)
+            ProductionOrderStatusHistory.objects.bulk_create(
+                [
+                    ProductionOrderStatusHistory(order=order, new_status=status, changed_by=user)
+                    for order in orders
+                    for status in _history_path(order.status)
+                ],
+                batch_size=batch_size,
+            )
+        created += size
+        log(f"production orders: {created}/{missing}")
+    bump_board_version()
+    return created
+
+
+def _history_path(status: str) -> tuple[str, ...]:
+    if status in STATUS_PATH:
+        return STATUS_PATH[: STATUS_PATH.index(status) + 1]
+    return (STATUS_NEW, STATUS_IN_PROGRESS, status)
+
+
+def _seed_sales_orders(rng, variants, bundles, missing, batch_size, log) -> int:
+    if missing <= 0:
+        return 0
+    by_product: dict[int, list[Variant]] = {}
+    for variant in variants:
+        by_product.setdefault(variant.product_id, []).append(variant)
+    statuses = list(SalesOrder.Status.values)
+    sources = list(SalesOrder.Source.values)
+    created = 0
+    # Lines come to 1-3 per order; the order batch is sized so lines stay near batch_size.
+    for size in _batches(missing, max(batch_size // 2, 1)):
+        orders = [
+            SalesOrder(
+                source=rng.choice(sources),
+                status=rng.choice(statuses),
+                customer_info=f"{BENCH_PREFIX} клієнт {rng.randint(1, 50_000)}",
+            )
+            for _ in range(size)
+        ]
+        lines: list[SalesOrderLine] = []
+        selections: list[tuple[SalesOrderLine, Product, Variant]] = []
+        for order in orders:
+            order.total_lines = rng.randint(1, 3)
+            for _ in range(order.total_lines):
+                if bundles and rng.random() < 0.2:
+                    bundle, parts = rng.choice(bundles)
+                    line = SalesOrderLine(sales_order=order, product=bundle, quantity=1)
+                    selections.extend(
+                        (line, part, rng.choice(by_product[part.id])) for part in parts
+                    )
+                else:
+                    variant = rng.choice(variants)
+                    line = SalesOrderLine(
+                        sales_order=order,
+                        product_id=variant.product_id,
+                        variant=variant,
+                        quantity=rng.randint(1, 4),
+                    )
+                lines.append(line)
+            if order.status == SalesOrder.Status.COMPLETED:
+                order.done_lines = order.total_lines
+        with transaction.atomic():
+            SalesOrder.objects.bulk_create(orders)
+            SalesOrderLine.objects.bulk_create(lines, batch_size=batch_size)
+            SalesOrderLineComponentSelection.objects.bulk_create(
+                [
+                    SalesOrderLineComponentSelection(order_line=line, component=part, variant=variant)
+                    for line, part, variant in selections
+                ],
+                batch_size=batch_size,
+            )
+        created += size
+        log(f"sales orders: {created}/{missing}")
+    return created
+
+
+def _seed_stock_movements(rng, variants, missing, batch_size, log) -> int:
+    if missing <= 0:
+        return 0
+    warehouse_id = get_default_warehouse_id()
+    ProductStock.objects.bulk_create(
+        [ProductStock(warehouse_id=warehouse_id, variant=variant) for variant in variants],
+        ignore_conflicts=True,
+    )
+    records = list(
+        ProductStock.objects.filter(warehouse_id=warehouse_id, variant__in=variants).order_by("id")
+    )
+    balances = {record.id: record.quantity for record in records}
+    created = 0
+    for size in _batches(missing, batch_size):
+        movements = []
+        for _ in range(size):
+            record = rng.choice(records)
+            # Shipments only take what the ledger has, so balances never go negative.
+            if balances[record.id] and rng.random() < 0.45:
+                change = -rng.randint(1, min(balances[record.id], 3))
+                reason = ProductStockMovement.Reason.ORDER_OUT
+            else:
+                change = rng.randint(1, 5)
+                reason = ProductStockMovement.Reason.PRODUCTION_IN
+            balances[record.id] += change
+            movements.append(
+                ProductStockMovement(stock_record=record, quantity_change=change, reason=reason)
+            )
+        with transaction.atomic():
+            ProductStockMovement.objects.bulk_create(movements)
+        created += size
+        log(f"stock movements: {created}/{missing}")
+
+    for record in records:
+        record.quantity = balances[record.id]
+    with transaction.atomic():
+        ProductStock.objects.bulk_update(records, ["quantity"], batch_size=batch_size)
+        refresh_stock_snapshots(StockKind.FINISHED, list(balances))
+    return created
+
+
+def _seed_purchase_orders(rng, missing, batch_size, log) -> int:
+    if missing <= 0:
+        return 0
+    supplier = Supplier.objects.get(name="Bench supplier")
+    materials = list(Material.objects.filter(name__startswith="Bench material "))
+    statuses = (
+        PurchaseOrder.Status.SENT,
+        PurchaseOrder.Status.PARTIALLY_RECEIVED,
+        PurchaseOrder.Status.RECEIVED,
+    )
+    created = 0
+    for size in _batches(missing, max(batch_size // 4, 1)):
+        orders = [
+            PurchaseOrder(
+                supplier=supplier, status=rng.choice(statuses), notes=BENCH_PREFIX
+            )
+            for _ in range(size)
+        ]
+        with transaction.atomic():
+            PurchaseOrder.objects.bulk_create(orders)
+            PurchaseOrderLine.objects.bulk_create(
+                [
+                    PurchaseOrderLine(
+                        purchase_order=order,
+                        material=material,
+                        quantity=Decimal(rng.randint(5, 200)),
+                        received_quantity=Decimal(
+                            0 if order.status == PurchaseOrder.Status.SENT else rng.randint(0, 5)
+                        ),
+                        unit=BOM.Unit.METER,
+                        unit_price=Decimal(rng.randint(50, 900)),
+                    )
+                    for order in orders
+                    for material in rng.sample(materials, k=min(len(materials), rng.randint(1, 4)))
+                ],
+                batch_size=batch_size,
+            )
+        created += size
+        log(f"purchase orders: {created}/{missing}")
+    return created
@@ -0,0 +1,234 @@
+"""Timed runs of the hot service paths and pages over the bench data.
+
+Every iteration runs in a transaction that is rolled back, so runs leave the data set as
+`seed_benchmark_data` made it and results stay comparable between commits. Untimed setup
+(an order to act on, a purchase order to receive) happens inside the same transaction.
+"""
+from __future__ import annotations
+
+import math
+import statistics
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.catalog.models import Variant
+from apps.materials.models import BOM, Material, PurchaseOrder, PurchaseOrderLine, Supplier
+from apps.materials.services import receive_purchase_order_line
+from apps.production.benchdata import BENCH_PREFIX, bench_user
+from apps.production.domain.status import STATUS_DONE, STATUS_NEW
+from apps.production.models import ProductionOrder
+from apps.production.services import change_production_order_status
+from apps.sales.models import SalesOrder
+from apps.sales.services import create_production_orders_for_sales_order, create_sales_order
+from apps.warehouses.services import get_default_warehouse_id
+
+AUTH_BACKEND = "django.contrib.auth.backends.ModelBackend"
+STATUS_BATCH = 20
+
+
+@dataclass
+class BenchmarkContext:
+    user: object
+    warehouse_id: int
+    variant_ids: list[int]
+    client: Client
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    name: str
+    runs: int
+    median_ms: float
+    p95_ms: float
+    min_ms: float
+    queries: int
+
+    def as_dict(self) -> dict[str, object]:
+        return asdict(self)
+
+
+# A scenario prepares its untimed state and returns the callable to time.
+Scenario = Callable[[BenchmarkContext], Callable[[], object]]
+SCENARIOS: dict[str, Scenario] = {}
+
+
+def scenario(name: str) -> Callable[[Scenario], Scenario]:
+    def register(prepare: Scenario) -> Scenario:
+        SCENARIOS[name] = prepare
+        return prepare
+
+    return register
+
+
+def run_benchmarks(names: Iterable[str] | None = None, *, repeat: int = 5) -> list[ScenarioResult]:
+    """Time each scenario `repeat` times after one warm-up run."""
+    selected = list(names or SCENARIOS)
+    unknown = sorted(set(selected) - set(SCENARIOS))
+    if unknown:
+        raise ValueError(f"Unknown benchmark scenarios: {', '.join(unknown)}")
+
+    context = _context()
+    return [_measure(name, SCENARIOS[name], context, repeat) for name in selected]
+
+
+def compare_results(
+    current: dict[str, dict], baseline: dict[str, dict], *, max_ratio: float
+) -> list[str]:
+    """Scenarios whose median grew more than `max_ratio` times over the baseline."""
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not before or not before.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / before["median_ms"]
+        if ratio > max_ratio:
+            regressions.append(
+                f"{name}: {before['median_ms']:.1f} -> {result['median_ms']:.1f} ms (x{ratio:.2f})"
+            )
+    return regressions
+
+
+def _context() -> BenchmarkContext:
+    variant_ids = list(
+        Variant.objects.filter(product__name__startswith="Bench model ")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    if not variant_ids:
+        raise RuntimeError("No bench data: run seed_benchmark_data first.")
+    user = bench_user()
+    client = Client(HTTP_HOST=_host())
+    client.force_login(user, backend=AUTH_BACKEND)
+    return BenchmarkContext(
+        user=user,
+        warehouse_id=get_default_warehouse_id(),
+        variant_ids=variant_ids,
+        client=client,
+    )
+
+
+def _host() -> str:
+    return next(
+        (host for host in settings.ALLOWED_HOSTS if host != "*" and not host.startswith(".")),
+        "localhost",
+    )
+
+
+def _measure(name: str, prepare: Scenario, context: BenchmarkContext, repeat: int) -> ScenarioResult:
+    timings: list[float] = []
+    queries = 0
+    for run_index in range(repeat + 1):
+        with transaction.atomic():
+            run = prepare(context)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                run()
+                elapsed = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+        if run_index:  # the first run warms caches and is not reported
+            timings.append(elapsed)
+            queries = len(captured)
+    ordered = sorted(timings)
+    return ScenarioResult(
+        name=name,
+        runs=repeat,
+        median_ms=round(statistics.median(ordered), 3),
+        p95_ms=round(ordered[math.ceil(0.95 * len(ordered)) - 1], 3),
+        min_ms=round(ordered[0], 3),
+        queries=queries,
+    )
+
+
+def _lines_data(context: BenchmarkContext, count: int = 3) -> list[dict[str, object]]:
+    variants = Variant.objects.filter(id__in=context.variant_ids[:count]).values(
+        "id", "product_id"
+    )
+    return [
+        {"product_id": variant["product_id"], "variant_id": variant["id"], "quantity": 2}
+        for variant in variants
+    ]
+
+
+def _new_sales_order(context: BenchmarkContext) -> SalesOrder:
+    return create_sales_order(
+        source=SalesOrder.Source.WHOLESALE,
+        customer_info=f"{BENCH_PREFIX} benchmark",
+        lines_data=_lines_data(context),
+    )
+
+
+@scenario("create_sales_order")
+def _create_sales_order(context: BenchmarkContext):
+    return lambda: _new_sales_order(context)
+
+
+@scenario("create_production_orders_for_sales_order")
+def _create_production_orders(context: BenchmarkContext):
+    sales_order = _new_sales_order(context)
+    return lambda: create_production_orders_for_sales_order(
+        sales_order=sales_order, created_by=context.user
+    )
+
+
+@scenario("change_production_order_status")
+def _change_status(context: BenchmarkContext):
+    orders = list(
+        ProductionOrder.objects.filter(
+            status=STATUS_NEW, comment__startswith=BENCH_PREFIX
+        ).order_by("id")[:STATUS_BATCH]
+    )
+    return lambda: change_production_order_status(
+        production_orders=orders, new_status=STATUS_DONE, changed_by=context.user
+    )
+
+
+@scenario("receive_purchase_order_line")
+def _receive_purchase_order_line(context: BenchmarkContext):
+    purchase_order = PurchaseOrder.objects.create(
+        supplier=Supplier.objects.get(name="Bench supplier"),
+        status=PurchaseOrder.Status.SENT,
+        notes=BENCH_PREFIX,
+    )
+    line = PurchaseOrderLine.objects.create(
+        purchase_order=purchase_order,
+        material=Material.objects.filter(name__startswith="Bench material ").earliest("id"),
+        quantity=Decimal("40.000"),
+        unit=BOM.Unit.METER,
+        unit_price=Decimal("120.00"),
+    )
+    return lambda: receive_purchase_order_line(
+        purchase_order_line=line,
+        quantity=Decimal("25.000"),
+        warehouse_id=context.warehouse_id,
+        received_by=context.user,
+    )
+
+
+def _page(context: BenchmarkContext, url_name: str):
+    def render():
+        response = context.client.get(
+            reverse(url_name), secure=getattr(settings, "SECURE_SSL_REDIRECT", False)
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"{url_name} returned {response.status_code}")
+        return response
+
+    return render
+
+
+@scenario("orders_active")
+def _orders_active(context: BenchmarkContext):
+    return _page(context, "orders_active")
+
+
+@scenario("orders_completed")
+def _orders_completed(context: BenchmarkContext):
+    return _page(context, "orders_completed")
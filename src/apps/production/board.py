@@ -0,0 +1,40 @@
+"""Fragment cache versioning for the active orders board.
+
+The board fragments are cached under `OrderBoardVersion.version`. The counter lives in the
+database, not in the cache, because every instance has its own local-memory cache and they all
+have to agree on when the board changed. Bumps run after commit, so concurrent writers never
+hold the counter row lock inside their transactions.
+
+Order rows are cached separately, keyed by the order's and its catalog rows' `updated_at`.
+After any order write, only the changed rows are rendered again.
+"""
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import F
+
+from apps.production.models import OrderBoardVersion
+
+BOARD_VERSION_ID = 1
+
+
+def get_board_version() -> int:
+    version = (
+        OrderBoardVersion.objects.filter(pk=BOARD_VERSION_ID)
+        .values_list("version", flat=True)
+        .first()
+    )
+    return version or 0
+
+
+def bump_board_version() -> None:
+    updated = OrderBoardVersion.objects.filter(pk=BOARD_VERSION_ID).update(
+        version=F("version") + 1
+    )
+    if not updated:
+        OrderBoardVersion.objects.get_or_create(pk=BOARD_VERSION_ID, defaults={"version": 1})
+
+
+def bump_board_version_on_commit() -> None:
+    """Call from every write path that skips ProductionOrder signals (bulk create, update)."""
+    transaction.on_commit(bump_board_version)
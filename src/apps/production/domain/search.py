@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+
+def build_search_text(parts: Iterable[str | None]) -> str:
+    """Lowercased, whitespace-normalized search document for one production order."""
+    return " ".join(" ".join(part.split()) for part in parts if part).lower()
+
+
+def split_search_terms(query: str) -> list[str]:
+    return [term for term in query.lower().split() if term]
@@ -5,6 +5,7 @@ from typing import Any
 from typing import Literal
 
 from django.db import transaction
+from django.utils import timezone
 
 from apps.production.legacy_import_mappings import (
     LEGACY_FINISHED_MOVEMENT_REASON_TO_V2,
@@ -285,13 +286,15 @@ def _build_verify_checks(
 def _apply_status_and_reason_mappings() -> dict[str, int]:
     from apps.inventory.models import ProductStockMovement
     from apps.materials.models import MaterialStockMovement as MaterialStockMovement
+    from apps.production.board import bump_board_version_on_commit
     from apps.production.models import ProductionOrder, ProductionOrderStatusHistory
 
-    return {
+    updated = {
         "order_statuses": _apply_mapping_updates(
             model=ProductionOrder,
             field="status",
             mapping=LEGACY_ORDER_STATUS_TO_V2,
+            touch_updated_at=True,
         ),
         "order_status_history": _apply_mapping_updates(
             model=ProductionOrderStatusHistory,
@@ -309,6 +312,10 @@ def _apply_status_and_reason_mappings() -> dict[str, int]:
             mapping=LEGACY_MATERIAL_MOVEMENT_REASON_TO_V2,
         ),
     }
+    if updated["order_statuses"]:
+        # `.update()` skips the order signals, so the cached board and rows need a nudge.
+        bump_board_version_on_commit()
+    return updated
 
 
 def _apply_mapping_updates(
@@ -316,12 +323,16 @@ def _apply_mapping_updates(
     model: type[Any],
     field: str,
     mapping: dict[str, str],
+    touch_updated_at: bool = False,
 ) -> int:
+    extra = {"updated_at": timezone.now()} if touch_updated_at else {}
     updated_count = 0
     for legacy_value, mapped_value in mapping.items():
         if legacy_value == mapped_value:
             continue
-        updated_count += model.objects.filter(**{field: legacy_value}).update(**{field: mapped_value})
+        updated_count += model.objects.filter(**{field: legacy_value}).update(
+            **{field: mapped_value}, **extra
+        )
     return updated_count
 
 
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.production.benchdata import COMMENT_WORDS, SEARCH_BENCH_PREFIX, bench_variants
+from apps.production.domain.search import build_search_text
+from apps.production.domain.status import STATUS_DONE
+from apps.production.models import ProductionOrder
+from apps.production.search import search_orders
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic completed orders and compare legacy icontains search with search_text."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=500_000)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--query",
+            action="append",
+            dest="queries",
+            help="Search query to time (repeatable). Defaults to a few typical queries.",
+        )
+        parser.add_argument(
+            "--cleanup",
+            action="store_true",
+            help="Delete this benchmark's orders and exit; the shared catalog stays.",
+        )
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            self._cleanup()
+            return
+
+        self._seed(options["orders"], options["batch_size"])
+        queries = options["queries"] or ["navy", "bench model 7", "подарунок"]
+        done = ProductionOrder.objects.filter(status=STATUS_DONE)
+        for query in queries:
+            legacy = _median_ms(lambda: list(_legacy_search(done, query)[:20]), options["repeat"])
+            indexed_qs, is_ranked = search_orders(done, query)
+            ordering = ("-_search_rank", "-finished_at", "-id") if is_ranked else ("-finished_at", "-id")
+            indexed = _median_ms(
+                lambda: list(indexed_qs.order_by(*ordering)[:20]), options["repeat"]
+            )
+            self.stdout.write(
+                f"query={query!r} legacy_ms={legacy:.1f} search_text_ms={indexed:.1f} "
+                f"ranked={is_ranked}"
+            )
+            if connection.vendor == "postgresql":
+                plan = indexed_qs.order_by(*ordering)[:20].explain()
+                self.stdout.write("  " + plan.splitlines()[0])
+
+    def _seed(self, target: int, batch_size: int) -> None:
+        existing = ProductionOrder.objects.filter(comment__startswith=SEARCH_BENCH_PREFIX).count()
+        missing = target - existing
+        if missing <= 0:
+            self.stdout.write(f"Seed: {existing} benchmark orders already present")
+            return
+
+        rng = random.Random(42)
+        variants = bench_variants()
+        now = timezone.now()
+        created = 0
+        while created < missing:
+            size = min(batch_size, missing - created)
+            orders = []
+            for _ in range(size):
+                variant = rng.choice(variants)
+                comment = f"{SEARCH_BENCH_PREFIX} {rng.choice(COMMENT_WORDS)}"
+                orders.append(
+                    ProductionOrder(
+                        product_id=variant.product_id,
+                        variant=variant,
+                        status=STATUS_DONE,
+                        finished_at=now - timezone.timedelta(minutes=rng.randint(0, 500_000)),
+                        comment=comment,
+                        search_text=build_search_text(
+                            [variant.product.name, variant.color.name, comment]
+                        ),
+                    )
+                )
+            with transaction.atomic():
+                ProductionOrder.objects.bulk_create(orders)
+            created += size
+            self.stdout.write(f"Seed: {existing + created}/{target}")
+
+    def _cleanup(self) -> None:
+        seeded = ProductionOrder.objects.filter(comment__startswith=SEARCH_BENCH_PREFIX)
+        deleted, _ = seeded.delete()
+        # The "Bench model" catalog is shared with seed_benchmark_data, which removes it.
+        self.stdout.write(f"Deleted benchmark orders: {deleted}")
+
+
+def _legacy_search(queryset, query: str):
+    """The pre-search_text filter, kept for comparison."""
+    filters = (
+        Q(product__name__icontains=query)
+        | Q(variant__color__name__icontains=query)
+        | Q(comment__icontains=query)
+    )
+    if query.isdigit():
+        filters |= Q(id=int(query))
+    return queryset.filter(filters).order_by("-finished_at", "-id")
+
+
+def _median_ms(run, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from django.core.management.base import BaseCommand
 from django.db.models import OuterRef, Subquery
+from django.utils import timezone
 
+from apps.production.board import bump_board_version
 from apps.production.domain.status import STATUS_DONE
 from apps.production.models import ProductionOrder, ProductionOrderStatusHistory
 
@@ -56,8 +58,12 @@ class Command(BaseCommand):
             if order.status != expected:
                 mismatches += 1
                 if fix:
-                    ProductionOrder.objects.filter(id=order.id).update(status=expected)
+                    ProductionOrder.objects.filter(id=order.id).update(
+                        status=expected, updated_at=timezone.now()
+                    )
                     fixed += 1
+        if fixed:
+            bump_board_version()
 
         self.stdout.write(f"Checked orders: {orders.count()}")
         self.stdout.write(f"Missing history: {missing_history}")
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.production.outbox import MAX_ATTEMPTS, dispatch_pending_notifications
+
+
+class Command(BaseCommand):
+    help = "Deliver queued Telegram notifications from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of draining it once.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls when the outbox is empty (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        chat_last_sent: dict[str, float] = {}
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        while True:
+            result = dispatch_pending_notifications(
+                batch_size=options["batch_size"],
+                max_attempts=options["max_attempts"],
+                chat_last_sent=chat_last_sent,
+            )
+            totals["sent"] += result.sent
+            totals["retried"] += result.retried
+            totals["failed"] += result.failed
+            if result.sent + result.retried + result.failed:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            f"sent={totals['sent']} retried={totals['retried']} failed={totals['failed']}"
+        )
@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.production.benchdata import benchmark_data_counts
+from apps.production.benchmarks import SCENARIOS, compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = "Time key service paths and pages over the bench data and write a JSON report."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario", action="append", choices=list(SCENARIOS), dest="scenarios"
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="Write the JSON report to this file too.")
+        parser.add_argument("--baseline", help="JSON report of an earlier run to compare with.")
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=1.25,
+            help="Fail when a median exceeds the baseline by this ratio (default: 1.25).",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1")
+        try:
+            results = run_benchmarks(options["scenarios"], repeat=options["repeat"])
+        except (RuntimeError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        report = {
+            "commit": _current_commit(),
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "repeat": options["repeat"],
+            "data": benchmark_data_counts(),
+            "scenarios": {result.name: result.as_dict() for result in results},
+        }
+        content = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                handle.write(content)
+        for result in results:
+            self.stdout.write(
+                f"{result.name}: median={result.median_ms:.1f}ms p95={result.p95_ms:.1f}ms "
+                f"queries={result.queries}"
+            )
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as handle:
+                baseline = json.load(handle)
+            regressions = compare_results(
+                report["scenarios"],
+                baseline.get("scenarios", {}),
+                max_ratio=options["max_regression"],
+            )
+            for line in regressions:
+                self.stderr.write(line)
+            if regressions:
+                raise CommandError(f"Regressions against baseline: {len(regressions)}")
+
+
+def _current_commit() -> str:
+    if os.environ.get("GIT_COMMIT"):
+        return os.environ["GIT_COMMIT"]
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
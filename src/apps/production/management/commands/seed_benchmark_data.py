@@ -0,0 +1,40 @@
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand
+
+from apps.production.benchdata import BenchmarkVolumes, clear_benchmark_data, seed_benchmark_data
+
+DEFAULTS = BenchmarkVolumes()
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate production-scale bench data (orders, sales, stock, purchases)."
+
+    def add_arguments(self, parser):
+        for field in fields(BenchmarkVolumes):
+            parser.add_argument(
+                f"--{field.name.replace('_', '-')}",
+                type=int,
+                default=getattr(DEFAULTS, field.name),
+                dest=field.name,
+            )
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--clear", action="store_true", help="Delete bench data and exit.")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted = clear_benchmark_data()
+            self.stdout.write(f"Deleted: {deleted}")
+            return
+
+        volumes = BenchmarkVolumes(
+            **{field.name: options[field.name] for field in fields(BenchmarkVolumes)}
+        )
+        created = seed_benchmark_data(
+            volumes,
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Created: {created}"))
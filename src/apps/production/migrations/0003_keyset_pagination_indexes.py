@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_price_retail_uah'),
+        ('production', '0002_notificationoutbox'),
+        ('sales', '0002_line_production_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productionorder',
+            name='prod_order_completed_idx',
+        ),
+        migrations.AddIndex(
+            model_name='productionorder',
+            index=models.Index(fields=['status', '-finished_at', '-id'], name='prod_order_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productionorder',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='prod_order_active_idx'),
+        ),
+    ]
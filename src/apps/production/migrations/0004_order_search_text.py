@@ -0,0 +1,71 @@
+from django.db import migrations, models
+
+from apps.production.domain.search import build_search_text
+
+TRGM_INDEX = "prod_order_search_trgm"
+
+
+def backfill_search_text(apps, schema_editor):
+    ProductionOrder = apps.get_model("production", "ProductionOrder")
+    orders = ProductionOrder.objects.select_related(
+        "product",
+        "variant__color",
+        "variant__primary_material_color__material",
+        "variant__secondary_material_color__material",
+    ).order_by("id")
+    last_id = 0
+    while True:
+        batch = list(orders.filter(id__gt=last_id)[:1000])
+        if not batch:
+            return
+        for order in batch:
+            variant = order.variant
+            parts = [order.product.name]
+            if variant is not None:
+                if variant.color_id:
+                    parts.append(variant.color.name)
+                for material_color in (
+                    variant.primary_material_color,
+                    variant.secondary_material_color,
+                ):
+                    if material_color is not None:
+                        parts.extend([material_color.material.name, material_color.name])
+            parts.append(order.comment)
+            order.search_text = build_search_text(parts)
+        ProductionOrder.objects.bulk_update(batch, ["search_text"])
+        last_id = batch[-1].id
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} "
+        "ON production_productionorder USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRGM_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_price_retail_uah'),
+        ('materials', '0001_initial'),
+        ('production', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productionorder',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:09
+
+from django.db import migrations, models
+
+
+def create_board_version(apps, schema_editor):
+    OrderBoardVersion = apps.get_model("production", "OrderBoardVersion")
+    OrderBoardVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0004_order_search_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderBoardVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(create_board_version, migrations.RunPython.noop),
+    ]
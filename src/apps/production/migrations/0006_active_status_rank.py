@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0005_order_board_cache'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productionorder',
+            name='prod_order_active_idx',
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='status_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(status='new', then=models.Value(0)), models.When(status='in_progress', then=models.Value(1)), models.When(status='embroidery', then=models.Value(2)), models.When(status='deciding', then=models.Value(3)), models.When(status='blocked', then=models.Value(4)), default=models.Value(999), output_field=models.PositiveSmallIntegerField()), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='productionorder',
+            index=models.Index(fields=['status_rank', '-created_at', '-id'], name='prod_order_active_idx'),
+        ),
+    ]
@@ -9,6 +9,7 @@ from django.utils import timezone
 from config import settings
 
 from apps.production.domain.order_statuses import (
+    ACTIVE_LIST_ORDER,
     STATUS_DONE,
     STATUS_NEW,
     get_allowed_transitions,
@@ -17,6 +18,16 @@ from apps.production.domain.order_statuses import (
 from apps.production.exceptions import InvalidStatusTransition
 
 STATUS_CHOICES = status_choices(include_legacy=True, include_terminal=True)
+# Position in the active orders list; statuses outside ACTIVE_LIST_ORDER sort last.
+UNRANKED_STATUS = 999
+STATUS_RANK = models.Case(
+    *[
+        models.When(status=code, then=models.Value(rank))
+        for rank, code in enumerate(ACTIVE_LIST_ORDER)
+    ],
+    default=models.Value(UNRANKED_STATUS),
+    output_field=models.PositiveSmallIntegerField(),
+)
 
 if TYPE_CHECKING:
     from apps.accounts.models import User
@@ -36,6 +47,8 @@ class ProductionOrder(models.Model):
     is_urgent = models.BooleanField(default=False)
     is_etsy = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Part of the order row fragment cache key; queryset updates must set it too.
+    updated_at = models.DateTimeField(auto_now=True)
     finished_at = models.DateTimeField(blank=True, null=True)
     status = models.CharField(
         max_length=20,
@@ -43,6 +56,13 @@ class ProductionOrder(models.Model):
         default=STATUS_NEW,
         db_index=True,
     )
+    # Stored by the database from status, so every write path (bulk_create, update) keeps it
+    # right; changing ACTIVE_LIST_ORDER needs a migration.
+    status_rank = models.GeneratedField(
+        expression=STATUS_RANK,
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=True,
+    )
     sales_order_line = models.ForeignKey(
         "sales.SalesOrderLine",
         on_delete=models.SET_NULL,
@@ -50,15 +70,35 @@ class ProductionOrder(models.Model):
         blank=True,
         related_name="production_orders",
     )
+    # Denormalized text for order search (product, colors, comment); see apps.production.search.
+    search_text = models.TextField(blank=True, default="", editable=False)
 
     class Meta:
         indexes = [
+            # Match the keyset orderings of the completed and active order lists.
             models.Index(
-                fields=["status", "-finished_at"],
+                fields=["status", "-finished_at", "-id"],
                 name="prod_order_completed_idx",
             ),
+            models.Index(
+                fields=["status_rank", "-created_at", "-id"],
+                name="prod_order_active_idx",
+            ),
         ]
 
+    def save(self, *args, **kwargs):
+        from apps.production.search import SEARCH_SOURCE_FIELDS, order_search_text
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # The row fragment cache is keyed by updated_at, so every write has to move it.
+            update_fields = kwargs["update_fields"] = {*update_fields, "updated_at"}
+        if update_fields is None or SEARCH_SOURCE_FIELDS & set(update_fields):
+            self.search_text = order_search_text(self)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "search_text"}
+        super().save(*args, **kwargs)
+
     def get_status(self) -> str:
         return self.status
 
@@ -113,6 +153,19 @@ class ProductionOrderStatusHistory(models.Model):
         return f"{self.order_id} -> {self.new_status} ({self.changed_at})"
 
 
+class OrderBoardVersion(models.Model):
+    """Single-row counter bumped on every write that changes the active orders board.
+
+    Part of the board's fragment cache key; see apps.production.board.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"board v{self.version}"
+
+
 class DelayedNotificationLog(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -133,3 +186,38 @@ class DelayedNotificationLog(models.Model):
                 name="orders_delayed_notification_user_order_uniq",
             )
         ]
+
+
+class NotificationOutbox(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Очікує"
+        SENT = "sent", "Надіслано"
+        FAILED = "failed", "Помилка"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="notification_outbox",
+    )
+    chat_id = models.CharField(max_length=50)
+    text = models.TextField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="prod_outbox_pending_idx",
+            ),
+        ]
+        ordering = ("id",)
+
+    def __str__(self) -> str:
+        return f"{self.chat_id}: {self.status} ({self.attempts})"
@@ -2,13 +2,16 @@
 from __future__ import annotations
 
 import logging
+from collections import Counter
 from datetime import datetime, time, timedelta
 from typing import TYPE_CHECKING
 
+from django.db.models import prefetch_related_objects
 from django.utils.timezone import localtime, now
 
 from apps.production.models import DelayedNotificationLog, ProductionOrder
-from apps.production.utils import generate_order_details, send_tg_message
+from apps.production.outbox import OutboxMessage, enqueue_telegram_messages
+from apps.production.utils import generate_order_details, send_tg_messages
 from apps.user_settings.models import NotificationSetting
 
 if TYPE_CHECKING:
@@ -18,6 +21,13 @@ logger = logging.getLogger(__name__)
 
 
 def send_order_created(*, order: "ProductionOrder", orders_url: str | None) -> None:
+    send_orders_created(orders=[order], orders_url=orders_url)
+
+
+def send_orders_created(*, orders: list["ProductionOrder"], orders_url: str | None) -> None:
+    """Queue one order-created message per user for a batch of new orders."""
+    if not orders:
+        return
     users_to_notify = NotificationSetting.objects.filter(
         notify_order_created=True,
         user__telegram_id__isnull=False,
@@ -27,61 +37,93 @@ def send_order_created(*, order: "ProductionOrder", orders_url: str | None) -> N
         logger.info("Order created notifications skipped: no users")
         return
 
-    order_details = generate_order_details(order)
-    message = f"+ {order_details}"
+    prefetch_related_objects(orders, "product", "variant__color")
+    message = _orders_created_message(orders)
     if orders_url:
         message += f"\n{orders_url}\n"
 
+    messages = []
     for setting in users_to_notify:
         if setting.notify_order_created_pause:
             current_hour = localtime(now()).hour
             if current_hour < 8 or current_hour >= 18:
                 logger.info(
-                    "Order created notification skipped (outside hours) user_id=%s order_id=%s",
+                    "Order created notification skipped (outside hours) user_id=%s orders=%s",
                     setting.user_id,
-                    order.id,
+                    len(orders),
                 )
                 continue
-        sent = send_tg_message(setting.user.telegram_id, message)
-        if sent:
-            logger.info(
-                "Order created notification sent user_id=%s order_id=%s",
-                setting.user_id,
-                order.id,
-            )
-        else:
-            logger.warning(
-                "Order created notification failed user_id=%s order_id=%s",
-                setting.user_id,
-                order.id,
+        messages.append(
+            OutboxMessage(
+                chat_id=setting.user.telegram_id,
+                text=message,
+                user_id=setting.user_id,
             )
+        )
+    enqueue_telegram_messages(messages)
+    logger.info(
+        "Order created notifications queued order_ids=%s users=%s",
+        [order.id for order in orders],
+        len(messages),
+    )
 
 
-def send_order_finished(*, order: "ProductionOrder") -> None:
-    users_to_notify = NotificationSetting.objects.filter(
-        notify_order_finished=True,
-    ).select_related("user")
+def _orders_created_message(orders: list["ProductionOrder"]) -> str:
+    if len(orders) == 1:
+        return f"+ {generate_order_details(orders[0])}"
+    counts = Counter(generate_order_details(order) for order in orders)
+    lines = [
+        f"+ {details} ×{count}" if count > 1 else f"+ {details}"
+        for details, count in counts.items()
+    ]
+    return f"Нових замовлень: {len(orders)}.\n" + "\n".join(lines)
 
-    for setting in users_to_notify:
-        user = setting.user
-        if user.telegram_id:
-            color_name = "-"
-            if order.variant and order.variant.color:
-                color_name = order.variant.color.name
-            message = f"Замовлення завершено: {order.product.name}, {color_name}."
-            sent = send_tg_message(user.telegram_id, message)
-            if sent:
-                logger.info(
-                    "Order finished notification sent user_id=%s order_id=%s",
-                    setting.user_id,
-                    order.id,
-                )
-            else:
-                logger.warning(
-                    "Order finished notification failed user_id=%s order_id=%s",
-                    setting.user_id,
-                    order.id,
-                )
+
+def send_orders_finished(*, orders: list["ProductionOrder"]) -> None:
+    """Queue one message per user for a batch of finished orders."""
+    if not orders:
+        return
+    users_to_notify = list(
+        NotificationSetting.objects.filter(
+            notify_order_finished=True,
+            user__telegram_id__isnull=False,
+        )
+        .exclude(user__telegram_id="")
+        .select_related("user")
+    )
+    if not users_to_notify:
+        return
+
+    prefetch_related_objects(orders, "product", "variant__color")
+    message = _orders_finished_message(orders)
+    enqueue_telegram_messages(
+        [
+            OutboxMessage(
+                chat_id=setting.user.telegram_id,
+                text=message,
+                user_id=setting.user_id,
+            )
+            for setting in users_to_notify
+        ]
+    )
+    logger.info(
+        "Order finished notifications queued orders=%s users=%s",
+        [order.id for order in orders],
+        len(users_to_notify),
+    )
+
+
+def _orders_finished_message(orders: list["ProductionOrder"]) -> str:
+    names = []
+    for order in orders:
+        color_name = "-"
+        if order.variant and order.variant.color:
+            color_name = order.variant.color.name
+        names.append(f"{order.product.name}, {color_name}")
+    if len(names) == 1:
+        return f"Замовлення завершено: {names[0]}."
+    lines = "\n".join(f"- {name}" for name in names)
+    return f"Замовлень завершено: {len(names)}.\n{lines}"
 
 
 def send_delayed_order_created_notifications() -> str:
@@ -124,13 +166,16 @@ def _orders_created_delayed(*, orders: list["ProductionOrder"]) -> bool:
         return False
 
     order_ids = [o.id for o in orders]
+    already_notified: dict[int, set[int]] = {}
+    for user_id, order_id in DelayedNotificationLog.objects.filter(
+        user_id__in=[setting.user_id for setting in users_to_notify],
+        order_id__in=order_ids,
+    ).values_list("user_id", "order_id"):
+        already_notified.setdefault(user_id, set()).add(order_id)
+
+    batches = []
     for setting in users_to_notify:
-        notified_order_ids = set(
-            DelayedNotificationLog.objects.filter(
-                user_id=setting.user_id,
-                order_id__in=order_ids,
-            ).values_list("order_id", flat=True)
-        )
+        notified_order_ids = already_notified.get(setting.user_id, set())
         pending_orders = [o for o in orders if o.id not in notified_order_ids]
         if not pending_orders:
             logger.info(
@@ -139,32 +184,31 @@ def _orders_created_delayed(*, orders: list["ProductionOrder"]) -> bool:
                 len(orders),
             )
             continue
+        message = "\n".join(f"+ {generate_order_details(order)}" for order in pending_orders)
+        batches.append((setting, pending_orders, message))
 
-        user_orders = []
-        for order in pending_orders:
-            order_details = generate_order_details(order)
-            user_orders.append(f"+ {order_details}")
-
-        if user_orders:
-            message = "\n".join(user_orders)
-            sent = send_tg_message(setting.user.telegram_id, message)
-            if sent:
-                DelayedNotificationLog.objects.bulk_create(
-                    [
-                        DelayedNotificationLog(user_id=setting.user_id, order_id=order.id)
-                        for order in pending_orders
-                    ],
-                    ignore_conflicts=True,
-                )
-                logger.info(
-                    "Delayed notifications sent user_id=%s orders=%s",
-                    setting.user_id,
-                    len(user_orders),
-                )
-            else:
-                logger.warning(
-                    "Delayed notifications failed user_id=%s orders=%s",
-                    setting.user_id,
-                    len(user_orders),
-                )
+    deliveries = send_tg_messages(
+        [(setting.user.telegram_id, message) for setting, _, message in batches]
+    )
+    for (setting, pending_orders, _), delivery in zip(batches, deliveries):
+        if delivery.ok:
+            DelayedNotificationLog.objects.bulk_create(
+                [
+                    DelayedNotificationLog(user_id=setting.user_id, order_id=order.id)
+                    for order in pending_orders
+                ],
+                ignore_conflicts=True,
+            )
+            logger.info(
+                "Delayed notifications sent user_id=%s orders=%s",
+                setting.user_id,
+                len(pending_orders),
+            )
+        else:
+            logger.warning(
+                "Delayed notifications failed user_id=%s orders=%s status=%s",
+                setting.user_id,
+                len(pending_orders),
+                delivery.status_code,
+            )
     return True
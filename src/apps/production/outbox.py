@@ -0,0 +1,166 @@
+"""Transactional outbox for Telegram notifications.
+
+Services enqueue messages in the same transaction as the change they report, and a
+background dispatcher delivers them, so request latency never depends on Telegram.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.production.models import NotificationOutbox
+from apps.production.utils import send_tg_messages
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+# Telegram accepts roughly one message per second for the same chat.
+PER_CHAT_INTERVAL_SECONDS = 1.0
+# A claimed row is skipped by other dispatchers this long; longer than one batch of sends.
+CLAIM_LEASE_SECONDS = 5 * 60
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    chat_id: str
+    text: str
+    user_id: int | None = None
+
+
+@dataclass
+class DispatchResult:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    deferred: int = 0
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.retried + self.failed + self.deferred
+
+
+def enqueue_telegram_messages(messages: list[OutboxMessage]) -> list[NotificationOutbox]:
+    if not messages:
+        return []
+    return NotificationOutbox.objects.bulk_create(
+        [
+            NotificationOutbox(
+                user_id=message.user_id,
+                chat_id=str(message.chat_id),
+                text=message.text,
+            )
+            for message in messages
+        ]
+    )
+
+
+def dispatch_pending_notifications(
+    *,
+    batch_size: int = 50,
+    max_attempts: int = MAX_ATTEMPTS,
+    chat_last_sent: dict[str, float] | None = None,
+) -> DispatchResult:
+    """Deliver one batch of due outbox rows.
+
+    Rows are claimed in a short transaction that moves their `next_attempt_at` past a lease,
+    so parallel dispatchers skip them while they are sent outside any transaction. Results
+    are written in a second short transaction. Delivery is at-least-once: rows of a crashed
+    dispatcher become due again when the lease runs out.
+    `chat_last_sent` carries per-chat send times across batches in worker mode.
+    """
+    if chat_last_sent is None:
+        chat_last_sent = {}
+    result = DispatchResult()
+    rows = _claim_due_rows(batch_size)
+
+    to_send = []
+    deferred = []
+    for row in rows:
+        wait = _seconds_until_chat_allowed(chat_last_sent, row.chat_id)
+        if wait > 0:
+            row.next_attempt_at = timezone.now() + timedelta(seconds=wait)
+            deferred.append(row)
+            result.deferred += 1
+            continue
+        chat_last_sent[row.chat_id] = time.monotonic()
+        to_send.append(row)
+
+    deliveries = send_tg_messages([(row.chat_id, row.text) for row in to_send])
+    for row, delivery in zip(to_send, deliveries):
+        row.attempts += 1
+        if delivery.ok:
+            row.status = NotificationOutbox.Status.SENT
+            row.sent_at = timezone.now()
+            row.last_error = ""
+            result.sent += 1
+        elif row.attempts >= max_attempts:
+            row.status = NotificationOutbox.Status.FAILED
+            row.last_error = _delivery_error(delivery)
+            result.failed += 1
+            logger.warning(
+                "Notification dropped after retries outbox_id=%s chat_id=%s attempts=%s",
+                row.id,
+                row.chat_id,
+                row.attempts,
+            )
+        else:
+            row.next_attempt_at = timezone.now() + timedelta(
+                seconds=_backoff_seconds(row.attempts)
+            )
+            row.last_error = _delivery_error(delivery)
+            result.retried += 1
+
+    with transaction.atomic():
+        NotificationOutbox.objects.bulk_update(
+            [*to_send, *deferred],
+            ["status", "attempts", "next_attempt_at", "last_error", "sent_at"],
+        )
+
+    if rows:
+        logger.info(
+            "Notification outbox batch sent=%s retried=%s failed=%s deferred=%s",
+            result.sent,
+            result.retried,
+            result.failed,
+            result.deferred,
+        )
+    return result
+
+
+def _claim_due_rows(batch_size: int) -> list[NotificationOutbox]:
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            NotificationOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=NotificationOutbox.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if rows:
+            NotificationOutbox.objects.filter(id__in=[row.id for row in rows]).update(
+                next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+            )
+    return rows
+
+
+def _delivery_error(delivery) -> str:
+    if delivery.status_code:
+        return f"HTTP {delivery.status_code}: {delivery.error}"[:500]
+    return (delivery.error or "Telegram send failed")[:500]
+
+
+def _backoff_seconds(attempts: int) -> int:
+    return min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+
+
+def _seconds_until_chat_allowed(chat_last_sent: dict[str, float], chat_id: str) -> float:
+    last_sent = chat_last_sent.get(chat_id)
+    if last_sent is None:
+        return 0
+    return max(PER_CHAT_INTERVAL_SECONDS - (time.monotonic() - last_sent), 0)
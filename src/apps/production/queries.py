@@ -0,0 +1,112 @@
+"""Read models for production pages.
+
+Each loader returns plain rows built from `values()` queries, with a fixed number of queries
+no matter how much history an order has.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.utils.timezone import localtime
+
+from apps.production.domain.order_statuses import status_label_map
+from apps.production.models import ProductionOrder, ProductionOrderStatusHistory
+
+STATUS_LABELS = status_label_map(include_legacy=True)
+UNKNOWN = "Unknown"
+NO_COLOR = "-"
+
+ORDER_DETAIL_FIELDS = (
+    "id",
+    "is_embroidery",
+    "comment",
+    "is_urgent",
+    "is_etsy",
+    "created_at",
+    "finished_at",
+    "status",
+    "product__name",
+    "variant__color__name",
+    "variant__primary_material_color__name",
+    "variant__primary_material_color__material__name",
+    "variant__secondary_material_color__name",
+    "variant__secondary_material_color__material__name",
+)
+
+
+@dataclass(frozen=True)
+class StatusHistoryRow:
+    id: int
+    new_status: str
+    new_status_display: str
+    changed_by: str
+    changed_at: datetime | None
+
+
+@dataclass(frozen=True)
+class OrderDetail:
+    id: int
+    product: str
+    color: str
+    is_embroidery: bool
+    comment: str | None
+    is_urgent: bool
+    is_etsy: bool
+    created_at: datetime | None
+    finished_at: datetime | None
+    status_code: str
+    status_display: str
+    status_history: list[StatusHistoryRow]
+
+
+def get_order_detail(order_id: int) -> OrderDetail | None:
+    """The order with its variant label and status history, newest first, in two queries."""
+    row = ProductionOrder.objects.filter(id=order_id).values(*ORDER_DETAIL_FIELDS).first()
+    if row is None:
+        return None
+    history = (
+        ProductionOrderStatusHistory.objects.filter(order_id=order_id)
+        .order_by("-changed_at", "-id")
+        .values_list("id", "new_status", "changed_by__username", "changed_at")
+    )
+    return OrderDetail(
+        id=row["id"],
+        product=row["product__name"],
+        color=_color_label(row),
+        is_embroidery=row["is_embroidery"],
+        comment=row["comment"],
+        is_urgent=row["is_urgent"],
+        is_etsy=row["is_etsy"],
+        created_at=_local(row["created_at"]),
+        finished_at=_local(row["finished_at"]),
+        status_code=row["status"],
+        status_display=STATUS_LABELS.get(row["status"], row["status"]),
+        status_history=[
+            StatusHistoryRow(
+                id=history_id,
+                new_status=new_status,
+                new_status_display=STATUS_LABELS.get(new_status, UNKNOWN),
+                changed_by=username or UNKNOWN,
+                changed_at=_local(changed_at),
+            )
+            for history_id, new_status, username, changed_at in history
+        ],
+    )
+
+
+def _color_label(row: dict) -> str:
+    """Same label as `variant_color_label`: the color, else the variant's material colors."""
+    if row["variant__color__name"]:
+        return row["variant__color__name"]
+    labels = [
+        f"{row[f'variant__{side}_material_color__material__name']}: "
+        f"{row[f'variant__{side}_material_color__name']}"
+        for side in ("primary", "secondary")
+        if row[f"variant__{side}_material_color__name"]
+    ]
+    return " / ".join(labels) or NO_COLOR
+
+
+def _local(value: datetime | None) -> datetime | None:
+    return localtime(value) if value else None
@@ -0,0 +1,81 @@
+"""Search over production orders via the denormalized `search_text` column.
+
+On PostgreSQL the column has a pg_trgm GIN index, so substring matches use the index and
+results can be ranked by trigram word similarity.
+"""
+from __future__ import annotations
+
+from django.db import connection
+from django.db.models import Q, QuerySet, prefetch_related_objects
+
+from apps.production.domain.search import build_search_text, split_search_terms
+from apps.production.models import ProductionOrder
+
+SEARCH_SOURCE_FIELDS = frozenset({"product", "product_id", "variant", "variant_id", "comment"})
+SEARCH_RELATED = (
+    "product",
+    "variant__color",
+    "variant__primary_material_color__material",
+    "variant__secondary_material_color__material",
+)
+
+
+def order_search_text(order: ProductionOrder) -> str:
+    variant = order.variant
+    parts = [order.product.name if order.product_id else None]
+    if variant is not None:
+        if variant.color_id:
+            parts.append(variant.color.name)
+        for material_color in (variant.primary_material_color, variant.secondary_material_color):
+            if material_color is not None:
+                parts.extend([material_color.material.name, material_color.name])
+    parts.append(order.comment)
+    return build_search_text(parts)
+
+
+def fill_search_text(orders: list[ProductionOrder]) -> None:
+    """Set `search_text` on unsaved or bulk-updated orders with a fixed number of queries."""
+    prefetch_related_objects(orders, *SEARCH_RELATED)
+    for order in orders:
+        order.search_text = order_search_text(order)
+
+
+def refresh_search_text(queryset: QuerySet, *, batch_size: int = 1000) -> int:
+    """Recompute `search_text` for every order in `queryset`; returns rows updated."""
+    updated = 0
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by("id")[:batch_size])
+        if not batch:
+            return updated
+        before = {order.id: order.search_text for order in batch}
+        fill_search_text(batch)
+        changed = [order for order in batch if order.search_text != before[order.id]]
+        ProductionOrder.objects.bulk_update(changed, ["search_text"])
+        updated += len(changed)
+        last_id = batch[-1].id
+
+
+def search_orders(queryset: QuerySet, query: str) -> tuple[QuerySet, bool]:
+    """Filter `queryset` by every term in `query`; returns (queryset, is_ranked).
+
+    When ranked (PostgreSQL), rows carry a `_search_rank` annotation to order by.
+    """
+    terms = split_search_terms(query)
+    if not terms:
+        return queryset, False
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(search_text__contains=term)
+    if query.strip().isdigit():
+        condition |= Q(id=int(query.strip()))
+    queryset = queryset.filter(condition)
+
+    if connection.vendor != "postgresql":
+        return queryset, False
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    return queryset.annotate(
+        _search_rank=TrigramWordSimilarity(" ".join(terms), "search_text")
+    ), True
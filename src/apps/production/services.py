@@ -2,16 +2,26 @@
 from __future__ import annotations
 
 from collections.abc import Callable
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
 
 from apps.catalog.variants import resolve_or_create_variant
-from apps.inventory.domain import Quantity, VariantId, WarehouseId
-from apps.warehouses.services import get_default_warehouse
-from apps.production.notifications import send_order_created, send_order_finished
+from apps.inventory.domain import VariantId, WarehouseId
+from apps.warehouses.services import get_default_warehouse_id
+from apps.production.board import bump_board_version_on_commit
+from apps.production.exceptions import InvalidStatusTransition
+from apps.production.notifications import (
+    send_order_created,
+    send_orders_created,
+    send_orders_finished,
+)
 from apps.production.domain.status import STATUS_DONE, STATUS_NEW, validate_status
 from apps.production.models import ProductionOrder, ProductionOrderStatusHistory
+from apps.production.search import fill_search_text
 
 if TYPE_CHECKING:
     from django.contrib.auth.models import AbstractBaseUser
@@ -21,6 +31,19 @@ if TYPE_CHECKING:
     from apps.sales.models import SalesOrderLine
 
 
+@dataclass(frozen=True)
+class ProductionOrderDraft:
+    """`quantity` identical orders for one variant, as created by the bulk API."""
+
+    variant: "Variant"
+    quantity: int = 1
+    comment: str | None = None
+    sales_order_line: "SalesOrderLine | None" = None
+    is_embroidery: bool = False
+    is_urgent: bool = False
+    is_etsy: bool = False
+
+
 @transaction.atomic
 def create_production_order(
     *,
@@ -64,11 +87,57 @@ def create_production_order(
         new_status=STATUS_NEW,
         changed_by=created_by,
     )
+    if sales_order_line is not None:
+        from apps.sales.services import record_production_orders_created
+
+        record_production_orders_created([order])
 
     send_order_created(order=order, orders_url=orders_url)
     return order
 
 
+@transaction.atomic
+def create_production_orders_bulk(
+    *,
+    drafts: list[ProductionOrderDraft],
+    created_by: "AbstractBaseUser",
+    orders_url: str | None,
+) -> list[ProductionOrder]:
+    """Create many orders with two inserts and one summarized notification."""
+    orders = [
+        ProductionOrder(
+            product_id=draft.variant.product_id,
+            variant=draft.variant,
+            is_embroidery=draft.is_embroidery,
+            is_urgent=draft.is_urgent,
+            is_etsy=draft.is_etsy,
+            comment=draft.comment,
+            status=STATUS_NEW,
+            sales_order_line=draft.sales_order_line,
+        )
+        for draft in drafts
+        for _ in range(draft.quantity)
+    ]
+    if not orders:
+        return []
+
+    fill_search_text(orders)
+    ProductionOrder.objects.bulk_create(orders)
+    bump_board_version_on_commit()
+    ProductionOrderStatusHistory.objects.bulk_create(
+        [
+            ProductionOrderStatusHistory(order=order, new_status=STATUS_NEW, changed_by=created_by)
+            for order in orders
+        ]
+    )
+    if any(order.sales_order_line_id for order in orders):
+        from apps.sales.services import record_production_orders_created
+
+        record_production_orders_created(orders)
+    send_orders_created(orders=orders, orders_url=orders_url)
+    return orders
+
+
 @transaction.atomic
 def change_production_order_status(
     *,
@@ -78,34 +147,96 @@ def change_production_order_status(
     on_order_done: Callable[[ProductionOrder, "AbstractBaseUser"], None] | None = None,
     on_sales_line_done: Callable[["SalesOrderLine"], None] | None = None,
 ) -> None:
+    """Move all orders to one status with set-based writes.
+
+    Every transition is validated before anything is written, so an invalid
+    order rejects the whole batch. Rows are locked and their stored status re-read first, so
+    a concurrent status change cannot be overwritten by a transition that is no longer valid.
+    """
     normalized = validate_status(new_status)
-    order_done_handler = on_order_done or _add_finished_stock
-    for order in production_orders:
-        order.transition_to(normalized, changed_by)
-        order.save()
-        if normalized == STATUS_DONE:
-            order_done_handler(order, changed_by)
-            if order.sales_order_line_id and on_sales_line_done is not None:
+    orders = list({order.id: order for order in production_orders}.values())
+    if not orders:
+        return
+    current_statuses = dict(
+        ProductionOrder.objects.select_for_update()
+        .filter(id__in=[order.id for order in orders])
+        .order_by("id")
+        .values_list("id", "status")
+    )
+    for order in orders:
+        if order.id not in current_statuses:
+            raise ProductionOrder.DoesNotExist(f"Production order {order.id} no longer exists")
+        order.status = current_statuses[order.id]
+        if not order.can_transition_to(normalized):
+            raise InvalidStatusTransition(order.status, normalized)
+
+    finished_at = timezone.now() if normalized == STATUS_DONE else None
+    updated_at = timezone.now()
+    ProductionOrder.objects.filter(id__in=[order.id for order in orders]).update(
+        status=normalized,
+        finished_at=finished_at,
+        updated_at=updated_at,
+    )
+    bump_board_version_on_commit()
+    ProductionOrderStatusHistory.objects.bulk_create(
+        [
+            ProductionOrderStatusHistory(order=order, new_status=normalized, changed_by=changed_by)
+            for order in orders
+        ]
+    )
+    for order in orders:
+        order.status = normalized
+        order.finished_at = finished_at
+        order.updated_at = updated_at
+
+    if normalized != STATUS_DONE:
+        return
+
+    line_orders = [order for order in orders if order.sales_order_line_id]
+    if line_orders:
+        from apps.sales.services import record_production_orders_finished
+
+        record_production_orders_finished(line_orders)
+    prefetch_related_objects(line_orders, "sales_order_line")
+    if on_order_done is None:
+        _add_finished_stock(orders, changed_by)
+    else:
+        for order in orders:
+            on_order_done(order, changed_by)
+
+    if on_sales_line_done is not None:
+        synced_line_ids: set[int] = set()
+        for order in orders:
+            if order.sales_order_line_id and order.sales_order_line_id not in synced_line_ids:
+                synced_line_ids.add(order.sales_order_line_id)
                 on_sales_line_done(order.sales_order_line)
 
-            send_order_finished(order=order)
+    send_orders_finished(orders=orders)
 
 
 def _add_finished_stock(
-    order: ProductionOrder,
+    orders: list[ProductionOrder],
     changed_by: "AbstractBaseUser",
 ) -> None:
     from apps.inventory.models import ProductStockMovement
-    from apps.inventory.services import add_to_stock
-
-    warehouse_id = WarehouseId(get_default_warehouse().id)
-    add_to_stock(
-        warehouse_id=warehouse_id,
-        variant_id=VariantId(order.variant_id),
-        product_id=order.product_id,
-        quantity=Quantity(1),
-        reason=ProductStockMovement.Reason.PRODUCTION_IN,
-        production_order=order,
-        sales_order_line=order.sales_order_line,
-        user=changed_by,
+    from apps.inventory.services import StockMovementEntry, post_stock_movements
+
+    warehouse_id = WarehouseId(get_default_warehouse_id())
+    post_stock_movements(
+        [
+            StockMovementEntry(
+                warehouse_id=warehouse_id,
+                variant_id=VariantId(order.variant_id),
+                quantity_change=1,
+                reason=ProductStockMovement.Reason.PRODUCTION_IN,
+                production_order=order,
+                sales_order_line=order.sales_order_line,
+                user=changed_by,
+            )
+            for order in orders
+        ]
     )
+    if any(order.sales_order_line_id for order in orders):
+        from apps.sales.services import reserve_produced_units
+
+        reserve_produced_units(orders, warehouse_id=warehouse_id, user=changed_by)
@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.catalog.models import Color, Product
+from apps.materials.models import Material, MaterialColor
+from apps.production.board import bump_board_version_on_commit
+from apps.production.domain.status import STATUS_DONE
+from apps.production.models import ProductionOrder
+from apps.production.search import refresh_search_text
+
+# Renaming any of these changes the search text of the orders that reference them.
+ORDER_LOOKUP_BY_MODEL = {
+    Product: "product_id",
+    Color: "variant__color_id",
+    MaterialColor: "variant__primary_material_color_id",
+    Material: "variant__primary_material_color__material_id",
+}
+SECONDARY_LOOKUP_BY_MODEL = {
+    MaterialColor: "variant__secondary_material_color_id",
+    Material: "variant__secondary_material_color__material_id",
+}
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Color)
+@receiver(pre_save, sender=MaterialColor)
+@receiver(pre_save, sender=Material)
+def remember_previous_name(sender, instance, raw=False, **kwargs):
+    instance._previous_name = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_name = (
+        sender.objects.filter(pk=instance.pk).values_list("name", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Color)
+@receiver(post_save, sender=MaterialColor)
+@receiver(post_save, sender=Material)
+def refresh_orders_after_rename(sender, instance, created, raw=False, **kwargs):
+    previous_name = getattr(instance, "_previous_name", None)
+    if created or raw or previous_name is None or previous_name == instance.name:
+        return
+
+    lookups = [ORDER_LOOKUP_BY_MODEL[sender]]
+    if sender in SECONDARY_LOOKUP_BY_MODEL:
+        lookups.append(SECONDARY_LOOKUP_BY_MODEL[sender])
+
+    def refresh():
+        for lookup in lookups:
+            refresh_search_text(ProductionOrder.objects.filter(**{lookup: instance.pk}))
+
+    transaction.on_commit(refresh)
+
+
+@receiver(pre_save, sender=ProductionOrder)
+def remember_previous_sales_line(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_line_state = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {"sales_order_line", "sales_order_line_id"} & set(
+        update_fields
+    ):
+        return
+    instance._previous_line_state = (
+        ProductionOrder.objects.filter(pk=instance.pk)
+        .values_list("sales_order_line_id", "status")
+        .first()
+    )
+
+
+@receiver(post_save, sender=ProductionOrder)
+def move_sales_line_counters(sender, instance, created, raw=False, **kwargs):
+    # The services count orders they create and finish; a line reassigned on save (admin) is
+    # moved here, counted by the status the order had and has.
+    previous = getattr(instance, "_previous_line_state", None)
+    if created or raw or previous is None or previous[0] == instance.sales_order_line_id:
+        return
+    from apps.sales.services import (
+        record_production_orders_created,
+        record_production_orders_finished,
+        record_production_orders_removed,
+        resync_sales_lines,
+    )
+
+    previous_line_id, previous_status = previous
+    record_production_orders_removed(
+        [ProductionOrder(sales_order_line_id=previous_line_id, status=previous_status)]
+    )
+    record_production_orders_created([instance])
+    if instance.status == STATUS_DONE:
+        record_production_orders_finished([instance])
+    resync_sales_lines({previous_line_id, instance.sales_order_line_id} - {None})
+
+
+@receiver(post_delete, sender=ProductionOrder)
+def uncount_deleted_order(sender, instance, **kwargs):
+    if not instance.sales_order_line_id:
+        return
+    from apps.sales.services import record_production_orders_removed, resync_sales_lines
+
+    record_production_orders_removed([instance])
+    resync_sales_lines([instance.sales_order_line_id])
+
+
+@receiver(post_save, sender=ProductionOrder)
+@receiver(post_delete, sender=ProductionOrder)
+def bump_board_after_order_write(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_board_version_on_commit()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Color)
+def bump_board_after_catalog_edit(sender, instance, created, raw=False, **kwargs):
+    # Board rows show product and color names.
+    if not created and not raw:
+        bump_board_version_on_commit()
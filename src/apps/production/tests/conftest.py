@@ -1,8 +1,22 @@
+import pytest
+
 from apps.production.tests.factories import ColorFactory, OrderFactory, ProductFactory, UserFactory
+from apps.production.tests.fake_telegram import FakeTelegramServer
 
 __all__ = [
     "ColorFactory",
     "OrderFactory",
     "ProductFactory",
     "UserFactory",
+    "fake_telegram",
 ]
+
+
+@pytest.fixture
+def fake_telegram(monkeypatch):
+    server = FakeTelegramServer()
+    server.start()
+    monkeypatch.setattr("apps.production.utils.TELEGRAM_API_BASE_URL", server.base_url)
+    monkeypatch.setattr("apps.production.utils.TELEGRAM_BOT_TOKEN", "test-token")
+    yield server
+    server.stop()
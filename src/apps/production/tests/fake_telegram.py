@@ -0,0 +1,66 @@
+"""In-process fake of the Telegram Bot API sendMessage endpoint."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeTelegramServer:
+    """Records sendMessage payloads; `fail_with` makes it answer with an error status."""
+
+    def __init__(self):
+        self.messages: list[dict] = []
+        self.connections = 0
+        self.fail_with: int | None = None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 keeps connections open, so `connections` counts real handshakes.
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/sendMessage"):
+                    self._reply(404, {"ok": False, "description": "Not Found"})
+                    return
+                if fake.fail_with is not None:
+                    self._reply(fake.fail_with, {"ok": False, "description": "Fake failure"})
+                    return
+                with fake._lock:
+                    fake.messages.append(payload)
+                self._reply(200, {"ok": True, "result": {"message_id": len(fake.messages)}})
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,90 @@
+"""Tests for the bench data seed and the benchmark runner."""
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.inventory.models import ProductStock
+from apps.inventory.ledgers import verify_stock_ledgers
+from apps.materials.models import ProductMaterialNorm
+from apps.production.benchdata import (
+    SEARCH_BENCH_PREFIX,
+    BenchmarkVolumes,
+    benchmark_data_counts,
+    seed_benchmark_data,
+)
+from apps.production.benchmarks import SCENARIOS
+from apps.production.models import ProductionOrder
+from apps.production.tests.factories import OrderFactory
+from apps.sales.models import SalesOrderLineComponentSelection
+
+SMALL = BenchmarkVolumes(
+    production_orders=30,
+    sales_orders=10,
+    stock_movements=200,
+    purchase_orders=4,
+    products=3,
+    bundles=1,
+    materials=4,
+)
+
+
+@pytest.mark.django_db
+def test_seed_benchmark_data_tops_up_to_volumes_with_consistent_balances():
+    created = seed_benchmark_data(SMALL, batch_size=8)
+
+    assert created == benchmark_data_counts() == {
+        "production_orders": 30,
+        "sales_orders": 10,
+        "stock_movements": 200,
+        "purchase_orders": 4,
+    }
+    assert ProductStock.objects.count() == 18
+    assert verify_stock_ledgers(full=True).drifted == []
+    assert ProductMaterialNorm.objects.filter(product__name="Bench set 0").exists()
+    # A second run has nothing left to insert.
+    assert set(seed_benchmark_data(SMALL, batch_size=8).values()) == {0}
+    # Orders from the search benchmark are not this seed's and do not count toward it.
+    OrderFactory(comment=f"{SEARCH_BENCH_PREFIX} gift")
+    assert benchmark_data_counts()["production_orders"] == 30
+    assert SalesOrderLineComponentSelection.objects.count() % 2 == 0
+
+
+@pytest.mark.django_db
+def test_search_benchmark_cleanup_keeps_the_shared_bench_catalog():
+    seed_benchmark_data(SMALL, batch_size=50)
+    call_command("benchmark_order_search", orders=20, repeat=1, query=["navy"], stdout=StringIO())
+
+    call_command("benchmark_order_search", cleanup=True, stdout=StringIO())
+
+    assert not ProductionOrder.objects.filter(comment__startswith=SEARCH_BENCH_PREFIX).exists()
+    assert benchmark_data_counts()["production_orders"] == 30
+    assert verify_stock_ledgers(full=True).drifted == []
+
+
+@pytest.mark.django_db
+def test_run_benchmarks_writes_report_and_fails_on_regression(tmp_path):
+    seed_benchmark_data(SMALL, batch_size=50)
+    report_path = tmp_path / "bench.json"
+
+    call_command("run_benchmarks", repeat=1, output=str(report_path), stdout=StringIO())
+
+    report = json.loads(report_path.read_text())
+    assert set(report["scenarios"]) == set(SCENARIOS)
+    assert report["data"]["production_orders"] == 30
+    assert all(result["queries"] > 0 for result in report["scenarios"].values())
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(
+        json.dumps({"scenarios": {"orders_active": {"median_ms": 0.0001}}}), encoding="utf-8"
+    )
+    with pytest.raises(CommandError, match="Regressions"):
+        call_command(
+            "run_benchmarks",
+            scenario=["orders_active"],
+            repeat=1,
+            baseline=str(baseline),
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
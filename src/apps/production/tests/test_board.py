@@ -0,0 +1,69 @@
+"""Tests for the cached active orders board."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.production.board import get_board_version
+from apps.production.domain.status import STATUS_IN_PROGRESS
+from apps.production.services import change_production_order_status
+
+from .conftest import ColorFactory, OrderFactory, ProductFactory, UserFactory
+
+AUTH_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+
+def _board(client):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(reverse("orders_active"))
+    assert response.status_code == 200
+    order_queries = [q["sql"] for q in captured if "production_productionorder" in q["sql"]]
+    return response.content.decode(), order_queries
+
+
+@pytest.mark.django_db
+def test_unchanged_board_renders_from_cache_with_one_version_lookup(
+    client, django_capture_on_commit_callbacks
+):
+    user = UserFactory()
+    client.force_login(user, backend=AUTH_BACKEND)
+    tote = ProductFactory(name="Сумка Tote")
+    order = OrderFactory(product=tote, color=ColorFactory(name="Navy"))
+    OrderFactory(product=ProductFactory(name="Шопер"), color=ColorFactory(name="Olive"))
+
+    first, first_queries = _board(client)
+    assert "Сумка Tote" in first and first_queries
+
+    cached, cached_queries = _board(client)
+    assert "Сумка Tote" in cached and "Шопер" in cached
+    assert cached_queries == []
+
+    version = get_board_version()
+    with django_capture_on_commit_callbacks(execute=True):
+        change_production_order_status(
+            production_orders=[order], new_status=STATUS_IN_PROGRESS, changed_by=user
+        )
+    assert get_board_version() == version + 1
+    changed, changed_queries = _board(client)
+    assert changed_queries
+    assert f'value="{order.id}"\n            data-current-status="{STATUS_IN_PROGRESS}"' in changed
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tote.name = "Сумка Tote XL"
+        tote.save()
+    assert "Сумка Tote XL" in _board(client)[0]
+
+
+@pytest.mark.django_db
+def test_order_save_with_update_fields_moves_updated_at(django_capture_on_commit_callbacks):
+    order = OrderFactory()
+    previous = order.updated_at
+    version = get_board_version()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        order.comment = "без коробки"
+        order.save(update_fields=["comment"])
+
+    order.refresh_from_db()
+    assert order.updated_at > previous
+    assert get_board_version() == version + 1
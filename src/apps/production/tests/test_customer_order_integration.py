@@ -29,7 +29,7 @@ def test_change_order_status_finished_adds_item_to_stock_for_customer_line():
         quantity=1,
     )
 
-    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_order_finished"):
+    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_orders_finished"):
         order = create_production_order(
             product=model,
             color=color,
@@ -82,7 +82,7 @@ def test_change_order_status_finished_uses_material_color_stock_key():
         ),
     )
 
-    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_order_finished"):
+    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_orders_finished"):
         order = create_production_order(
             product=product,
             color=None,
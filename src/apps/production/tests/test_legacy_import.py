@@ -5,6 +5,7 @@ from apps.catalog.models import Variant
 from apps.catalog.tests.conftest import ColorFactory, ProductFactory
 from apps.inventory.models import ProductStockMovement, ProductStock
 from apps.materials.models import Material, MaterialStockMovement, MaterialStock, BOM
+from apps.production.board import get_board_version
 from apps.production.legacy_import import run_final_import_and_verify, run_import_legacy
 from apps.production.legacy_import_mappings import (
     LEGACY_FINISHED_MOVEMENT_REASON_TO_V2,
@@ -137,19 +138,25 @@ def test_verify_mode_returns_material_balance_by_warehouse_and_unit():
 
 
 @pytest.mark.django_db
-def test_apply_mode_normalizes_legacy_order_statuses():
+def test_apply_mode_normalizes_legacy_order_statuses(django_capture_on_commit_callbacks):
     order = OrderFactory(status="almost_finished")
     ProductionOrderStatusHistory.objects.create(
         order=order,
         changed_by=None,
         new_status="almost_finished",
     )
+    loaded_at = order.updated_at
+    version = get_board_version()
 
-    result = run_import_legacy(mode="apply")
+    with django_capture_on_commit_callbacks(execute=True):
+        result = run_import_legacy(mode="apply")
 
     order.refresh_from_db()
     history_status = order.history.latest("id").new_status
     assert order.status == "done"
+    # The cached board and the order's cached row are invalidated.
+    assert order.updated_at > loaded_at
+    assert get_board_version() == version + 1
     assert history_status == "done"
     assert result["updated"]["order_statuses"] >= 1
     assert result["updated"]["order_status_history"] >= 1
@@ -1,16 +1,15 @@
-"""Notification tests (delayed idempotency)."""
-from unittest.mock import patch
-
+"""Notification tests (delayed idempotency, Telegram transport)."""
 import pytest
 
 from apps.production.models import DelayedNotificationLog
+from apps.production.utils import TELEGRAM_MAX_CONCURRENCY, send_tg_message, send_tg_messages
 from apps.user_settings.models import NotificationSetting
 
 from .conftest import ColorFactory, OrderFactory, ProductFactory, UserFactory
 
 
 @pytest.mark.django_db
-def test_orders_created_delayed_is_idempotent_per_user_and_order():
+def test_orders_created_delayed_is_idempotent_per_user_and_order(fake_telegram):
     from apps.production.notifications import _orders_created_delayed
     user = UserFactory(telegram_id="12345")
     NotificationSetting.objects.get_or_create(
@@ -24,7 +23,37 @@ def test_orders_created_delayed_is_idempotent_per_user_and_order():
     model = ProductFactory()
     color = ColorFactory()
     order = OrderFactory(product=model, color=color)
-    with patch("apps.production.notifications.send_tg_message", return_value=True):
-        _orders_created_delayed(orders=[order])
-        _orders_created_delayed(orders=[order])
+    _orders_created_delayed(orders=[order])
+    _orders_created_delayed(orders=[order])
     assert DelayedNotificationLog.objects.filter(user=user, order=order).count() == 1
+    assert len(fake_telegram.messages) == 1
+
+
+def test_send_tg_message_reuses_keep_alive_connection(fake_telegram):
+    for i in range(5):
+        assert send_tg_message("1", f"message {i}")
+
+    assert len(fake_telegram.messages) == 5
+    assert fake_telegram.connections == 1
+
+
+def test_send_tg_messages_fans_out_and_keeps_input_order(fake_telegram):
+    messages = [(str(chat_id), f"hello {chat_id}") for chat_id in range(20)]
+
+    results = send_tg_messages(messages)
+
+    assert [result.chat_id for result in results] == [chat_id for chat_id, _ in messages]
+    assert all(result.ok for result in results)
+    assert len(fake_telegram.messages) == 20
+    assert fake_telegram.connections <= TELEGRAM_MAX_CONCURRENCY
+
+
+def test_send_tg_messages_reports_failure_per_recipient(fake_telegram):
+    fake_telegram.fail_with = 403
+
+    results = send_tg_messages([("1", "a"), ("2", "b")])
+
+    assert [(result.ok, result.status_code) for result in results] == [
+        (False, 403),
+        (False, 403),
+    ]
@@ -0,0 +1,140 @@
+"""Notification outbox: enqueue inside transactions, dispatch with retries."""
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from apps.production.domain.status import STATUS_DONE
+from apps.production.models import NotificationOutbox
+from apps.production.outbox import (
+    BACKOFF_BASE_SECONDS,
+    OutboxMessage,
+    dispatch_pending_notifications,
+    enqueue_telegram_messages,
+)
+from apps.production.services import change_production_order_status
+
+from .conftest import ColorFactory, OrderFactory, ProductFactory, UserFactory
+
+
+@pytest.mark.django_db
+def test_status_change_queues_notification_without_calling_telegram(fake_telegram):
+    UserFactory(telegram_id="555")
+    user = UserFactory()
+    order = OrderFactory(product=ProductFactory(is_bundle=False), color=ColorFactory())
+
+    change_production_order_status(
+        production_orders=[order], new_status=STATUS_DONE, changed_by=user
+    )
+
+    row = NotificationOutbox.objects.get()
+    assert row.chat_id == "555"
+    assert row.status == NotificationOutbox.Status.PENDING
+    assert fake_telegram.messages == []
+
+
+@pytest.mark.django_db
+def test_enqueued_messages_roll_back_with_transaction():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            enqueue_telegram_messages([OutboxMessage(chat_id="1", text="hi")])
+            raise RuntimeError
+
+    assert not NotificationOutbox.objects.exists()
+
+
+@pytest.mark.django_db
+def test_dispatch_delivers_pending_messages(fake_telegram):
+    enqueue_telegram_messages(
+        [OutboxMessage(chat_id="1", text="one"), OutboxMessage(chat_id="2", text="two")]
+    )
+
+    result = dispatch_pending_notifications()
+
+    assert result.sent == 2
+    assert sorted(m["text"] for m in fake_telegram.messages) == ["one", "two"]
+    assert set(NotificationOutbox.objects.values_list("status", flat=True)) == {
+        NotificationOutbox.Status.SENT
+    }
+
+
+@pytest.mark.django_db
+def test_dispatch_claims_rows_before_sending(fake_telegram):
+    enqueue_telegram_messages([OutboxMessage(chat_id="1", text="one")])
+    seen_during_send = []
+
+    def send(messages):
+        if messages:
+            # Claimed rows are not due for another dispatcher while Telegram is called.
+            seen_during_send.append(dispatch_pending_notifications().processed)
+            assert NotificationOutbox.objects.get().next_attempt_at > timezone.now()
+        return real_send(messages)
+
+    from apps.production import outbox
+
+    real_send = outbox.send_tg_messages
+    with patch.object(outbox, "send_tg_messages", side_effect=send):
+        result = dispatch_pending_notifications()
+
+    assert result.sent == 1
+    assert seen_during_send == [0]
+    assert NotificationOutbox.objects.get().status == NotificationOutbox.Status.SENT
+
+
+@pytest.mark.django_db
+def test_dispatch_schedules_retry_with_backoff(fake_telegram):
+    fake_telegram.fail_with = 500
+    enqueue_telegram_messages([OutboxMessage(chat_id="1", text="one")])
+
+    before = timezone.now()
+    result = dispatch_pending_notifications()
+
+    row = NotificationOutbox.objects.get()
+    assert result.retried == 1
+    assert row.status == NotificationOutbox.Status.PENDING
+    assert row.attempts == 1
+    assert row.next_attempt_at >= before + timedelta(seconds=BACKOFF_BASE_SECONDS)
+    # Not due yet, so a second run leaves it alone.
+    assert dispatch_pending_notifications().processed == 0
+
+
+@pytest.mark.django_db
+def test_dispatch_marks_failed_after_max_attempts(fake_telegram):
+    fake_telegram.fail_with = 429
+    enqueue_telegram_messages([OutboxMessage(chat_id="1", text="one")])
+
+    for _ in range(2):
+        dispatch_pending_notifications(max_attempts=2)
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+
+    row = NotificationOutbox.objects.get()
+    assert row.status == NotificationOutbox.Status.FAILED
+    assert row.attempts == 2
+
+
+@pytest.mark.django_db
+def test_dispatch_defers_second_message_to_same_chat(fake_telegram):
+    enqueue_telegram_messages(
+        [OutboxMessage(chat_id="7", text="first"), OutboxMessage(chat_id="7", text="second")]
+    )
+
+    result = dispatch_pending_notifications()
+
+    assert result.sent == 1
+    assert result.deferred == 1
+    assert [m["text"] for m in fake_telegram.messages] == ["first"]
+
+
+@pytest.mark.django_db
+def test_dispatch_notifications_command_drains_outbox(fake_telegram):
+    enqueue_telegram_messages([OutboxMessage(chat_id="1", text="one")])
+    output = StringIO()
+
+    call_command("dispatch_notifications", stdout=output)
+
+    assert "sent=1" in output.getvalue()
+    assert NotificationOutbox.objects.get().status == NotificationOutbox.Status.SENT
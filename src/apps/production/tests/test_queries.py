@@ -0,0 +1,53 @@
+"""Tests for the production read models."""
+import pytest
+from django.urls import reverse
+
+from apps.catalog.models import Variant
+from apps.materials.models import Material, MaterialColor
+from apps.production.domain.status import STATUS_DONE, STATUS_IN_PROGRESS
+from apps.production.models import ProductionOrderStatusHistory
+from apps.production.queries import get_order_detail
+
+from .conftest import ColorFactory, OrderFactory, ProductFactory, UserFactory
+
+AUTH_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+
+@pytest.mark.django_db
+def test_order_detail_loads_long_history_in_two_queries(django_assert_num_queries):
+    users = [UserFactory(username="anna"), UserFactory(username="olha")]
+    order = OrderFactory(product=ProductFactory(name="Сумка Tote"), color=ColorFactory(name="Navy"))
+    ProductionOrderStatusHistory.objects.bulk_create(
+        [
+            ProductionOrderStatusHistory(
+                order=order,
+                new_status=STATUS_IN_PROGRESS if index % 2 else STATUS_DONE,
+                changed_by=users[index % 2] if index else None,
+            )
+            for index in range(30)
+        ]
+    )
+
+    with django_assert_num_queries(2):
+        detail = get_order_detail(order.id)
+
+    assert (detail.product, detail.color, detail.status_display) == ("Сумка Tote", "Navy", "Нове")
+    assert len(detail.status_history) == 30
+    assert {row.changed_by for row in detail.status_history} == {"anna", "olha", "Unknown"}
+    assert detail.status_history[0].id > detail.status_history[-1].id
+    assert get_order_detail(order.id + 1000) is None
+
+
+@pytest.mark.django_db
+def test_order_detail_labels_material_color_variants(client):
+    felt = Material.objects.create(name="Фетр")
+    grey = MaterialColor.objects.create(material=felt, name="Сірий", code=1)
+    product = ProductFactory(name="Шопер")
+    variant = Variant.objects.create(product=product, primary_material_color=grey)
+    order = OrderFactory(product=product, variant=variant)
+
+    assert get_order_detail(order.id).color == "Фетр: Сірий"
+
+    client.force_login(UserFactory(), backend=AUTH_BACKEND)
+    assert "Фетр: Сірий" in client.get(reverse("order_detail", args=[order.id])).content.decode()
+    assert client.get(reverse("order_detail", args=[order.id + 1000])).status_code == 404
@@ -0,0 +1,84 @@
+"""Order search over the denormalized search_text column."""
+import pytest
+from django.urls import reverse
+
+from apps.catalog.models import Variant
+from apps.materials.models import Material, MaterialColor
+from apps.production.domain.status import STATUS_DONE
+from apps.production.models import ProductionOrder
+from apps.production.search import refresh_search_text, search_orders
+
+from .conftest import ColorFactory, OrderFactory, ProductFactory, UserFactory
+
+AUTH_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+
+@pytest.mark.django_db
+def test_search_text_is_built_on_save_and_follows_comment_updates():
+    order = OrderFactory(
+        product=ProductFactory(name="Сумка Tote"),
+        color=ColorFactory(name="Navy Blue"),
+        comment="Подарунок",
+    )
+
+    assert order.search_text == "сумка tote navy blue подарунок"
+
+    order.comment = "Без коробки"
+    order.save(update_fields=["comment"])
+    order.refresh_from_db()
+    assert order.search_text.endswith("без коробки")
+
+
+@pytest.mark.django_db
+def test_search_matches_material_colors_and_requires_every_term():
+    felt = Material.objects.create(name="Felt")
+    grey = MaterialColor.objects.create(material=felt, name="Grey", code=1)
+    product = ProductFactory(name="Laptop sleeve")
+    variant = Variant.objects.create(product=product, primary_material_color=grey)
+    target = ProductionOrder.objects.create(product=product, variant=variant, status=STATUS_DONE)
+    OrderFactory(product=product, color=ColorFactory(name="Grey"), status=STATUS_DONE)
+
+    queryset, _ = search_orders(ProductionOrder.objects.all(), "felt GREY")
+
+    assert list(queryset) == [target]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_renaming_product_refreshes_order_search_text():
+    product = ProductFactory(name="Old name")
+    order = OrderFactory(product=product)
+
+    product.name = "New name"
+    product.save()
+
+    order.refresh_from_db()
+    assert order.search_text.startswith("new name")
+
+
+@pytest.mark.django_db
+def test_refresh_search_text_repairs_stale_rows():
+    order = OrderFactory(product=ProductFactory(name="Wallet"))
+    ProductionOrder.objects.filter(id=order.id).update(search_text="")
+
+    assert refresh_search_text(ProductionOrder.objects.all()) == 1
+    order.refresh_from_db()
+    assert order.search_text.startswith("wallet")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_completed_orders_search_by_id(client):
+    client.force_login(UserFactory(), backend=AUTH_BACKEND)
+    # Factory names carry sequence numbers that could contain the id, so keep them digit-free.
+    target, _other = (
+        OrderFactory(
+            status=STATUS_DONE,
+            product=ProductFactory(name=f"Рюкзак {suffix}"),
+            color=ColorFactory(name=f"Олива {suffix}"),
+        )
+        for suffix in ("А", "Б")
+    )
+
+    response = client.get(reverse("orders_completed"), {"q": str(target.id)})
+
+    found = [order.id for order in response.context["page_obj"].object_list]
+    assert found == [target.id]
@@ -1,12 +1,23 @@
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from apps.catalog.tests.conftest import ColorFactory, ProductFactory
-from apps.production.domain.status import STATUS_DONE
+from apps.inventory.services import get_stock_quantity
+from apps.production.domain.status import STATUS_DONE, STATUS_IN_PROGRESS, STATUS_NEW
 from apps.accounts.tests.conftest import UserFactory
+from apps.production.exceptions import InvalidStatusTransition
+from apps.production.models import (
+    NotificationOutbox,
+    ProductionOrder,
+    ProductionOrderStatusHistory,
+)
 from apps.production.services import change_production_order_status, create_production_order
+from apps.production.tests.factories import OrderFactory
+from apps.warehouses.services import clear_local_warehouse_registry, get_default_warehouse
 
 
 @pytest.mark.django_db
@@ -15,7 +26,7 @@ def test_create_and_change_production_order_status_via_production_context():
     model = ProductFactory(is_bundle=False)
     color = ColorFactory()
 
-    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_order_finished"):
+    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_orders_finished"):
         order = create_production_order(
             product=model,
             color=color,
@@ -43,7 +54,7 @@ def test_production_context_allows_writes_when_legacy_writes_are_frozen():
     model = ProductFactory(is_bundle=False)
     color = ColorFactory()
 
-    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_order_finished"):
+    with patch("apps.production.services.send_order_created"), patch("apps.production.services.send_orders_finished"):
         order = create_production_order(
             product=model,
             color=color,
@@ -62,3 +73,87 @@ def test_production_context_allows_writes_when_legacy_writes_are_frozen():
 
     order.refresh_from_db()
     assert order.status == STATUS_DONE
+
+
+def _complete_orders_and_capture(*, count: int) -> tuple[int, int]:
+    user = UserFactory()
+    model = ProductFactory(is_bundle=False)
+    color = ColorFactory()
+    orders = [OrderFactory(product=model, color=color, status=STATUS_NEW) for _ in range(count)]
+    queued_before = NotificationOutbox.objects.count()
+    # Both runs start with a cold warehouse registry, so they read its version alike.
+    clear_local_warehouse_registry()
+    with CaptureQueriesContext(connection) as queries:
+        change_production_order_status(
+            production_orders=orders,
+            new_status=STATUS_DONE,
+            changed_by=user,
+        )
+    return len(queries), NotificationOutbox.objects.count() - queued_before
+
+
+@pytest.mark.django_db
+def test_change_production_order_status_query_count_does_not_grow_with_orders():
+    UserFactory(telegram_id="555")
+
+    single_queries, single_sends = _complete_orders_and_capture(count=1)
+    bulk_queries, bulk_sends = _complete_orders_and_capture(count=25)
+
+    assert bulk_queries == single_queries
+    assert single_sends == bulk_sends == 1
+
+
+@pytest.mark.django_db
+def test_change_production_order_status_done_posts_stock_and_history_per_order():
+    user = UserFactory()
+    model = ProductFactory(is_bundle=False)
+    color = ColorFactory()
+    orders = [OrderFactory(product=model, color=color, status=STATUS_NEW) for _ in range(3)]
+
+    with patch("apps.production.services.send_orders_finished") as send_finished:
+        change_production_order_status(
+            production_orders=orders,
+            new_status=STATUS_DONE,
+            changed_by=user,
+        )
+
+    assert ProductionOrder.objects.filter(status=STATUS_DONE, finished_at__isnull=False).count() == 3
+    assert ProductionOrderStatusHistory.objects.filter(new_status=STATUS_DONE).count() == 3
+    assert (
+        get_stock_quantity(warehouse_id=get_default_warehouse().id, variant_id=orders[0].variant_id)
+        == 3
+    )
+    send_finished.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_change_production_order_status_validates_the_stored_status():
+    user = UserFactory()
+    order = OrderFactory(status=STATUS_NEW)
+    # Another request finishes the order after this one loaded it.
+    ProductionOrder.objects.filter(id=order.id).update(status=STATUS_DONE)
+
+    with pytest.raises(InvalidStatusTransition):
+        change_production_order_status(
+            production_orders=[order], new_status=STATUS_IN_PROGRESS, changed_by=user
+        )
+
+    assert ProductionOrder.objects.get(id=order.id).status == STATUS_DONE
+
+
+@pytest.mark.django_db
+def test_change_production_order_status_rejects_whole_batch_on_invalid_transition():
+    user = UserFactory()
+    valid = OrderFactory(status=STATUS_NEW)
+    finished = OrderFactory(status=STATUS_DONE)
+
+    with pytest.raises(InvalidStatusTransition):
+        change_production_order_status(
+            production_orders=[valid, finished],
+            new_status=STATUS_IN_PROGRESS,
+            changed_by=user,
+        )
+
+    valid.refresh_from_db()
+    assert valid.status == STATUS_NEW
+    assert not ProductionOrderStatusHistory.objects.filter(order=valid).exists()
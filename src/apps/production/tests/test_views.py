@@ -50,13 +50,16 @@ def test_current_orders_list_is_paginated_and_excludes_finished(client):
     OrderFactory(product=model, color=color, status=STATUS_DONE)
     response = client.get(reverse("orders_active"))
     assert response.status_code == 200
-    assert response.context["page_obj"].paginator.count == 51
+    assert response.context["page_obj"].count == 51
     assert len(response.context["orders"]) == 50
     assert response.context["page_obj"].has_next()
-    second_page = client.get(reverse("orders_active"), {"page": 2})
+    second_page = client.get(
+        reverse("orders_active"), {"cursor": response.context["page_obj"].next_cursor}
+    )
     assert second_page.status_code == 200
     assert len(second_page.context["orders"]) == 1
     assert not second_page.context["page_obj"].has_next()
+    assert second_page.context["page_obj"].has_previous()
 
 
 @pytest.mark.django_db(transaction=True)
@@ -130,10 +133,11 @@ def test_finished_orders_search_preserves_query_params_for_pagination(client):
         )
     response = client.get(reverse("orders_completed"), {"q": "archive"})
     assert response.status_code == 200
-    assert response.context["page_obj"].paginator.count == 21
+    assert response.context["page_obj"].count == 21
     assert len(response.context["page_obj"].object_list) == 20
-    assert b"?page=2&q=archive" in response.content or b"page=2" in response.content
-    second_page = client.get(reverse("orders_completed"), {"q": "archive", "page": 2})
+    next_cursor = response.context["page_obj"].next_cursor
+    assert f"?cursor={next_cursor}&q=archive".encode() in response.content
+    second_page = client.get(reverse("orders_completed"), {"q": "archive", "cursor": next_cursor})
     assert second_page.status_code == 200
     assert len(second_page.context["page_obj"].object_list) == 1
 
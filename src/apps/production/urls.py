@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .views import (
+    dispatch_notifications,
     order_detail,
     order_edit,
     orders_active,
@@ -23,4 +24,9 @@ urlpatterns = [
         send_delayed_notifications,
         name="send_delayed_notifications",
     ),
+    path(
+        "cron/dispatch-notifications/",
+        dispatch_notifications,
+        name="dispatch_notifications",
+    ),
 ]
@@ -1,22 +1,60 @@
 import logging
 import os
+import threading
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Overridable so tests and local runs can point at a fake Bot API server.
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org")
+TELEGRAM_TIMEOUT_SECONDS = 5
+# Upper bound for parallel sends; also the keep-alive pool size of the shared session.
+TELEGRAM_MAX_CONCURRENCY = 8
 logger = logging.getLogger(__name__)
 
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
 
-def send_tg_message(chat_id, text) -> bool:
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+
+@dataclass(frozen=True)
+class DeliveryResult:
+    chat_id: str
+    ok: bool
+    status_code: int | None = None
+    error: str = ""
+
+
+def get_telegram_session() -> requests.Session:
+    """Process-wide keep-alive session, so consecutive sends reuse TCP/TLS connections."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=TELEGRAM_MAX_CONCURRENCY,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def deliver_tg_message(chat_id, text) -> DeliveryResult:
+    url = f"{TELEGRAM_API_BASE_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {"chat_id": chat_id, "text": text}
     try:
-        response = requests.post(url, json=payload, timeout=5)
-    except requests.RequestException:
+        response = get_telegram_session().post(url, json=payload, timeout=TELEGRAM_TIMEOUT_SECONDS)
+    except requests.RequestException as exc:
         logger.exception("Telegram send failed for chat_id=%s", chat_id)
-        return False
+        return DeliveryResult(chat_id=str(chat_id), ok=False, error=str(exc))
 
     if response.status_code != 200:
         logger.warning(
@@ -25,9 +63,30 @@ def send_tg_message(chat_id, text) -> bool:
             response.status_code,
             response.text,
         )
-        return False
+        return DeliveryResult(
+            chat_id=str(chat_id),
+            ok=False,
+            status_code=response.status_code,
+            error=response.text[:500],
+        )
+
+    return DeliveryResult(chat_id=str(chat_id), ok=True, status_code=200)
+
+
+def send_tg_message(chat_id, text) -> bool:
+    return deliver_tg_message(chat_id, text).ok
+
 
-    return True
+def send_tg_messages(
+    messages: Sequence[tuple[str, str]],
+    *,
+    max_workers: int = TELEGRAM_MAX_CONCURRENCY,
+) -> list[DeliveryResult]:
+    """Send (chat_id, text) pairs concurrently; results come back in input order."""
+    if len(messages) <= 1 or max_workers <= 1:
+        return [deliver_tg_message(chat_id, text) for chat_id, text in messages]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(messages))) as pool:
+        return list(pool.map(lambda message: deliver_tg_message(*message), messages))
 
 
 from django.contrib.auth.models import Group
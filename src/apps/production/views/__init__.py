@@ -1,4 +1,7 @@
-from apps.production.views.notifications import send_delayed_notifications
+from apps.production.views.notifications import (
+    dispatch_notifications,
+    send_delayed_notifications,
+)
 from apps.production.views.orders import (
     order_detail,
     order_edit,
@@ -9,6 +12,7 @@ from apps.production.views.orders import (
 )
 
 __all__ = [
+    "dispatch_notifications",
     "order_detail",
     "order_edit",
     "orders_active",
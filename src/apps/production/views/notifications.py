@@ -5,6 +5,7 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
 from apps.production.notifications import send_delayed_order_created_notifications
+from apps.production.outbox import dispatch_pending_notifications
 
 
 def _validate_internal_token(request):
@@ -34,3 +35,24 @@ def send_delayed_notifications(request):
 
     status = send_delayed_order_created_notifications()
     return JsonResponse({"status": status})
+
+
+@csrf_exempt
+def dispatch_notifications(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "invalid method"}, status=405)
+
+    is_valid, error = _validate_internal_token(request)
+    if not is_valid:
+        status = 500 if error == "token not configured" else 403
+        return JsonResponse({"error": error}, status=status)
+
+    result = dispatch_pending_notifications()
+    return JsonResponse(
+        {
+            "sent": result.sent,
+            "retried": result.retried,
+            "failed": result.failed,
+            "deferred": result.deferred,
+        }
+    )
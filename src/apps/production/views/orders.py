@@ -1,17 +1,18 @@
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models import Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
-from django.utils.timezone import localtime
+from django.utils.functional import SimpleLazyObject
 from django.views.decorators.http import require_POST
 
 from apps.catalog.models import Color, Product
+from apps.production.board import get_board_version
 from apps.production.exceptions import InvalidStatusTransition
 from apps.production.forms import OrderForm, OrderStatusUpdateForm
 from apps.production.domain.order_statuses import (
-    ACTIVE_LIST_ORDER,
     status_choices,
     status_choices_for_active_page,
     status_label_map,
@@ -20,8 +21,15 @@ from apps.production.domain.order_statuses import (
     transition_map as build_transition_map,
 )
 from apps.production.domain.status import STATUS_DONE
-from apps.production.models import ProductionOrder, ProductionOrderStatusHistory
+from apps.production.models import ProductionOrder
+from apps.production.queries import get_order_detail
+from apps.production.search import search_orders
 from apps.production.services import change_production_order_status, create_production_order
+from apps.ui.pagination import (
+    approximate_count,
+    paginate_keyset,
+    query_string_without_cursor,
+)
 
 STATUS_LABELS = status_label_map(include_legacy=True)
 CURRENT_STATUS_OPTIONS = status_choices(include_legacy=False, include_terminal=False)
@@ -37,17 +45,17 @@ def _sync_sales_line_after_order_done(sales_order_line) -> None:
     sync_sales_order_line_production(sales_order_line)
 
 
+# Served by prod_order_active_idx; status_rank is a stored column, see ProductionOrder.
+ACTIVE_ORDERING = ("status_rank", "-created_at", "-id")
+COMPLETED_ORDERING = ("-finished_at", "-id")
+RANKED_COMPLETED_ORDERING = ("-_search_rank", *COMPLETED_ORDERING)
+
+
 def _filtered_current_orders_queryset(*, filter_value: str):
-    status_rank = Case(
-        *[When(status=code, then=Value(i)) for i, code in enumerate(ACTIVE_LIST_ORDER)],
-        default=Value(999),
-        output_field=IntegerField(),
-    )
     queryset = (
         ProductionOrder.objects.select_related("product", "variant", "variant__color")
         .exclude(status=STATUS_DONE)
-        .annotate(_status_rank=status_rank)
-        .order_by("_status_rank", "-created_at", "-id")
+        .order_by(*ACTIVE_ORDERING)
     )
 
     status_values = {value for value, _ in CURRENT_STATUS_OPTIONS}
@@ -90,12 +98,10 @@ def orders_active(request):
     form.fields["new_status"].choices = [("", "Новий статус")] + list(
         status_choices_for_active_page()
     )
-    paginator = Paginator(orders_queryset, 50)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-    query_params = request.GET.copy()
-    query_params.pop("page", None)
-    query_string = query_params.urlencode()
+    cursor = request.GET.get("cursor")
+    # Evaluated only when the board fragment is not cached for this board version.
+    page_obj = SimpleLazyObject(lambda: _active_orders_page(orders_queryset, cursor))
+    query_string = query_string_without_cursor(request)
 
     return render(
         request,
@@ -103,16 +109,30 @@ def orders_active(request):
         {
             "page_title": "У роботі",
             "form": form,
-            "orders": page_obj.object_list,
+            "orders": SimpleLazyObject(lambda: page_obj.object_list),
             "page_obj": page_obj,
             "filter_value": filter_value,
             "filter_options": COMBINED_FILTER_OPTIONS,
             "query_string": query_string,
             "transition_map": TRANSITION_MAP,
+            "board_version": get_board_version(),
+            "board_cursor": cursor or "",
+            "board_cache_timeout": settings.ORDER_BOARD_CACHE_TIMEOUT,
         },
     )
 
 
+def _active_orders_page(orders_queryset, cursor):
+    page_obj = paginate_keyset(
+        orders_queryset,
+        ordering=ACTIVE_ORDERING,
+        cursor=cursor,
+        per_page=50,
+    )
+    page_obj.count, page_obj.count_is_approximate = approximate_count(orders_queryset)
+    return page_obj
+
+
 @login_required
 @require_POST
 def orders_bulk_status(request):
@@ -180,24 +200,17 @@ def orders_completed(request):
         ProductionOrder.objects.only("id", "finished_at", "product_id", "variant_id")
         .select_related("product", "variant", "variant__color")
         .filter(status=STATUS_DONE)
-        .order_by("-finished_at")
     )
-    if search_query:
-        search_filters = (
-            Q(product__name__icontains=search_query)
-            | Q(variant__color__name__icontains=search_query)
-            | Q(comment__icontains=search_query)
-        )
-        if search_query.isdigit():
-            search_filters |= Q(id=int(search_query))
-        orders = orders.filter(search_filters)
+    orders, is_ranked = search_orders(orders, search_query)
 
-    paginator = Paginator(orders, 20)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-    query_params = request.GET.copy()
-    query_params.pop("page", None)
-    query_string = query_params.urlencode()
+    page_obj = paginate_keyset(
+        orders,
+        ordering=RANKED_COMPLETED_ORDERING if is_ranked else COMPLETED_ORDERING,
+        cursor=request.GET.get("cursor"),
+        per_page=20,
+    )
+    page_obj.count, page_obj.count_is_approximate = approximate_count(orders)
+    query_string = query_string_without_cursor(request)
 
     return render(
         request,
@@ -247,40 +260,15 @@ def orders_create(request):
 
 @login_required
 def order_detail(request, pk):
-    order = get_object_or_404(ProductionOrder, id=pk)
-    statuses = ProductionOrderStatusHistory.objects.filter(order=order).order_by("-changed_at")
-
-    order_data = {
-        "id": order.id,
-        "product": order.product.name,
-        "color": order.variant.color.name if order.variant and order.variant.color else "-",
-        "is_embroidery": order.is_embroidery,
-        "comment": order.comment,
-        "is_urgent": order.is_urgent,
-        "is_etsy": order.is_etsy,
-        "created_at": localtime(order.created_at) if order.created_at else None,
-        "finished_at": localtime(order.finished_at) if order.finished_at else None,
-        "status_code": order.status,
-        "status_display": order.get_status_display(),
-        "status_history": [
-            {
-                "id": status.id,
-                "new_status": status.new_status,
-                "new_status_display": dict(ProductionOrderStatusHistory.STATUS_CHOICES).get(
-                    status.new_status, "Unknown"
-                ),
-                "changed_by": status.changed_by.username if status.changed_by else "Unknown",
-                "changed_at": localtime(status.changed_at) if status.changed_at else None,
-            }
-            for status in statuses
-        ],
-    }
+    order = get_order_detail(pk)
+    if order is None:
+        raise Http404
 
     return render(
         request,
         "orders/detail.html",
         {
-            "order": order_data,
+            "order": order,
             "page_title": f"Замовлення #{order.id}",
             "order_edit_url": reverse("order_edit", args=[order.id]),
         },
@@ -59,3 +59,19 @@ def resolve_sales_order_status(
     if next_status == status:
         return None
     return next_status
+
+
+def resolve_sales_order_status_from_counts(
+    *,
+    status: str,
+    total_lines: int,
+    done_lines: int,
+) -> str | None:
+    """Same rules as `resolve_sales_order_status`, from the order's line rollup."""
+    if status in TERMINAL_SALES_ORDER_STATUSES or total_lines == 0:
+        return None
+
+    next_status = STATUS_READY if done_lines >= total_lines else STATUS_PRODUCTION
+    if next_status == status:
+        return None
+    return next_status
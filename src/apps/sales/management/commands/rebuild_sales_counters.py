@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.sales.services import rebuild_sales_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute sales line production counters and order line rollups from scratch."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            changed = rebuild_sales_counters()
+        self.stdout.write(f"Lines fixed: {changed['lines']}")
+        self.stdout.write(f"Orders fixed: {changed['orders']}")
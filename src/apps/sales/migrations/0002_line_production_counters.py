@@ -0,0 +1,77 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:09
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    SalesOrder = apps.get_model("sales", "SalesOrder")
+    SalesOrderLine = apps.get_model("sales", "SalesOrderLine")
+    ProductionOrder = apps.get_model("production", "ProductionOrder")
+
+    def count_orders(**filters):
+        return Coalesce(
+            Subquery(
+                ProductionOrder.objects.filter(sales_order_line_id=OuterRef("pk"), **filters)
+                .values("sales_order_line_id")
+                .annotate(n=Count("id"))
+                .values("n")[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+
+    SalesOrderLine.objects.update(
+        total_production_orders=count_orders(),
+        finished_production_orders=count_orders(status="done"),
+    )
+
+    def count_lines(**filters):
+        return Coalesce(
+            Subquery(
+                SalesOrderLine.objects.filter(sales_order_id=OuterRef("pk"), **filters)
+                .values("sales_order_id")
+                .annotate(n=Count("id"))
+                .values("n")[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+
+    SalesOrder.objects.update(
+        total_lines=count_lines(),
+        done_lines=count_lines(production_status="done"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0001_initial'),
+        ('production', '0002_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesorder',
+            name='done_lines',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salesorder',
+            name='total_lines',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salesorderline',
+            name='finished_production_orders',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salesorderline',
+            name='total_production_orders',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
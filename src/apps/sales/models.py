@@ -66,6 +66,9 @@ class SalesOrder(models.Model):
         blank=True,
     )
     paid_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    # Denormalized rollup of line production statuses; see sales.services.
+    total_lines = models.PositiveIntegerField(default=0)
+    done_lines = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -121,6 +124,9 @@ class SalesOrderLine(models.Model):
         choices=ProductionStatus.choices,
         default=ProductionStatus.PENDING,
     )
+    # Denormalized counts of linked production orders; see sales.services.
+    total_production_orders = models.PositiveIntegerField(default=0)
+    finished_production_orders = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ("id",)
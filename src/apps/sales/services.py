@@ -1,16 +1,31 @@
 from __future__ import annotations
 
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from functools import reduce
+from operator import or_
 from typing import TYPE_CHECKING
 
 from django.db import transaction
-
-from apps.catalog.models import BundleColorMapping, BundleComponent, BundlePresetComponent
-from apps.catalog.variants import resolve_or_create_variant
+from django.db.models import Count, F, Q
+
+from apps.catalog.models import (
+    BundleColorMapping,
+    BundleComponent,
+    BundlePresetComponent,
+    Product,
+)
+from apps.catalog.variants import VariantKey, resolve_or_create_variants_bulk
 from apps.inventory.domain import VariantId, WarehouseId
 from apps.production.domain.status import STATUS_DONE
-from apps.sales.domain.policies import resolve_line_production_status, resolve_sales_order_status
+from apps.sales.domain.status import STATUS_CANCELLED
+from apps.sales.domain.policies import (
+    TERMINAL_SALES_ORDER_STATUSES,
+    resolve_line_production_status,
+    resolve_sales_order_status_from_counts,
+)
 from apps.sales.models import SalesOrder, SalesOrderLine, SalesOrderLineComponentSelection
-from apps.warehouses.services import get_default_warehouse
+from apps.warehouses.services import get_default_warehouse_id
 
 if TYPE_CHECKING:
     from django.contrib.auth.models import AbstractBaseUser
@@ -32,31 +47,57 @@ def create_sales_order(
         source=source,
         customer_info=customer_info,
         notes=notes,
+        total_lines=len(lines_data),
     )
 
-    for line_data in lines_data:
-        product_id = int(line_data["product_id"])
-        variant_id = line_data.get("variant_id")
-        if variant_id is None:
-            variant = resolve_or_create_variant(
-                product_id=product_id,
-                color_id=line_data.get("color_id"),
-                primary_material_color_id=line_data.get("primary_material_color_id"),
-                secondary_material_color_id=line_data.get("secondary_material_color_id"),
-            )
-            variant_id = variant.id if variant else None
-
-        line = SalesOrderLine.objects.create(
+    products = Product.objects.in_bulk({int(line_data["product_id"]) for line_data in lines_data})
+    lines = [
+        SalesOrderLine(
             sales_order=order,
-            product_id=product_id,
-            variant_id=variant_id,
+            product_id=int(line_data["product_id"]),
+            variant_id=line_data.get("variant_id"),
             bundle_preset_id=line_data.get("bundle_preset_id"),
             quantity=int(line_data.get("quantity", 1)),
             production_mode=str(line_data.get("production_mode", SalesOrderLine.ProductionMode.AUTO)),
         )
+        for line_data in lines_data
+    ]
+    for line in lines:
+        if line.product_id in products:
+            line.product = products[line.product_id]
+
+    component_plan = _plan_bundle_components(
+        [
+            (index, line, line_data)
+            for index, (line, line_data) in enumerate(zip(lines, lines_data))
+            if line.is_bundle
+        ]
+    )
+
+    keys = [
+        _variant_key(line.product_id, line_data)
+        for line, line_data in zip(lines, lines_data)
+        if line.variant_id is None
+    ]
+    keys.extend(key for planned in component_plan.values() for _, _, key in planned if key)
+    variant_ids = resolve_or_create_variants_bulk(keys)
+
+    for line, line_data in zip(lines, lines_data):
+        if line.variant_id is None:
+            line.variant_id = variant_ids.get(_variant_key(line.product_id, line_data))
+    SalesOrderLine.objects.bulk_create(lines)
 
-        if line.is_bundle:
-            _save_bundle_component_variants(line=line, line_data=line_data)
+    SalesOrderLineComponentSelection.objects.bulk_create(
+        [
+            SalesOrderLineComponentSelection(
+                order_line=line,
+                component_id=component_id,
+                variant_id=variant_id if key is None else variant_ids.get(key),
+            )
+            for index, line in enumerate(lines)
+            for component_id, variant_id, key in component_plan.get(index, ())
+        ]
+    )
 
     if create_production_orders:
         if created_by is None:
@@ -78,172 +119,373 @@ def create_production_orders_for_sales_order(
     orders_url: str | None = None,
 ) -> list["ProductionOrder"]:
     from apps.catalog.models import Variant
-    from apps.inventory.services import get_stock_quantity
-    from apps.production.services import create_production_order
-
-    created_orders: list[ProductionOrder] = []
-    available_stock_cache: dict[int, int] = {}
-    warehouse_id = WarehouseId(get_default_warehouse().id)
-
-    for line in sales_order.lines.select_related("product", "variant"):
-        for variant_id, quantity_required in _iter_line_variant_requirements(line=line):
-            quantity_to_produce = _resolve_quantity_to_produce(
-                variant_id=variant_id,
-                required_qty=quantity_required,
+    from apps.inventory.reservations import ReservationRequest, reserve_stock
+    from apps.production.services import ProductionOrderDraft, create_production_orders_bulk
+
+    warehouse_id = WarehouseId(get_default_warehouse_id())
+    lines = list(
+        sales_order.lines.select_related("product").prefetch_related("component_selections")
+    )
+    component_quantities = _bundle_component_quantities(lines)
+    required: Counter[tuple[int, int]] = Counter()
+    line_by_id = {line.id: line for line in lines}
+    for line in lines:
+        for variant_id, quantity in _iter_line_variant_requirements(
+            line=line, component_quantities=component_quantities
+        ):
+            required[(line.id, variant_id)] += quantity
+    variants = Variant.objects.select_related("product").in_bulk(
+        {variant_id for _, variant_id in required}
+    )
+
+    # Reserve whatever is free first; row locks keep concurrent orders from sharing units.
+    reserved: Counter[tuple[int, int]] = Counter()
+    for reservation in reserve_stock(
+        [
+            ReservationRequest(
                 warehouse_id=warehouse_id,
-                available_stock_cache=available_stock_cache,
-                get_stock_quantity_fn=get_stock_quantity,
+                variant_id=VariantId(variant_id),
+                quantity=quantity,
+                sales_order_line_id=line_id,
             )
-            variant = Variant.objects.select_related("product").get(id=variant_id)
-            for _ in range(quantity_to_produce):
-                created_orders.append(
-                    create_production_order(
-                        product=variant.product,
-                        variant=variant,
-                        color=None,
-                        is_embroidery=False,
-                        is_urgent=False,
-                        is_etsy=False,
-                        comment=f"Sales order #{line.sales_order_id}, line #{line.id}",
-                        created_by=created_by,
-                        orders_url=orders_url,
-                        sales_order_line=line,
-                    )
+            for (line_id, variant_id), quantity in required.items()
+        ],
+        user=created_by,
+        partial=True,
+    ):
+        reserved[(reservation.sales_order_line_id, reservation.stock_record.variant_id)] += (
+            reservation.quantity
+        )
+
+    drafts: list[ProductionOrderDraft] = []
+    for (line_id, variant_id), quantity in required.items():
+        quantity_to_produce = quantity - reserved[(line_id, variant_id)]
+        if quantity_to_produce:
+            drafts.append(
+                ProductionOrderDraft(
+                    variant=variants[variant_id],
+                    quantity=quantity_to_produce,
+                    comment=f"Sales order #{sales_order.id}, line #{line_id}",
+                    sales_order_line=line_by_id[line_id],
                 )
+            )
 
-        sync_sales_order_line_production(line)
+    created_orders = create_production_orders_bulk(
+        drafts=drafts,
+        created_by=created_by,
+        orders_url=orders_url,
+    )
+    for line in lines:
+        _sync_line_production_status(line)
 
     _sync_sales_order_status(sales_order)
     return created_orders
 
 
 def sync_sales_order_line_production(line: SalesOrderLine) -> None:
-    total_orders = line.production_orders.count()
-    finished_orders = line.production_orders.filter(status=STATUS_DONE).count()
-    new_status = resolve_line_production_status(
-        production_mode=line.production_mode,
-        total_orders=total_orders,
-        finished_orders=finished_orders,
+    _sync_line_production_status(line)
+    _sync_sales_order_status(line.sales_order)
+
+
+def reserve_produced_units(
+    orders: Iterable["ProductionOrder"],
+    *,
+    warehouse_id: WarehouseId,
+    user: "AbstractBaseUser | None" = None,
+) -> None:
+    """Hold finished units made for open sales lines, so settlement ships them with the rest.
+
+    Called right after the units were posted to `warehouse_id`.
+    """
+    from apps.inventory.reservations import ReservationRequest, reserve_stock
+
+    made_for_line = Counter(
+        (order.sales_order_line_id, order.variant_id)
+        for order in orders
+        if order.sales_order_line_id and order.variant_id
     )
+    open_line_ids = set(
+        SalesOrderLine.objects.filter(id__in={line_id for line_id, _ in made_for_line})
+        .exclude(sales_order__status__in=TERMINAL_SALES_ORDER_STATUSES)
+        .values_list("id", flat=True)
+    )
+    requests = [
+        ReservationRequest(
+            warehouse_id=warehouse_id,
+            variant_id=VariantId(variant_id),
+            quantity=quantity,
+            sales_order_line_id=line_id,
+        )
+        for (line_id, variant_id), quantity in made_for_line.items()
+        if line_id in open_line_ids
+    ]
+    if requests:
+        # Partial: completing production must never fail over a reservation.
+        reserve_stock(requests, user=user, partial=True)
 
-    if line.production_status != new_status:
-        line.production_status = new_status
-        line.save(update_fields=["production_status"])
 
-    _sync_sales_order_status(line.sales_order)
+@transaction.atomic
+def settle_sales_order_reservations(
+    sales_order: SalesOrder, *, user: "AbstractBaseUser | None" = None
+) -> int:
+    """Ship a closed order's reserved units, or free them if it was cancelled.
+
+    Runs when the order reaches a terminal status; returns how many reservations it settled.
+    """
+    from apps.inventory.reservations import (
+        active_reservations_for_lines,
+        consume_reservations,
+        release_reservations,
+    )
 
+    if sales_order.status not in TERMINAL_SALES_ORDER_STATUSES:
+        return 0
+    reservation_ids = [
+        reservation.pk
+        for reservation in active_reservations_for_lines(
+            sales_order.lines.values_list("id", flat=True)
+        )
+    ]
+    if not reservation_ids:
+        return 0
+    if sales_order.status == STATUS_CANCELLED:
+        return release_reservations(reservation_ids)
+    return len(
+        consume_reservations(
+            reservation_ids, user=user, notes=f"Sales order #{sales_order.id}"
+        )
+    )
 
-def _save_bundle_component_variants(*, line: SalesOrderLine, line_data: dict[str, object]) -> None:
-    if line.bundle_preset_id:
-        preset_components = BundlePresetComponent.objects.filter(
-            preset_id=line.bundle_preset_id
-        ).select_related("component", "primary_material_color", "secondary_material_color")
-        for preset_component in preset_components:
-            variant = resolve_or_create_variant(
-                product_id=preset_component.component_id,
-                primary_material_color_id=preset_component.primary_material_color_id,
-                secondary_material_color_id=preset_component.secondary_material_color_id,
-            )
-            SalesOrderLineComponentSelection.objects.create(
-                order_line=line,
-                component=preset_component.component,
-                variant=variant,
-            )
-        return
 
-    bundle_color_id = line_data.get("color_id")
-    if bundle_color_id:
-        mappings = BundleColorMapping.objects.filter(
-            bundle_id=line.product_id,
-            bundle_color_id=bundle_color_id,
-        ).select_related("component", "component_color")
-        for mapping in mappings:
-            variant = resolve_or_create_variant(
-                product_id=mapping.component_id,
-                color_id=mapping.component_color_id,
-            )
-            SalesOrderLineComponentSelection.objects.create(
-                order_line=line,
-                component=mapping.component,
-                variant=variant,
-            )
-        return
+def resync_sales_lines(line_ids: Iterable[int]) -> None:
+    """Re-derive line and order statuses after their counters moved outside the services."""
+    for line in SalesOrderLine.objects.filter(id__in=set(line_ids)).select_related("sales_order"):
+        sync_sales_order_line_production(line)
 
-    component_variants = line_data.get("component_variants")
-    if not component_variants:
-        return
 
-    for item in component_variants:
-        if not isinstance(item, dict):
-            continue
-        component_id = int(item["component_id"])
-        variant_id = item.get("variant_id")
-        if variant_id is None:
-            variant = resolve_or_create_variant(
-                product_id=component_id,
-                color_id=item.get("color_id"),
-                primary_material_color_id=item.get("primary_material_color_id"),
-                secondary_material_color_id=item.get("secondary_material_color_id"),
-            )
-            variant_id = variant.id if variant else None
-        SalesOrderLineComponentSelection.objects.create(
-            order_line=line,
-            component_id=component_id,
-            variant_id=variant_id,
+def record_production_orders_created(orders: Iterable["ProductionOrder"]) -> None:
+    """Count new production orders against their sales lines (one UPDATE per batch size)."""
+    _bump_line_counter("total_production_orders", orders)
+
+
+def record_production_orders_finished(orders: Iterable["ProductionOrder"]) -> None:
+    _bump_line_counter("finished_production_orders", orders)
+
+
+def record_production_orders_removed(orders: Iterable["ProductionOrder"]) -> None:
+    """Take deleted or reassigned orders off their lines' counters, by their stored status."""
+    orders = list(orders)
+    _bump_line_counter("total_production_orders", orders, sign=-1)
+    _bump_line_counter(
+        "finished_production_orders",
+        [order for order in orders if order.status == STATUS_DONE],
+        sign=-1,
+    )
+
+
+def rebuild_sales_counters() -> dict[str, int]:
+    """Recompute every denormalized counter from source rows; returns how many rows changed."""
+    lines = list(
+        SalesOrderLine.objects.annotate(
+            actual_total=Count("production_orders"),
+            actual_finished=Count(
+                "production_orders", filter=Q(production_orders__status=STATUS_DONE)
+            ),
         )
+    )
+    stale_lines = [
+        line
+        for line in lines
+        if (line.total_production_orders, line.finished_production_orders)
+        != (line.actual_total, line.actual_finished)
+    ]
+    for line in stale_lines:
+        line.total_production_orders = line.actual_total
+        line.finished_production_orders = line.actual_finished
+    SalesOrderLine.objects.bulk_update(
+        stale_lines,
+        ["total_production_orders", "finished_production_orders"],
+        batch_size=500,
+    )
 
+    orders = list(
+        SalesOrder.objects.annotate(
+            actual_total=Count("lines"),
+            actual_done=Count(
+                "lines",
+                filter=Q(lines__production_status=SalesOrderLine.ProductionStatus.DONE),
+            ),
+        )
+    )
+    stale_orders = [
+        order
+        for order in orders
+        if (order.total_lines, order.done_lines) != (order.actual_total, order.actual_done)
+    ]
+    for order in stale_orders:
+        order.total_lines = order.actual_total
+        order.done_lines = order.actual_done
+    SalesOrder.objects.bulk_update(stale_orders, ["total_lines", "done_lines"], batch_size=500)
+    return {"lines": len(stale_lines), "orders": len(stale_orders)}
+
+
+def _variant_key(product_id: int, data: dict[str, object]) -> VariantKey:
+    return VariantKey(
+        product_id=product_id,
+        color_id=_optional_id(data.get("color_id")),
+        primary_material_color_id=_optional_id(data.get("primary_material_color_id")),
+        secondary_material_color_id=_optional_id(data.get("secondary_material_color_id")),
+    )
+
+
+def _optional_id(value: object) -> int | None:
+    return int(value) if value not in (None, "") else None
+
+
+def _plan_bundle_components(
+    bundle_lines: list[tuple[int, SalesOrderLine, dict[str, object]]],
+) -> dict[int, list[tuple[int, int | None, VariantKey | None]]]:
+    """Work out component selections for bundle lines with two queries at most.
 
-def _iter_line_variant_requirements(*, line: SalesOrderLine) -> list[tuple[int, int]]:
+    Returns, per line index, (component_id, explicit variant_id, key to resolve) triples.
+    Presets win over color mappings, which win over explicit `component_variants`.
+    """
+    preset_ids = {line.bundle_preset_id for _, line, _ in bundle_lines if line.bundle_preset_id}
+    mapping_pairs = {
+        (line.product_id, int(line_data["color_id"]))
+        for _, line, line_data in bundle_lines
+        if not line.bundle_preset_id and line_data.get("color_id")
+    }
+
+    preset_components: dict[int, list[BundlePresetComponent]] = {}
+    if preset_ids:
+        for preset_component in BundlePresetComponent.objects.filter(preset_id__in=preset_ids):
+            preset_components.setdefault(preset_component.preset_id, []).append(preset_component)
+
+    mappings: dict[tuple[int, int], list[BundleColorMapping]] = {}
+    if mapping_pairs:
+        condition = reduce(
+            or_,
+            (Q(bundle_id=bundle_id, bundle_color_id=color_id) for bundle_id, color_id in mapping_pairs),
+        )
+        for mapping in BundleColorMapping.objects.filter(condition):
+            mappings.setdefault((mapping.bundle_id, mapping.bundle_color_id), []).append(mapping)
+
+    plan: dict[int, list[tuple[int, int | None, VariantKey | None]]] = {}
+    for index, line, line_data in bundle_lines:
+        if line.bundle_preset_id:
+            plan[index] = [
+                (
+                    preset_component.component_id,
+                    None,
+                    VariantKey(
+                        product_id=preset_component.component_id,
+                        primary_material_color_id=preset_component.primary_material_color_id,
+                        secondary_material_color_id=preset_component.secondary_material_color_id,
+                    ),
+                )
+                for preset_component in preset_components.get(line.bundle_preset_id, [])
+            ]
+        elif line_data.get("color_id"):
+            plan[index] = [
+                (
+                    mapping.component_id,
+                    None,
+                    VariantKey(product_id=mapping.component_id, color_id=mapping.component_color_id),
+                )
+                for mapping in mappings.get((line.product_id, int(line_data["color_id"])), [])
+            ]
+        else:
+            items = [item for item in line_data.get("component_variants") or () if isinstance(item, dict)]
+            plan[index] = [
+                (
+                    int(item["component_id"]),
+                    item.get("variant_id"),
+                    None
+                    if item.get("variant_id") is not None
+                    else _variant_key(int(item["component_id"]), item),
+                )
+                for item in items
+            ]
+    return plan
+
+
+def _bundle_component_quantities(lines: list[SalesOrderLine]) -> dict[tuple[int, int], int]:
+    bundle_ids = {line.product_id for line in lines if line.is_bundle}
+    if not bundle_ids:
+        return {}
+    return {
+        (bundle_id, component_id): quantity
+        for bundle_id, component_id, quantity in BundleComponent.objects.filter(
+            bundle_id__in=bundle_ids
+        ).values_list("bundle_id", "component_id", "quantity")
+    }
+
+
+def _iter_line_variant_requirements(
+    *,
+    line: SalesOrderLine,
+    component_quantities: dict[tuple[int, int], int] | None = None,
+) -> list[tuple[int, int]]:
     if not line.is_bundle:
         if line.variant_id is None:
             raise ValueError("Sales order line requires variant")
         return [(line.variant_id, line.quantity)]
 
-    selections = list(line.component_selections.select_related("component", "variant"))
+    selections = list(line.component_selections.all())
     if not selections:
         raise ValueError("Bundle line requires component selections")
 
-    quantities_by_component = {
-        component_id: quantity
-        for component_id, quantity in BundleComponent.objects.filter(
-            bundle_id=line.product_id
-        ).values_list("component_id", "quantity")
-    }
+    if component_quantities is None:
+        component_quantities = _bundle_component_quantities([line])
 
     requirements: list[tuple[int, int]] = []
     for selection in selections:
         if selection.variant_id is None:
             raise ValueError("Bundle component selection requires variant")
-        component_qty = quantities_by_component.get(selection.component_id, 1)
+        component_qty = component_quantities.get((line.product_id, selection.component_id), 1)
         requirements.append((selection.variant_id, line.quantity * component_qty))
     return requirements
 
 
-def _resolve_quantity_to_produce(
-    *,
-    variant_id: int,
-    required_qty: int,
-    warehouse_id: WarehouseId,
-    available_stock_cache: dict[int, int],
-    get_stock_quantity_fn,
-) -> int:
-    available_qty = available_stock_cache.get(variant_id)
-    if available_qty is None:
-        available_qty = get_stock_quantity_fn(
-            warehouse_id=warehouse_id,
-            variant_id=VariantId(variant_id),
-        )
+def _bump_line_counter(field: str, orders: Iterable["ProductionOrder"], *, sign: int = 1) -> None:
+    per_line = Counter(order.sales_order_line_id for order in orders if order.sales_order_line_id)
+    line_ids_by_delta: dict[int, list[int]] = defaultdict(list)
+    for line_id, count in per_line.items():
+        line_ids_by_delta[sign * count].append(line_id)
+    for delta, line_ids in line_ids_by_delta.items():
+        SalesOrderLine.objects.filter(id__in=line_ids).update(**{field: F(field) + delta})
+
 
-    used_from_stock = min(required_qty, available_qty)
-    available_stock_cache[variant_id] = available_qty - used_from_stock
-    return required_qty - used_from_stock
+def _sync_line_production_status(line: SalesOrderLine) -> None:
+    line.refresh_from_db(
+        fields=["production_status", "total_production_orders", "finished_production_orders"]
+    )
+    new_status = resolve_line_production_status(
+        production_mode=line.production_mode,
+        total_orders=line.total_production_orders,
+        finished_orders=line.finished_production_orders,
+    )
+    if line.production_status == new_status:
+        return
+
+    done_delta = int(new_status == SalesOrderLine.ProductionStatus.DONE) - int(
+        line.production_status == SalesOrderLine.ProductionStatus.DONE
+    )
+    line.production_status = new_status
+    line.save(update_fields=["production_status"])
+    if done_delta:
+        SalesOrder.objects.filter(id=line.sales_order_id).update(
+            done_lines=F("done_lines") + done_delta
+        )
 
 
 def _sync_sales_order_status(sales_order: SalesOrder) -> None:
-    lines = list(sales_order.lines.all())
-    new_status = resolve_sales_order_status(
+    sales_order.refresh_from_db(fields=["status", "total_lines", "done_lines"])
+    new_status = resolve_sales_order_status_from_counts(
         status=sales_order.status,
-        line_production_statuses=(line.production_status for line in lines),
+        total_lines=sales_order.total_lines,
+        done_lines=sales_order.done_lines,
     )
     if new_status is None:
         return
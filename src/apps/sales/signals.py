@@ -0,0 +1,46 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.sales.models import SalesOrder, SalesOrderLine
+from apps.sales.services import settle_sales_order_reservations
+
+
+# Lines written with bulk_create (create_sales_order) set the rollup themselves.
+@receiver(post_save, sender=SalesOrderLine)
+def count_created_line(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _adjust_line_rollup(instance, 1)
+
+
+@receiver(post_delete, sender=SalesOrderLine)
+def uncount_deleted_line(sender, instance, **kwargs):
+    _adjust_line_rollup(instance, -1)
+
+
+@receiver(pre_save, sender=SalesOrder)
+def remember_previous_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_status = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and "status" not in update_fields:
+        return
+    instance._previous_status = (
+        SalesOrder.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=SalesOrder)
+def settle_reservations_on_close(sender, instance, created, raw=False, **kwargs):
+    # Shipping or completing takes the reserved units off stock; cancelling frees them.
+    previous = getattr(instance, "_previous_status", None)
+    if created or raw or previous is None or previous == instance.status:
+        return
+    settle_sales_order_reservations(instance)
+
+
+def _adjust_line_rollup(line: SalesOrderLine, delta: int) -> None:
+    updates = {"total_lines": F("total_lines") + delta}
+    if line.production_status == SalesOrderLine.ProductionStatus.DONE:
+        updates["done_lines"] = F("done_lines") + delta
+    SalesOrder.objects.filter(id=line.sales_order_id).update(**updates)
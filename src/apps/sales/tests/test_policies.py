@@ -1,4 +1,8 @@
-from apps.sales.domain.policies import resolve_line_production_status, resolve_sales_order_status
+from apps.sales.domain.policies import (
+    resolve_line_production_status,
+    resolve_sales_order_status,
+    resolve_sales_order_status_from_counts,
+)
 from apps.sales.domain.status import (
     PRODUCTION_STATUS_DONE,
     PRODUCTION_STATUS_IN_PROGRESS,
@@ -95,3 +99,19 @@ def test_resolve_sales_order_status_is_none_for_terminal_or_unchanged():
         )
         is None
     )
+
+
+def test_resolve_sales_order_status_from_counts():
+    assert (
+        resolve_sales_order_status_from_counts(status=STATUS_NEW, total_lines=2, done_lines=1)
+        == STATUS_PRODUCTION
+    )
+    assert (
+        resolve_sales_order_status_from_counts(status=STATUS_PRODUCTION, total_lines=2, done_lines=2)
+        == STATUS_READY
+    )
+    assert resolve_sales_order_status_from_counts(status=STATUS_NEW, total_lines=0, done_lines=0) is None
+    assert (
+        resolve_sales_order_status_from_counts(status=STATUS_CANCELLED, total_lines=1, done_lines=1)
+        is None
+    )
@@ -1,12 +1,31 @@
+from io import StringIO
 from unittest.mock import patch
 
 import pytest
+from django.core.management import call_command
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
+from apps.catalog.models import BundleColorMapping, BundlePreset, BundlePresetComponent
 from apps.catalog.tests.conftest import ColorFactory, ProductFactory
 from apps.accounts.tests.conftest import UserFactory
-from apps.sales.models import SalesOrder
-from apps.sales.services import create_production_orders_for_sales_order, create_sales_order
+from apps.materials.models import Material, MaterialColor
+from apps.catalog.models import Variant
+from apps.inventory.models import ProductStockMovement
+from apps.inventory.services import add_to_stock
+from apps.production.models import NotificationOutbox, ProductionOrderStatusHistory
+from apps.sales.models import SalesOrder, SalesOrderLine, SalesOrderLineComponentSelection
+from apps.user_settings.models import NotificationSetting
+from apps.warehouses.services import clear_local_warehouse_registry, get_default_warehouse
+from apps.production.domain.status import STATUS_DONE
+from apps.production.services import change_production_order_status
+from apps.sales.services import (
+    create_production_orders_for_sales_order,
+    create_sales_order,
+    rebuild_sales_counters,
+    sync_sales_order_line_production,
+)
 
 
 @pytest.mark.django_db
@@ -86,3 +105,209 @@ def test_create_sales_order_with_production_orders_works_when_legacy_writes_are_
 
     assert order.lines.count() == 1
     assert order.lines.get().production_orders.count() == 1
+
+
+def _bundle_fixtures():
+    felt = Material.objects.create(name="Felt")
+    grey = MaterialColor.objects.create(material=felt, name="Grey", code=1)
+    bundle = ProductFactory(is_bundle=True)
+    component = ProductFactory(is_bundle=False)
+    bundle_color = ColorFactory()
+    BundleColorMapping.objects.create(
+        bundle=bundle,
+        bundle_color=bundle_color,
+        component=component,
+        component_color=ColorFactory(),
+    )
+    preset = BundlePreset.objects.create(bundle=bundle, name="Grey")
+    BundlePresetComponent.objects.create(
+        preset=preset, component=component, primary_material_color=grey
+    )
+    return bundle, bundle_color, preset
+
+
+def _mixed_lines(count: int, *, plain, color, bundle, bundle_color, preset):
+    lines = []
+    for i in range(count):
+        if i % 3 == 0:
+            lines.append({"product_id": plain.id, "color_id": color.id, "quantity": 2})
+        elif i % 3 == 1:
+            lines.append({"product_id": bundle.id, "color_id": bundle_color.id})
+        else:
+            lines.append({"product_id": bundle.id, "bundle_preset_id": preset.id})
+    return lines
+
+
+@pytest.mark.django_db
+def test_create_sales_order_saves_bundle_component_selections():
+    bundle, bundle_color, preset = _bundle_fixtures()
+    plain = ProductFactory(is_bundle=False)
+
+    order = create_sales_order(
+        source=SalesOrder.Source.WHOLESALE,
+        customer_info="ТОВ Набори",
+        lines_data=_mixed_lines(
+            3, plain=plain, color=ColorFactory(), bundle=bundle, bundle_color=bundle_color, preset=preset
+        ),
+    )
+
+    lines = list(order.lines.all())
+    assert [line.quantity for line in lines] == [2, 1, 1]
+    assert lines[0].variant_id is not None
+    mapped, preset_selection = (
+        SalesOrderLineComponentSelection.objects.get(order_line=line) for line in lines[1:]
+    )
+    assert mapped.variant.color_id is not None
+    assert preset_selection.variant.primary_material_color_id is not None
+    assert preset_selection.variant.color_id is None
+
+
+@pytest.mark.django_db
+def test_create_sales_order_query_count_does_not_grow_with_lines():
+    bundle, bundle_color, preset = _bundle_fixtures()
+    plain = ProductFactory(is_bundle=False)
+    color = ColorFactory()
+    fixtures = dict(plain=plain, color=color, bundle=bundle, bundle_color=bundle_color, preset=preset)
+
+    query_counts = []
+    # The first order creates the variants; later ones find them with the same single SELECT.
+    for count in (3, 3, 90):
+        with CaptureQueriesContext(connection) as queries:
+            create_sales_order(
+                source=SalesOrder.Source.WHOLESALE,
+                customer_info=f"ТОВ {count}",
+                lines_data=_mixed_lines(count, **fixtures),
+            )
+        query_counts.append(len(queries))
+
+    assert query_counts[1] == query_counts[2]
+
+
+def _wholesale_order(*, quantity: int, model, color):
+    return create_sales_order(
+        source=SalesOrder.Source.WHOLESALE,
+        customer_info="ТОВ Гурт",
+        lines_data=[{"product_id": model.id, "color_id": color.id, "quantity": quantity}],
+    )
+
+
+@pytest.mark.django_db
+def test_create_production_orders_fans_out_in_constant_queries():
+    subscriber = UserFactory(telegram_id="777")
+    NotificationSetting.objects.filter(user=subscriber).update(notify_order_created_pause=False)
+    user = UserFactory()
+    model = ProductFactory(is_bundle=False)
+    color = ColorFactory()
+    small = _wholesale_order(quantity=2, model=model, color=color)
+    large = _wholesale_order(quantity=60, model=model, color=color)
+
+    query_counts = []
+    for order in (small, large):
+        # Both runs start with a cold warehouse registry, so they read its version alike.
+        clear_local_warehouse_registry()
+        with CaptureQueriesContext(connection) as queries:
+            create_production_orders_for_sales_order(sales_order=order, created_by=user)
+        query_counts.append(len(queries))
+
+    assert query_counts[0] == query_counts[1]
+    assert large.lines.get().production_orders.count() == 60
+    assert (
+        ProductionOrderStatusHistory.objects.filter(
+            order__sales_order_line__sales_order=large
+        ).count()
+        == 60
+    )
+    assert NotificationOutbox.objects.filter(text__startswith="Нових замовлень: 60.").count() == 1
+
+
+@pytest.mark.django_db
+def test_create_production_orders_uses_stock_before_producing():
+    user = UserFactory()
+    model = ProductFactory(is_bundle=False)
+    color = ColorFactory()
+    order = _wholesale_order(quantity=5, model=model, color=color)
+    add_to_stock(
+        warehouse_id=get_default_warehouse().id,
+        variant_id=Variant.objects.get(product=model, color=color).id,
+        quantity=3,
+        reason=ProductStockMovement.Reason.ADJUSTMENT_IN,
+    )
+
+    created = create_production_orders_for_sales_order(sales_order=order, created_by=user)
+
+    assert len(created) == 2
+
+
+@pytest.mark.django_db
+def test_line_counters_follow_production_orders_to_ready():
+    user = UserFactory()
+    model = ProductFactory(is_bundle=False)
+    order = _wholesale_order(quantity=3, model=model, color=ColorFactory())
+    production_orders = create_production_orders_for_sales_order(sales_order=order, created_by=user)
+
+    line = order.lines.get()
+    assert (line.total_production_orders, line.finished_production_orders) == (3, 0)
+    order.refresh_from_db()
+    assert (order.status, order.total_lines, order.done_lines) == (
+        SalesOrder.Status.PRODUCTION,
+        1,
+        0,
+    )
+
+    change_production_order_status(
+        production_orders=production_orders,
+        new_status=STATUS_DONE,
+        changed_by=user,
+        on_sales_line_done=sync_sales_order_line_production,
+    )
+
+    line.refresh_from_db()
+    order.refresh_from_db()
+    assert line.finished_production_orders == 3
+    assert line.production_status == SalesOrderLine.ProductionStatus.DONE
+    assert (order.status, order.done_lines) == (SalesOrder.Status.READY, 1)
+
+
+@pytest.mark.django_db
+def test_line_counters_follow_deleted_and_reassigned_production_orders():
+    user = UserFactory()
+    model, color = ProductFactory(is_bundle=False), ColorFactory()
+    first = _wholesale_order(quantity=2, model=model, color=color)
+    second = _wholesale_order(quantity=1, model=model, color=color)
+    finished, moved = create_production_orders_for_sales_order(sales_order=first, created_by=user)
+    create_production_orders_for_sales_order(sales_order=second, created_by=user)
+    change_production_order_status(
+        production_orders=[finished],
+        new_status=STATUS_DONE,
+        changed_by=user,
+        on_sales_line_done=sync_sales_order_line_production,
+    )
+
+    # As the admin would: reassign one order to another line and delete a finished one.
+    moved.sales_order_line = second.lines.get()
+    moved.save()
+    finished.delete()
+
+    first_line, second_line = first.lines.get(), second.lines.get()
+    assert (first_line.total_production_orders, first_line.finished_production_orders) == (0, 0)
+    assert (second_line.total_production_orders, second_line.finished_production_orders) == (2, 0)
+    assert rebuild_sales_counters() == {"lines": 0, "orders": 0}
+
+
+@pytest.mark.django_db
+def test_rebuild_sales_counters_command_repairs_drift():
+    user = UserFactory()
+    model = ProductFactory(is_bundle=False)
+    order = _wholesale_order(quantity=2, model=model, color=ColorFactory())
+    create_production_orders_for_sales_order(sales_order=order, created_by=user)
+    SalesOrderLine.objects.update(total_production_orders=0, finished_production_orders=5)
+    SalesOrder.objects.filter(id=order.id).update(total_lines=7)
+    output = StringIO()
+
+    call_command("rebuild_sales_counters", stdout=output)
+
+    line = order.lines.get()
+    order.refresh_from_db()
+    assert (line.total_production_orders, line.finished_production_orders) == (2, 0)
+    assert (order.total_lines, order.done_lines) == (1, 0)
+    assert "Lines fixed: 1" in output.getvalue()
@@ -0,0 +1,212 @@
+"""Keyset (seek) pagination with opaque cursors.
+
+Pages are fetched with `WHERE (sort keys) after/before cursor ORDER BY ... LIMIT n`, so a deep
+page costs the same as the first one, unlike `Paginator`'s OFFSET plus COUNT(*).
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import F, Model, Q, QuerySet
+from django.utils.dateparse import parse_date, parse_datetime
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str | None
+    previous_cursor: str | None
+    count: int | None = None
+    count_is_approximate: bool = False
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+
+@dataclass(frozen=True)
+class _SortKey:
+    field: str
+    descending: bool
+    nullable: bool = True
+
+    @classmethod
+    def parse(cls, spec: str, model: type[Model]) -> _SortKey:
+        field = spec.lstrip("-")
+        return cls(field=field, descending=spec.startswith("-"), nullable=_is_nullable(model, field))
+
+    def order_expression(self, *, reverse: bool = False):
+        # NULLs sort as PostgreSQL sorts them by default, above every value, so a plain index
+        # on the keys serves the query in both directions. Non-null keys need no modifier.
+        if self.descending != reverse:
+            return F(self.field).desc(**({"nulls_first": True} if self.nullable else {}))
+        return F(self.field).asc(**({"nulls_last": True} if self.nullable else {}))
+
+
+def paginate_keyset(
+    queryset: QuerySet,
+    *,
+    ordering: Sequence[str],
+    cursor: str | None,
+    per_page: int,
+) -> KeysetPage:
+    """Return one page of `queryset` ordered by `ordering` (last key must be unique, e.g. id).
+
+    An invalid or tampered cursor falls back to the first page.
+    """
+    keys = [_SortKey.parse(spec, queryset.model) for spec in ordering]
+    position = decode_cursor(cursor, len(keys))
+    direction, values = position if position else (NEXT, None)
+    backwards = direction == PREVIOUS
+
+    page_qs = queryset.order_by(*(key.order_expression(reverse=backwards) for key in keys))
+    if values is not None:
+        page_qs = page_qs.filter(_seek_condition(keys, values, backwards=backwards))
+    rows = list(page_qs[: per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(object_list=[], next_cursor=None, previous_cursor=None)
+
+    first_values = [getattr(rows[0], key.field) for key in keys]
+    last_values = [getattr(rows[-1], key.field) for key in keys]
+    if backwards:
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, values is not None
+    return KeysetPage(
+        object_list=rows,
+        next_cursor=encode_cursor(NEXT, last_values) if has_next else None,
+        previous_cursor=encode_cursor(PREVIOUS, first_values) if has_previous else None,
+    )
+
+
+def approximate_count(queryset: QuerySet, *, exact_below: int = 10_000) -> tuple[int, bool]:
+    """Row count for display; on PostgreSQL large results use the planner's estimate.
+
+    Returns (count, is_approximate).
+    """
+    if connection.vendor != "postgresql":
+        return queryset.count(), False
+
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate < exact_below:
+        return queryset.count(), False
+    return estimate, True
+
+
+def query_string_without_cursor(request) -> str:
+    """Current GET parameters minus paging ones, for building prev/next links."""
+    query_params = request.GET.copy()
+    query_params.pop("cursor", None)
+    query_params.pop("page", None)
+    return query_params.urlencode()
+
+
+def encode_cursor(direction: str, values: Sequence[object]) -> str:
+    payload = json.dumps([direction, [_encode_value(value) for value in values]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None, size: int) -> tuple[str, list[object]] | None:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, encoded = json.loads(raw)
+        values = [_decode_value(item) for item in encoded]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or len(values) != size:
+        return None
+    return direction, values
+
+
+def _seek_condition(keys: list[_SortKey], values: list[object], *, backwards: bool) -> Q:
+    """Rows strictly after `values` in key order (or before them when paging backwards)."""
+    condition = Q(pk__in=[])
+    equal_prefix = Q()
+    for key, value in zip(keys, values):
+        condition |= equal_prefix & _beyond(key, value, backwards=backwards)
+        if value is None:
+            equal_prefix &= Q(**{f"{key.field}__isnull": True})
+        else:
+            equal_prefix &= Q(**{key.field: value})
+    return condition
+
+
+def _beyond(key: _SortKey, value: object, *, backwards: bool) -> Q:
+    descending = key.descending != backwards
+    if value is None:
+        # NULLs sort above values: walking down every value comes after them, walking up none.
+        return Q(**{f"{key.field}__isnull": False}) if descending else Q(pk__in=[])
+    lookup = "lt" if descending else "gt"
+    after = Q(**{f"{key.field}__{lookup}": value})
+    if descending or not key.nullable:
+        return after
+    return after | Q(**{f"{key.field}__isnull": True})
+
+
+def _is_nullable(model: type[Model], field: str) -> bool:
+    """Annotations and related lookups count as nullable; only plain NOT NULL columns are not."""
+    try:
+        return model._meta.get_field(field).null
+    except FieldDoesNotExist:
+        return True
+
+
+def _encode_value(value: object) -> list[object]:
+    if isinstance(value, datetime):
+        return ["dt", value.isoformat()]
+    if isinstance(value, date):
+        return ["d", value.isoformat()]
+    if isinstance(value, Decimal):
+        return ["dec", str(value)]
+    return ["v", value]
+
+
+def _decode_value(item: list[object]) -> object:
+    kind, value = item
+    if kind == "dt":
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError("bad datetime")
+        return parsed
+    if kind == "d":
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError("bad date")
+        return parsed
+    if kind == "dec":
+        return Decimal(value)
+    if kind == "v":
+        return value
+    raise ValueError("unknown value kind")
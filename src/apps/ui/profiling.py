@@ -0,0 +1,148 @@
+"""Per-request SQL and latency profiling with per-view query budgets.
+
+`QueryProfilingMiddleware` counts and times every query a request runs through
+`connection.execute_wrapper`. It logs one `request_profile` line per request and a warning
+when the view's entry in `settings.QUERY_BUDGETS` is exceeded. The profile is also attached
+to the response, so tests can check budgets with `assert_within_query_budget`.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_QUERIES = 3
+SQL_PREVIEW_LENGTH = 200
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    queries: int
+    total_ms: float | None = None
+
+
+@dataclass
+class RequestProfile:
+    method: str
+    path: str
+    url_name: str | None = None
+    status: int | None = None
+    queries: int = 0
+    sql_ms: float = 0.0
+    total_ms: float = 0.0
+    slowest: list[tuple[float, str]] = field(default_factory=list)
+
+    def record(self, sql: str, duration_ms: float) -> None:
+        self.queries += 1
+        self.sql_ms += duration_ms
+        entry = (round(duration_ms, 2), sql[:SQL_PREVIEW_LENGTH])
+        if len(self.slowest) < SLOWEST_QUERIES:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def as_log_fields(self) -> dict[str, object]:
+        fields = asdict(self)
+        fields["sql_ms"] = round(self.sql_ms, 2)
+        fields["total_ms"] = round(self.total_ms, 2)
+        fields["slowest"] = sorted(self.slowest, reverse=True)
+        return fields
+
+    def budget_violations(self, budget: QueryBudget) -> list[str]:
+        violations = []
+        if self.queries > budget.queries:
+            violations.append(f"queries={self.queries}>{budget.queries}")
+        if budget.total_ms is not None and self.total_ms > budget.total_ms:
+            violations.append(f"total_ms={self.total_ms:.0f}>{budget.total_ms:.0f}")
+        return violations
+
+
+def get_query_budget(url_name: str | None) -> QueryBudget | None:
+    budget = getattr(settings, "QUERY_BUDGETS", {}).get(url_name)
+    if budget is None:
+        return None
+    return budget if isinstance(budget, QueryBudget) else QueryBudget(**budget)
+
+
+class QueryProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "QUERY_PROFILING_ENABLED", True):
+            return self.get_response(request)
+
+        profile = RequestProfile(method=request.method, path=request.path)
+        started = time.perf_counter()
+        with connection.execute_wrapper(_QueryRecorder(profile)):
+            response = self.get_response(request)
+        profile.total_ms = (time.perf_counter() - started) * 1000
+        match = getattr(request, "resolver_match", None)
+        profile.url_name = match.url_name if match else None
+        profile.status = response.status_code
+        response.request_profile = profile
+        _log_profile(profile)
+        return response
+
+
+class _QueryRecorder:
+    def __init__(self, profile: RequestProfile):
+        self.profile = profile
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.profile.record(sql, (time.perf_counter() - started) * 1000)
+
+
+def _log_profile(profile: RequestProfile) -> None:
+    # The console formatter prints only the message, so the slowest SQL goes into it too;
+    # `extra` keeps the structured fields for handlers that serialize them.
+    fields = profile.as_log_fields()
+    summary = (
+        f"url_name={profile.url_name} status={profile.status} queries={profile.queries} "
+        f"sql_ms={fields['sql_ms']} total_ms={fields['total_ms']} "
+        f"slowest={_slowest_preview(fields['slowest'])}"
+    )
+    logger.info("request_profile %s", summary, extra={"request_profile": fields})
+
+    budget = get_query_budget(profile.url_name)
+    violations = profile.budget_violations(budget) if budget else []
+    if violations:
+        logger.warning(
+            "query_budget_exceeded url_name=%s %s slowest=%s",
+            profile.url_name,
+            " ".join(violations),
+            _slowest_preview(fields["slowest"]),
+            extra={"request_profile": fields},
+        )
+
+
+def _slowest_preview(slowest: list[tuple[float, str]]) -> str:
+    """One-line `[12.5ms SELECT ...; 3.1ms UPDATE ...]` list of the slowest queries."""
+    return "[" + "; ".join(f"{duration}ms {' '.join(sql.split())}" for duration, sql in slowest) + "]"
+
+
+def assert_within_query_budget(response, *, check_time: bool = False) -> RequestProfile:
+    """Fail a test when the response's view ran more queries than its budget allows.
+
+    Latency is only checked with `check_time=True`; CI timings are too noisy by default.
+    """
+    profile = getattr(response, "request_profile", None)
+    assert profile is not None, "Response was not profiled; is QueryProfilingMiddleware on?"
+    budget = get_query_budget(profile.url_name)
+    assert budget is not None, f"No QUERY_BUDGETS entry for {profile.url_name!r}"
+    if not check_time:
+        budget = QueryBudget(queries=budget.queries)
+    violations = profile.budget_violations(budget)
+    slowest = "\n".join(sql for _, sql in sorted(profile.slowest, reverse=True))
+    assert not violations, f"{profile.url_name}: {' '.join(violations)}\nSlowest:\n{slowest}"
+    return profile
@@ -34,6 +34,7 @@ NAV_ITEMS = [
         "label": "Матеріали",
         "active_on": ("materials", "material_edit", "materials_archive"),
     },
+    {"url_name": "stock_overview", "label": "Залишки", "active_on": ("stock_overview",)},
     {"url_name": "profile", "label": "Профіль", "active_on": ("profile", "change_password")},
 ]
 
@@ -0,0 +1,131 @@
+"""Tests for keyset pagination."""
+import re
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.production.domain.status import STATUS_DONE
+from apps.production.models import ProductionOrder
+from apps.production.views.orders import ACTIVE_ORDERING, COMPLETED_ORDERING
+from apps.production.tests.factories import ColorFactory, OrderFactory, ProductFactory
+from apps.ui.pagination import paginate_keyset
+
+ORDERING = ("-finished_at", "-id")
+
+
+def _walk(queryset, *, per_page):
+    pages, cursor = [], None
+    while True:
+        page = paginate_keyset(queryset, ordering=ORDERING, cursor=cursor, per_page=per_page)
+        pages.append(page)
+        if not page.has_next():
+            return pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.django_db
+def test_keyset_pages_cover_rows_once_with_ties_and_nulls():
+    model, color = ProductFactory(), ColorFactory()
+    orders = [OrderFactory(product=model, color=color, status=STATUS_DONE) for _ in range(7)]
+    same_time = timezone.now()
+    ProductionOrder.objects.filter(id__in=[o.id for o in orders[:4]]).update(finished_at=same_time)
+    ProductionOrder.objects.filter(id=orders[4].id).update(finished_at=same_time - timedelta(days=1))
+    ProductionOrder.objects.filter(id__in=[o.id for o in orders[5:]]).update(finished_at=None)
+    queryset = ProductionOrder.objects.all()
+
+    pages = _walk(queryset, per_page=3)
+
+    walked = [order.id for page in pages for order in page]
+    # NULLs sort above every value, as PostgreSQL sorts them, so they lead a descending list.
+    expected = [o.id for o in reversed(orders[5:])] + [o.id for o in reversed(orders[:4])] + [
+        orders[4].id
+    ]
+    assert walked == expected
+    assert [len(page) for page in pages] == [3, 3, 1]
+
+
+@pytest.mark.django_db
+def test_keyset_previous_cursor_returns_the_same_page():
+    model, color = ProductFactory(), ColorFactory()
+    for _ in range(5):
+        OrderFactory(product=model, color=color, status=STATUS_DONE)
+    queryset = ProductionOrder.objects.all()
+
+    first = paginate_keyset(queryset, ordering=ORDERING, cursor=None, per_page=2)
+    second = paginate_keyset(queryset, ordering=ORDERING, cursor=first.next_cursor, per_page=2)
+    back = paginate_keyset(queryset, ordering=ORDERING, cursor=second.previous_cursor, per_page=2)
+
+    assert [o.id for o in back] == [o.id for o in first]
+    assert not back.has_previous()
+    assert back.has_next()
+
+
+@pytest.mark.django_db
+def test_keyset_invalid_cursor_falls_back_to_first_page():
+    model, color = ProductFactory(), ColorFactory()
+    order = OrderFactory(product=model, color=color, status=STATUS_DONE)
+
+    page = paginate_keyset(
+        ProductionOrder.objects.all(), ordering=ORDERING, cursor="not-a-cursor", per_page=5
+    )
+
+    assert [o.id for o in page] == [order.id]
+
+
+def _index_columns(name):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, ProductionOrder._meta.db_table
+        )
+    index = constraints[name]
+    return [f'"{column}" {order}' for column, order in zip(index["columns"], index["orders"])]
+
+
+def _without_nulls(column):
+    return column.removesuffix(" NULLS FIRST")
+
+
+def _order_by_columns(ordering, cursor=None):
+    with CaptureQueriesContext(connection) as captured:
+        paginate_keyset(ProductionOrder.objects.all(), ordering=ordering, cursor=cursor, per_page=1)
+    sql = captured.captured_queries[-1]["sql"]
+    clause = sql[sql.index(" ORDER BY ") + len(" ORDER BY ") : sql.index(" LIMIT ")]
+    table = f'"{ProductionOrder._meta.db_table}".'
+    return [column.strip().replace(table, "") for column in clause.split(",")]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("index_name", "ordering", "pinned_columns"),
+    [
+        # The completed list filters on status, which pins the index's leading column.
+        ("prod_order_completed_idx", COMPLETED_ORDERING, 1),
+        ("prod_order_active_idx", ACTIVE_ORDERING, 0),
+    ],
+)
+def test_keyset_order_by_matches_the_list_index(index_name, ordering, pinned_columns):
+    model, color = ProductFactory(), ColorFactory()
+    for _ in range(2):
+        OrderFactory(product=model, color=color, status=STATUS_DONE)
+
+    first = paginate_keyset(ProductionOrder.objects.all(), ordering=ordering, cursor=None, per_page=1)
+    second = paginate_keyset(
+        ProductionOrder.objects.all(), ordering=ordering, cursor=first.next_cursor, per_page=1
+    )
+
+    forward = _order_by_columns(ordering)
+    backward = _order_by_columns(ordering, second.previous_cursor)
+
+    # A plain DESC index column is DESC NULLS FIRST on PostgreSQL, which is how nullable keys
+    # are ordered; previous pages walk the same index backwards, every term flipped.
+    assert [_without_nulls(column) for column in forward] == _index_columns(index_name)[
+        pinned_columns:
+    ]
+    flipped = {"DESC NULLS FIRST": "ASC NULLS LAST", "DESC": "ASC", "ASC": "DESC"}
+    assert backward == [
+        re.sub(r"(DESC( NULLS FIRST)?|ASC)$", lambda m: flipped[m.group(0)], column)
+        for column in forward
+    ]
@@ -0,0 +1,72 @@
+"""Tests for request profiling and per-view query budgets."""
+import logging
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from apps.accounts.tests.conftest import UserFactory
+from apps.production.models import ProductionOrderStatusHistory
+from apps.production.tests.conftest import OrderFactory
+from apps.ui.profiling import assert_within_query_budget
+
+AUTH_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+
+@pytest.fixture
+def busy_client(client):
+    """Logged-in client with a few orders, each with history by several users."""
+    users = [UserFactory() for _ in range(3)]
+    client.force_login(users[0], backend=AUTH_BACKEND)
+    orders = [OrderFactory() for _ in range(3)]
+    for order in orders:
+        for user in users:
+            ProductionOrderStatusHistory.objects.create(
+                order=order, changed_by=user, new_status=order.status
+            )
+    client.order = orders[0]
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url_name",
+    ["orders_active", "orders_completed", "order_detail", "stock_overview", "products", "materials"],
+)
+def test_views_stay_within_query_budget(busy_client, url_name):
+    kwargs = {"pk": busy_client.order.pk} if url_name == "order_detail" else {}
+
+    response = busy_client.get(reverse(url_name, kwargs=kwargs))
+
+    assert response.status_code == 200
+    assert_within_query_budget(response)
+
+
+@pytest.mark.django_db
+def test_profile_is_logged_and_budget_overrun_warns(busy_client, caplog):
+    url = reverse("order_detail", kwargs={"pk": busy_client.order.pk})
+    # The "apps" logger does not propagate to the root logger caplog listens on.
+    apps_logger = logging.getLogger("apps")
+    apps_logger.addHandler(caplog.handler)
+
+    try:
+        with override_settings(QUERY_BUDGETS={"order_detail": {"queries": 1}}):
+            with caplog.at_level(logging.INFO, logger="apps.ui.profiling"):
+                response = busy_client.get(url)
+    finally:
+        apps_logger.removeHandler(caplog.handler)
+
+    profile = response.request_profile
+    assert profile.url_name == "order_detail"
+    assert profile.queries > 1
+    [info, warning] = caplog.records
+    assert info.request_profile["queries"] == profile.queries
+    assert warning.levelno == logging.WARNING
+    assert f"queries={profile.queries}>1" in warning.getMessage()
+    # The console formatter drops `extra`, so the slowest SQL must be in the message itself.
+    slowest_sql = " ".join(max(profile.slowest)[1].split())
+    assert slowest_sql in info.getMessage()
+    assert slowest_sql in warning.getMessage()
+    with pytest.raises(AssertionError, match="order_detail"):
+        with override_settings(QUERY_BUDGETS={"order_detail": {"queries": 1}}):
+            assert_within_query_budget(response)
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+def create_registry_version(apps, schema_editor):
+    WarehouseRegistryVersion = apps.get_model("warehouses", "WarehouseRegistryVersion")
+    WarehouseRegistryVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouses', '0002_seed_main_warehouse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WarehouseRegistryVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_registry_version, migrations.RunPython.noop),
+    ]
@@ -26,3 +26,17 @@ class Warehouse(models.Model):
 
     def __str__(self) -> str:
         return f"{self.name} ({self.code})"
+
+
+class WarehouseRegistryVersion(models.Model):
+    """Single-row counter bumped on every Warehouse write.
+
+    Workers compare it with the version of their in-process registry; see
+    apps.warehouses.services.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"warehouse registry v{self.version}"
@@ -1,11 +1,112 @@
 from __future__ import annotations
 
-from apps.warehouses.models import Warehouse
+import copy
+import threading
+import time
+
+from django.db import transaction
+from django.db.models import F
+
+from apps.warehouses.models import Warehouse, WarehouseRegistryVersion
 
 DEFAULT_WAREHOUSE_CODE = "MAIN"
+# Bumped on every Warehouse write. The counter lives in the database, not in the cache, because
+# every worker has its own local-memory cache; workers drop their registry when it moves.
+REGISTRY_VERSION_ID = 1
+# How long a worker trusts its registry before reading the counter again.
+REGISTRY_VERSION_TTL_SECONDS = 5.0
+
+_registry_lock = threading.Lock()
+_registry: dict = {"version": None, "checked_at": None, "default": None, "code_to_id": None}
 
 
 def get_default_warehouse() -> Warehouse:
+    cached = _registry_get("default")
+    if cached is not None:
+        return copy.copy(cached)
+
+    version = _registry_version()
+    warehouse = _load_default_warehouse()
+    _registry_set_on_commit(version, "default", copy.copy(warehouse))
+    return warehouse
+
+
+def get_default_warehouse_id() -> int:
+    cached = _registry_get("default")
+    if cached is not None:
+        return cached.id
+    return get_default_warehouse().id
+
+
+def get_warehouse_id_by_code(code: str) -> int | None:
+    code_to_id = _registry_get("code_to_id")
+    if code_to_id is None:
+        version = _registry_version()
+        code_to_id = dict(Warehouse.objects.values_list("code", "id"))
+        _registry_set_on_commit(version, "code_to_id", code_to_id)
+    return code_to_id.get(code)
+
+
+def invalidate_warehouse_registry() -> None:
+    """Drop this worker's registry and tell other workers to drop theirs."""
+    clear_local_warehouse_registry()
+    updated = WarehouseRegistryVersion.objects.filter(pk=REGISTRY_VERSION_ID).update(
+        version=F("version") + 1
+    )
+    if not updated:
+        WarehouseRegistryVersion.objects.get_or_create(
+            pk=REGISTRY_VERSION_ID, defaults={"version": 1}
+        )
+
+
+def clear_local_warehouse_registry() -> None:
+    with _registry_lock:
+        _registry.update(version=None, checked_at=None, default=None, code_to_id=None)
+
+
+def _registry_version() -> int:
+    """The counter as of the last check; `_registry_get` refreshes it."""
+    with _registry_lock:
+        version = _registry["version"]
+    return version if version is not None else _read_registry_version()
+
+
+def _read_registry_version() -> int:
+    version = (
+        WarehouseRegistryVersion.objects.filter(pk=REGISTRY_VERSION_ID)
+        .values_list("version", flat=True)
+        .first()
+    )
+    return version or 0
+
+
+def _registry_get(key: str):
+    now = time.monotonic()
+    with _registry_lock:
+        checked_at = _registry["checked_at"]
+        if checked_at is not None and now - checked_at < REGISTRY_VERSION_TTL_SECONDS:
+            return _registry[key]
+    version = _read_registry_version()
+    with _registry_lock:
+        if _registry["version"] != version:
+            _registry.update(version=version, default=None, code_to_id=None)
+        _registry["checked_at"] = now
+        return _registry[key]
+
+
+def _registry_set_on_commit(version: int, key: str, value) -> None:
+    # Only cache what is committed: a rolled-back get_or_create must not leak its id.
+    def store():
+        with _registry_lock:
+            if _registry["version"] not in (None, version):
+                return
+            _registry["version"] = version
+            _registry[key] = value
+
+    transaction.on_commit(store)
+
+
+def _load_default_warehouse() -> Warehouse:
     active_default = Warehouse.objects.filter(
         is_active=True,
         is_default_for_production=True,
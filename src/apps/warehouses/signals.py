@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.warehouses.models import Warehouse
+from apps.warehouses.services import clear_local_warehouse_registry, invalidate_warehouse_registry
+
+
+@receiver(post_save, sender=Warehouse)
+@receiver(post_delete, sender=Warehouse)
+def invalidate_registry_on_change(sender, instance, **kwargs):
+    clear_local_warehouse_registry()
+    transaction.on_commit(invalidate_warehouse_registry)
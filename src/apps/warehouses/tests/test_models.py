@@ -1,8 +1,14 @@
 import pytest
 from django.db import IntegrityError
+from django.db.models import F
 
-from apps.warehouses.models import Warehouse
-from apps.warehouses.services import get_default_warehouse
+from apps.warehouses import services
+from apps.warehouses.models import Warehouse, WarehouseRegistryVersion
+from apps.warehouses.services import (
+    get_default_warehouse,
+    get_default_warehouse_id,
+    get_warehouse_id_by_code,
+)
 
 
 @pytest.mark.django_db
@@ -26,3 +32,63 @@ def test_get_default_warehouse_creates_main_if_missing():
     assert warehouse.code == "MAIN"
     assert warehouse.is_default_for_production is True
     assert warehouse.is_active is True
+
+
+@pytest.mark.django_db
+def test_default_warehouse_is_cached_after_commit(
+    django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        warehouse_id = get_default_warehouse_id()
+
+    with django_assert_num_queries(0):
+        assert get_default_warehouse_id() == warehouse_id
+        assert get_default_warehouse().code == "MAIN"
+
+
+@pytest.mark.django_db
+def test_default_warehouse_is_not_cached_before_commit(
+    django_assert_num_queries,
+):
+    get_default_warehouse_id()
+
+    with django_assert_num_queries(1):
+        get_default_warehouse_id()
+
+
+@pytest.mark.django_db
+def test_warehouse_save_invalidates_registry(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        main_id = get_default_warehouse_id()
+        assert get_warehouse_id_by_code("SPARE") is None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Warehouse.objects.filter(pk=main_id).get().delete()
+        spare = Warehouse.objects.create(
+            name="Spare",
+            code="SPARE",
+            kind=Warehouse.Kind.STORAGE,
+            is_default_for_production=True,
+            is_active=True,
+        )
+
+    assert get_default_warehouse_id() == spare.id
+    assert get_warehouse_id_by_code("SPARE") == spare.id
+
+
+@pytest.mark.django_db
+def test_registry_follows_version_bumped_by_another_worker(
+    django_capture_on_commit_callbacks, monkeypatch
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        get_warehouse_id_by_code("MAIN")
+    Warehouse.objects.bulk_create(
+        [Warehouse(name="Bulk", code="BULK", kind=Warehouse.Kind.STORAGE)]
+    )
+    # Another worker's bump goes to the database row, not to this worker's memory.
+    WarehouseRegistryVersion.objects.update(version=F("version") + 1)
+    assert get_warehouse_id_by_code("BULK") is None
+
+    monkeypatch.setattr(services, "REGISTRY_VERSION_TTL_SECONDS", 0)
+
+    assert get_warehouse_id_by_code("BULK") is not None
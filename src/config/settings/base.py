@@ -114,6 +114,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "apps.ui.profiling.QueryProfilingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -190,6 +191,20 @@ AUTH_USER_MODEL = "accounts.User"
 LOGIN_URL = "auth_login"
 FREEZE_LEGACY_WRITES = env_bool("FREEZE_LEGACY_WRITES", False)
 
+# Request profiling: SQL count/time per request in logs, with warnings over these budgets.
+QUERY_PROFILING_ENABLED = env_bool("QUERY_PROFILING_ENABLED", True)
+QUERY_BUDGETS = {
+    "orders_active": {"queries": 6, "total_ms": 800},
+    "orders_completed": {"queries": 6, "total_ms": 800},
+    "order_detail": {"queries": 4, "total_ms": 300},
+    "stock_overview": {"queries": 5, "total_ms": 500},
+    "products": {"queries": 5, "total_ms": 500},
+    "materials": {"queries": 5, "total_ms": 500},
+}
+
+# Seconds to keep active orders board fragments; they are also dropped on any order write.
+ORDER_BOARD_CACHE_TIMEOUT = env_int("ORDER_BOARD_CACHE_TIMEOUT", 600)
+
 CSRF_COOKIE_SAMESITE = "Lax"
 SESSION_COOKIE_SAMESITE = "Lax"
 
@@ -5,6 +5,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("apps.catalog.urls")),
     path("", include("apps.materials.urls")),
+    path("", include("apps.inventory.urls")),
     path("", include("apps.accounts.urls")),
     path("", include("apps.ui.urls")),
     path("", include("apps.production.urls")),
@@ -0,0 +1,18 @@
+import pytest
+from django.core.cache import cache
+
+from apps.catalog.variants import clear_variant_id_cache
+from apps.warehouses.services import clear_local_warehouse_registry
+
+
+@pytest.fixture(autouse=True)
+def _clear_process_registries():
+    # Transactional tests commit, so registries could otherwise carry ids into the next test.
+    # Cached fragments are keyed by database counters that restart with every test database.
+    clear_local_warehouse_registry()
+    clear_variant_id_cache()
+    cache.clear()
+    yield
+    clear_local_warehouse_registry()
+    clear_variant_id_cache()
+    cache.clear()